@@ -0,0 +1,168 @@
+"""add extracted profile tables
+
+Revision ID: 3f6a9c2e71b4
+Revises: 
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6a9c2e71b4'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _timestamps():
+    return [
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    ]
+
+
+def _quarterly_metric_table(name: str):
+    op.create_table(
+        name,
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('symbol', sa.String(length=20), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('quarter', sa.Integer(), nullable=False),
+        sa.Column('item', sa.String(length=255), nullable=False),
+        sa.Column('value', sa.Float(), nullable=True),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('symbol', 'year', 'quarter', 'item', name=f'uq_{name}_symbol_period_item'),
+    )
+    op.create_index(op.f(f'ix_{name}_symbol'), name, ['symbol'], unique=False)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'company_profiles',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('symbol', sa.String(length=20), nullable=False),
+        sa.Column('company_name', sa.String(length=255), nullable=True),
+        sa.Column('short_name', sa.String(length=100), nullable=True),
+        sa.Column('industry', sa.String(length=255), nullable=True),
+        sa.Column('sector', sa.String(length=255), nullable=True),
+        sa.Column('country', sa.String(length=100), nullable=True),
+        sa.Column('website', sa.String(length=255), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('strengths', sa.Text(), nullable=True),
+        sa.Column('weaknesses', sa.Text(), nullable=True),
+        sa.Column('opportunities', sa.Text(), nullable=True),
+        sa.Column('threats', sa.Text(), nullable=True),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('symbol', name='uq_company_profiles_symbol'),
+    )
+
+    op.create_table(
+        'shareholders',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('symbol', sa.String(length=20), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('ownership_percent', sa.Float(), nullable=True),
+        sa.Column('shares_owned', sa.Float(), nullable=True),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('symbol', 'name', name='uq_shareholders_symbol_name'),
+    )
+    op.create_index(op.f('ix_shareholders_symbol'), 'shareholders', ['symbol'], unique=False)
+
+    op.create_table(
+        'officers',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('symbol', sa.String(length=20), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('position', sa.String(length=255), nullable=True),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('symbol', 'name', name='uq_officers_symbol_name'),
+    )
+    op.create_index(op.f('ix_officers_symbol'), 'officers', ['symbol'], unique=False)
+
+    for name in ('income_statements', 'balance_sheets', 'ratios'):
+        _quarterly_metric_table(name)
+
+    op.create_table(
+        'insider_transactions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('symbol', sa.String(length=20), nullable=False),
+        sa.Column('transaction_date', sa.Date(), nullable=False),
+        sa.Column('insider_name', sa.String(length=255), nullable=False),
+        sa.Column('position', sa.String(length=255), nullable=True),
+        sa.Column('transaction_type', sa.String(length=100), server_default='', nullable=False),
+        sa.Column('shares', sa.Float(), nullable=True),
+        sa.Column('price', sa.Float(), nullable=True),
+        sa.Column('value', sa.Float(), nullable=True),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'symbol', 'transaction_date', 'insider_name', 'transaction_type',
+            name='uq_insider_transactions_natural_key',
+        ),
+    )
+    op.create_index(op.f('ix_insider_transactions_symbol'), 'insider_transactions', ['symbol'], unique=False)
+
+    op.create_table(
+        'foreign_transactions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('symbol', sa.String(length=20), nullable=False),
+        sa.Column('transaction_date', sa.Date(), nullable=False),
+        sa.Column('net_buy_sell', sa.Float(), nullable=True),
+        sa.Column('buy_volume', sa.Float(), nullable=True),
+        sa.Column('sell_volume', sa.Float(), nullable=True),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('symbol', 'transaction_date', name='uq_foreign_transactions_symbol_date'),
+    )
+    op.create_index(op.f('ix_foreign_transactions_symbol'), 'foreign_transactions', ['symbol'], unique=False)
+
+    op.create_table(
+        'macro_assets',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('as_of', sa.Date(), nullable=False),
+        sa.Column('asset_type', sa.String(length=255), nullable=False),
+        sa.Column('price', sa.Float(), nullable=True),
+        sa.Column('change_percent', sa.Float(), nullable=True),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('as_of', 'asset_type', name='uq_macro_assets_date_asset'),
+    )
+    op.create_index(op.f('ix_macro_assets_as_of'), 'macro_assets', ['as_of'], unique=False)
+
+    op.create_table(
+        'macro_indicators',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('indicator', sa.String(length=255), nullable=False),
+        sa.Column('period', sa.String(length=100), nullable=False),
+        sa.Column('current_value', sa.Float(), nullable=True),
+        sa.Column('previous_value', sa.Float(), nullable=True),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('indicator', 'period', name='uq_macro_indicators_indicator_period'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('macro_indicators')
+    op.drop_index(op.f('ix_macro_assets_as_of'), table_name='macro_assets')
+    op.drop_table('macro_assets')
+    op.drop_index(op.f('ix_foreign_transactions_symbol'), table_name='foreign_transactions')
+    op.drop_table('foreign_transactions')
+    op.drop_index(op.f('ix_insider_transactions_symbol'), table_name='insider_transactions')
+    op.drop_table('insider_transactions')
+    for name in ('ratios', 'balance_sheets', 'income_statements'):
+        op.drop_index(op.f(f'ix_{name}_symbol'), table_name=name)
+        op.drop_table(name)
+    op.drop_index(op.f('ix_officers_symbol'), table_name='officers')
+    op.drop_table('officers')
+    op.drop_index(op.f('ix_shareholders_symbol'), table_name='shareholders')
+    op.drop_table('shareholders')
+    op.drop_table('company_profiles')
@@ -15,8 +15,80 @@ class Config:
     except json.JSONDecodeError:
         GEMINI_API_KEYS = []
     GEMINI_MODEL_ID = os.getenv("GEMINI_MODEL_ID", "gemini-2.5-flash")
+    # Endpoint thay thế (ví dụ fake server khi test), để trống để dùng endpoint mặc định
+    GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL") or None
+    # Ngân sách mỗi key: số request/phút và token/phút
+    GEMINI_RPM = int(os.getenv("GEMINI_RPM", "10"))
+    GEMINI_TPM = int(os.getenv("GEMINI_TPM", "250000"))
+    # Số request đồng thời tối đa (0 = tự tính theo số key)
+    GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "0"))
+
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "True").lower() == "true"
+    LLM_CACHE_EXPIRY_DAYS = int(os.getenv("LLM_CACHE_EXPIRY_DAYS", "30"))
+
+    # Rút gọn text crawl trước khi đưa vào prompt
+    COMPACTION_ENABLED = os.getenv("COMPACTION_ENABLED", "True").lower() == "true"
+    COMPACTION_SECTION_TOKEN_BUDGET = int(os.getenv("COMPACTION_SECTION_TOKEN_BUDGET", "4000"))
+    # Profile vượt ngân sách token được trích xuất theo từng phần song song rồi gộp lại
+    CHUNKED_EXTRACTION_ENABLED = os.getenv("CHUNKED_EXTRACTION_ENABLED", "True").lower() == "true"
+    CHUNKED_EXTRACTION_TOKEN_BUDGET = int(os.getenv("CHUNKED_EXTRACTION_TOKEN_BUDGET", "24000"))
+    # Gộp nhiều mã nhỏ vào một request LLM (batch mode)
+    BATCH_EXTRACTION_TOKEN_BUDGET = int(os.getenv("BATCH_EXTRACTION_TOKEN_BUDGET", "16000"))
+    BATCH_TICKER_MAX_TOKENS = int(os.getenv("BATCH_TICKER_MAX_TOKENS", "4000"))
+    BATCH_MAX_TICKERS = int(os.getenv("BATCH_MAX_TICKERS", "5"))
+    # Số tác vụ đồng thời theo tài nguyên khi sync cả thị trường (0 = mặc định theo pool)
+    SYNC_BROWSER_CONCURRENCY = int(os.getenv("SYNC_BROWSER_CONCURRENCY", "0"))
+    SYNC_LLM_CONCURRENCY = int(os.getenv("SYNC_LLM_CONCURRENCY", "0"))
+    SYNC_DB_CONCURRENCY = int(os.getenv("SYNC_DB_CONCURRENCY", "4"))
+    # Scheduler: số job chạy đồng thời theo loại tài nguyên, jitter để không dồn request vào cùng một phút
+    SCHEDULER_TIMEZONE = os.getenv("SCHEDULER_TIMEZONE", "Asia/Ho_Chi_Minh")
+    SCHEDULER_BROWSER_WORKERS = int(os.getenv("SCHEDULER_BROWSER_WORKERS", "1"))
+    SCHEDULER_LLM_WORKERS = int(os.getenv("SCHEDULER_LLM_WORKERS", "2"))
+    SCHEDULER_DB_WORKERS = int(os.getenv("SCHEDULER_DB_WORKERS", "2"))
+    SCHEDULER_JITTER_SECONDS = int(os.getenv("SCHEDULER_JITTER_SECONDS", "300"))
+    SCHEDULER_MISFIRE_GRACE_SECONDS = int(os.getenv("SCHEDULER_MISFIRE_GRACE_SECONDS", "3600"))
+    # Hàng đợi việc trong PostgreSQL cho crawler chạy trên nhiều máy
+    WORK_QUEUE_LEASE_SECONDS = int(os.getenv("WORK_QUEUE_LEASE_SECONDS", "300"))
+    WORK_QUEUE_BATCH_SIZE = int(os.getenv("WORK_QUEUE_BATCH_SIZE", "8"))
+    WORK_QUEUE_POLL_SECONDS = float(os.getenv("WORK_QUEUE_POLL_SECONDS", "5"))
+    WORK_QUEUE_MAX_ATTEMPTS = int(os.getenv("WORK_QUEUE_MAX_ATTEMPTS", "5"))
+    WORK_QUEUE_BACKOFF_SECONDS = int(os.getenv("WORK_QUEUE_BACKOFF_SECONDS", "60"))
+    WORK_QUEUE_MAX_BACKOFF_SECONDS = int(os.getenv("WORK_QUEUE_MAX_BACKOFF_SECONDS", "3600"))
 
     CACHE_DIR = os.getenv("CACHE_DIR", "cache")
     CACHE_EXPIRY_DAYS = int(os.getenv("CACHE_EXPIRY_DAYS", "7"))
+    # Số ngày giữ lại entry đã hết hạn để phục vụ bản cũ trong lúc đang refresh
+    CACHE_STALE_DAYS = int(os.getenv("CACHE_STALE_DAYS", "1"))
+    SECTION_FINGERPRINT_EXPIRY_DAYS = int(os.getenv("SECTION_FINGERPRINT_EXPIRY_DAYS", "90"))
+    CACHE_MEMORY_MAX_ENTRIES = int(os.getenv("CACHE_MEMORY_MAX_ENTRIES", "1024"))
+    CACHE_MEMORY_MAX_MB = int(os.getenv("CACHE_MEMORY_MAX_MB", "256"))
+
+    CAFEF_BASE_URL = os.getenv("CAFEF_BASE_URL", "https://cafef.vn")
+    CAFEF_COMPANY_LIST_URL = os.getenv(
+        "CAFEF_COMPANY_LIST_URL", "https://cafef1.mediacdn.vn/Search/company.json"
+    )
+
+    BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+    BROWSER_POOL_CONTEXTS = int(os.getenv("BROWSER_POOL_CONTEXTS", "4"))
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+    # Số process parse HTML (0 = parse ngay trên event loop), trang nhỏ hơn ngưỡng ký tự luôn parse ngay
+    HTML_PARSE_WORKERS = int(os.getenv("HTML_PARSE_WORKERS", "2"))
+    HTML_PARSE_INLINE_CHARS = int(os.getenv("HTML_PARSE_INLINE_CHARS", "50000"))
+    # Độ trễ (ms) giữa các thao tác Playwright, chỉ dùng khi debug
+    BROWSER_SLOW_MO = int(os.getenv("BROWSER_SLOW_MO", "0"))
+    # Dùng lại context/page đã khởi tạo giữa các mã; khởi động lại browser sau N page
+    # hoặc khi RSS của một browser vượt ngưỡng (0 = tắt)
+    BROWSER_CONTEXT_REUSE = os.getenv("BROWSER_CONTEXT_REUSE", "True").lower() == "true"
+    BROWSER_RECYCLE_PAGES = int(os.getenv("BROWSER_RECYCLE_PAGES", "200"))
+    BROWSER_RECYCLE_RSS_MB = int(os.getenv("BROWSER_RECYCLE_RSS_MB", "1500"))
+    # Chặn request không cần cho việc đọc text (ảnh, font, quảng cáo, tracking)
+    REQUEST_BLOCKING_ENABLED = os.getenv("REQUEST_BLOCKING_ENABLED", "True").lower() == "true"
+    REQUEST_BLOCKED_RESOURCE_TYPES = [
+        t.strip() for t in os.getenv("REQUEST_BLOCKED_RESOURCE_TYPES", "image,media,font").split(",") if t.strip()
+    ]
+    # Domain chặn thêm ngoài danh sách quảng cáo/tracking mặc định
+    REQUEST_BLOCKED_DOMAINS = [
+        d.strip() for d in os.getenv("REQUEST_BLOCKED_DOMAINS", "").split(",") if d.strip()
+    ]
 
 config = Config()
\ No newline at end of file
@@ -1,18 +1,62 @@
+import asyncio
 import re
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import unquote_plus, urljoin, urlsplit, urlunsplit
 
 import requests
-from bs4 import BeautifulSoup
-from playwright.sync_api import Page
+from playwright.async_api import Page as AsyncPage
 from tenacity import retry, stop_after_attempt, wait_random
 
+from app.config import config
 from app.logger import logger
+from app.utils.browser_pool import BrowserPool
 from app.utils.caching_util import CachingUtil
 from app.utils.decorators import cached_data, log_execution_time
-from app.utils.playwright_manager import PlaywrightManager
+from app.utils.html_extract import HtmlExtract, class_xpath, extract_html, extract_html_async
+from app.utils.http_client import http_fetcher
+from app.utils.page_waiter import click_and_wait, get_wait_policy
+from app.utils.profile_sections import ProfileSection, join_sections, make_section
+from app.utils.request_router import get_route_stats
+from app.utils.symbol_index import SymbolEntry, SymbolIndex
 
 
 class CafefCrawler:
-    BASE_URL = "https://cafef.vn"
+    BASE_URL = config.CAFEF_BASE_URL
+    COMPANY_LIST_URL = config.CAFEF_COMPANY_LIST_URL
+
+    # Nhãn các section trong profile text (được dùng trong prompt company_profile)
+    OVERVIEW_LABEL = "[Tên công ty, Mã chứng khoán, Lĩnh vực hoạt động, Mô tả hoạt động kinh doanh, Thông tin liên hệ, Các thông tin cơ bản liên quan đến transaction (Giá tham chiếu ~ KLCP lưu hành), ...]"
+    BASIC_INFO_LABEL = "[Thông tin cơ bản, lịch sử hình thành, ngành nghề kinh doanh ...]"
+    LEADERSHIP_LABEL = "[Ban lãnh đạo & Sở hữu]"
+    FOREIGN_LABEL = "[Khối ngoại]"
+    OWNER_TAB_KEYWORDS = ["Danh sách cổ đông", "Đang sở hữu", "GD CĐ nội bộ & CĐ lớn"]
+    FOREIGN_KEYWORD = "Khối ngoại"
+    # (text của thẻ h2, nhãn section, từ khóa href của link chi tiết, nhãn section chi tiết)
+    MAIN_TABS = [
+        ("Kết quả kinh doanh", "[Kết quả kinh doanh]", "incsta", "[Kết quả kinh doanh chi tiết]"),
+        ("Tài nguyên - Nguồn vốn", "[Tài nguyên - Nguồn vốn]", "bsheet", "[Tài nguyên - Nguồn vốn chi tiết]"),
+        ("Chỉ số tài chính", "[Chỉ số tài chính]", None, None),
+        ("Công ty con & liên kết", "[Công ty con & liên kết]", None, None),
+    ]
+
+    # Vùng chứa nội dung chính, thứ tự ưu tiên từ hẹp đến rộng
+    # CafeF thường dùng 'content' hoặc 'left_col' cho phần thông tin doanh nghiệp
+    MAIN_CONTENT_XPATHS = (
+        class_xpath("div", "content"),
+        "//div[@id='content']",
+        class_xpath("div", "pagewrap"),
+        "//div[@id='pagewrap']",
+        "//div[@id='cf_ContainerBox']",
+    )
+    OWNER_TAB_XPATH = class_xpath("h2", "owner-tab")
+    # Dòng dữ liệu của bảng: dấu hiệu fragment/trang chi tiết hợp lệ
+    TABLE_ROW_XPATH = "//table//tr[td]"
+
+    SYMBOL_PLACEHOLDER = "__SYMBOL__"
+    # Endpoint AJAX phía sau các tab cổ đông, học được khi crawl bằng Playwright (dùng chung trong process)
+    _fragment_templates = {}
 
     def __init__(self):
         self.cache = CachingUtil()
@@ -24,7 +68,7 @@ class CafefCrawler:
     @cached_data(cache_key_prefix="cafef_companies", extension="json")
     def get_all_companies(self):
         # Nếu không có file cache hợp lệ, lấy dữ liệu mới từ endpoint
-        endpoint_url = "https://cafef1.mediacdn.vn/Search/company.json"
+        endpoint_url = self.COMPANY_LIST_URL
         response = requests.get(endpoint_url)
         if response.status_code != 200:
             raise Exception(f"Failed to fetch data from {endpoint_url}")
@@ -32,57 +76,76 @@ class CafefCrawler:
         # Parse dữ liệu từ response
         return response.json()
 
+    def _build_symbol_index(self) -> Dict[str, SymbolEntry]:
+        entries = {}
+        for company in self.get_all_companies():
+            redirect_url = company.get("RedirectUrl") or ""
+            # RedirectUrl có dạng /du-lieu/hose/vnm-....chn, sàn nằm trong đường dẫn
+            exchange = company.get("Exchange") or next(
+                (
+                    part.upper()
+                    for part in redirect_url.lower().split("/")
+                    if part in ("hose", "hnx", "upcom", "otc")
+                ),
+                "",
+            )
+            entries[company["Symbol"]] = SymbolEntry(
+                redirect_url=redirect_url,
+                exchange=exchange,
+                name=company.get("Title") or company.get("Name") or "",
+            )
+        return entries
+
+    def _symbol_index(self) -> SymbolIndex:
+        return SymbolIndex.get_instance("cafef_companies", self._build_symbol_index)
+
+    def list_symbols(self, exchanges: Iterable[str] = None) -> List[str]:
+        """Danh sách mã trên CafeF, lọc theo sàn (HOSE, HNX, UPCOM, ...) nếu có"""
+        exchanges = {e.upper() for e in exchanges} if exchanges else None
+        return sorted(
+            symbol
+            for symbol, entry in self._symbol_index().items()
+            if exchanges is None or entry.exchange.upper() in exchanges
+        )
+
     def _get_company_url(self, ticker: str):
-        companies = self.get_all_companies()
-        for company in companies:
-            if company["Symbol"] == ticker:
-                return f"{self.BASE_URL}{company['RedirectUrl']}"
+        entry = self._symbol_index().get(ticker)
+        if entry:
+            return f"{self.BASE_URL}{entry.redirect_url}"
         return None
 
-    def _get_page_content(self, page: Page):
-        # Lấy content từ page
-        page_text = page.content()
-        soup = BeautifulSoup(page_text, "html.parser")
-
-        # Thử tìm các vùng chứa nội dung chính (thứ tự ưu tiên từ hẹp đến rộng)
-        # CafeF thường dùng 'content' hoặc 'left_col' cho phần thông tin doanh nghiệp
-        main_content = (
-            soup.find("div", class_="content")
-            or soup.find("div", id="content")
-            or soup.find("div", class_="pagewrap")
-            or soup.find("div", id="pagewrap")
-            or soup.find("div", id="cf_ContainerBox")
-        )
-
-        if main_content:
-            return main_content.get_text(separator=" ", strip=True)
+    async def _extract(self, html: Optional[str], **kwargs) -> Optional[HtmlExtract]:
+        """
+        Parse trang một lần (trong process pool) và lấy text nội dung chính, link, các phần khác.
+        Mỗi text node một dòng để bước compaction nhận diện được dòng boilerplate.
+        """
+        if not html:
+            return None
+        return await extract_html_async(html, main_xpaths=self.MAIN_CONTENT_XPATHS, **kwargs)
 
-        return soup.get_text(separator=" ", strip=True)
+    async def _get_page_content(self, page: AsyncPage):
+        # Lấy content từ page
+        extracted = await self._extract(await page.content())
+        return extracted.text if extracted else ""
 
-    def _get_selector_content(self, page: Page, selector: str):
+    async def _get_selector_content(self, page: AsyncPage, selector: str):
         try:
-            element = page.query_selector(selector)
+            element = await page.query_selector(selector)
             if element:
-                html_content = element.inner_html()
-                soup = BeautifulSoup(html_content, "html.parser")
-                return soup.get_text(separator=" ", strip=True)
+                html_content = await element.inner_html()
+                return extract_html(html_content, separator=" ").text
         except Exception as e:
             logger.warning(f"Error while fetching content for selector {selector}: {e}")
         return ""
 
-    def _get_table_by_selector(self, page: Page, selector: str):
+    async def _get_table_by_selector(self, page: AsyncPage, selector: str):
         try:
-            element = page.query_selector(selector)
+            element = await page.query_selector(selector)
             if element:
-                html_content = element.inner_html()
-                soup = BeautifulSoup(html_content, "html.parser")
-                rows = soup.find_all("tr")
-                table_text = []
-                for row in rows:
-                    cols = row.find_all(["td", "th"])
-                    cols_text = [col.get_text(strip=True) for col in cols]
-                    table_text.append(",".join(cols_text))
-                return "\n".join(table_text)
+                # outerHTML để giữ thẻ <table>, các dòng được lấy trên toàn fragment
+                html_content = await element.evaluate("element => element.outerHTML")
+                rows = extract_html(html_content, tables={"rows": "/html"}).tables["rows"]
+                return "\n".join(",".join(cols) for cols in rows)
         except Exception as e:
             logger.warning(f"Error while fetching table for selector {selector}: {e}")
         return ""
@@ -93,157 +156,389 @@ class CafefCrawler:
     )
     @log_execution_time
     def get_company_profile(self, symbol: str):
+        return join_sections(self.get_company_sections(symbol))
+
+    def get_company_sections(self, symbol: str) -> List[ProfileSection]:
+        """Profile của một mã dưới dạng danh sách section có fingerprint"""
         company_url = self._get_company_url(symbol)
         if not company_url:
             raise Exception(f"Company with symbol {symbol} not found on Cafef")
 
-        profile_data = []
-        page = PlaywrightManager.get_page()
+        return BrowserPool.get_instance().run(
+            self._crawl_company_sections(symbol, company_url)
+        )
+
+    def get_company_profiles(
+        self, symbols: Iterable[str], concurrency: int = None
+    ) -> Iterator[Tuple[str, Optional[str]]]:
+        """
+        Crawl profile của nhiều mã song song trên BrowserPool.
+        Trả về (symbol, profile_text) ngay khi từng mã hoàn tất, không theo thứ tự đầu vào.
+        profile_text là None nếu mã không tồn tại hoặc crawl lỗi.
+        """
+        pool = BrowserPool.get_instance()
+        concurrency = max(1, concurrency or pool.size)
+        pending = {}
+        skipped = []
+        symbol_iter = iter(symbols)
+
+        def submit_next():
+            for symbol in symbol_iter:
+                company_url = self._get_company_url(symbol)
+                if not company_url:
+                    logger.warning(f"Company with symbol {symbol} not found on Cafef")
+                    skipped.append(symbol)
+                    continue
+                future = pool.submit(self._crawl_company_sections(symbol, company_url))
+                pending[future] = symbol
+                return
+
+        for _ in range(concurrency):
+            submit_next()
+
+        while pending or skipped:
+            while skipped:
+                yield skipped.pop(0), None
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                symbol = pending.pop(future)
+                try:
+                    yield symbol, join_sections(future.result())
+                except Exception as e:
+                    logger.warning(f"Error while fetching profile for {symbol}: {e}")
+                    yield symbol, None
+                submit_next()
+
+    async def _crawl_company_sections(
+        self, symbol: str, company_url: str
+    ) -> List[ProfileSection]:
+        """
+        Các section render sẵn phía server được lấy bằng HTTP trước (song song),
+        Playwright chỉ được mở cho các section HTTP không lấy được (lỗi, trang lỗi, cần JS).
+        Raise nếu bước Playwright lỗi hoặc không lấy được section nào.
+        """
+        sections, owner_labels, links, page_tabs = {}, [], {}, None
         try:
-            page.goto(company_url, timeout=15000)
-            page_text = page.content()
-            soup = BeautifulSoup(page_text, "html.parser")
+            sections, owner_labels, links, page_tabs = await self._fetch_static_sections(
+                symbol, company_url
+            )
+        except Exception as e:
+            logger.warning(f"HTTP fetch failed for {symbol}, falling back to Playwright: {e}")
 
-            # Tổng quan
-            profile_data.append(
-                "[Tên công ty, Mã chứng khoán, Lĩnh vực hoạt động, Mô tả hoạt động kinh doanh, Thông tin liên hệ, Các thông tin cơ bản liên quan đến transaction (Giá tham chiếu ~ KLCP lưu hành), ...]"
+        try:
+            await self._crawl_dynamic_sections(
+                symbol, company_url, sections, owner_labels, links, page_tabs
             )
-            profile_data.append(self._get_page_content(page))
-
-            # Lấy thêm thông tin từ tab "Thông tin cơ bản" từ thẻ a có chứa text tương ứng
-            basic_info_tab = soup.find("a", string=re.compile("Thông tin cơ bản"))
-            if basic_info_tab and "href" in basic_info_tab.attrs:
-                basic_info_url = f"{self.BASE_URL}{basic_info_tab['href']}"
-                page.goto(basic_info_url, timeout=15000)
-                profile_data.append(
-                    "[Thông tin cơ bản, lịch sử hình thành, ngành nghề kinh doanh ...]"
-                )
-                profile_data.append(self._get_page_content(page))
-
-            # Lấy thêm thông tin từ tab "Ban lãnh đạo & Sở hữu" từ thẻ a có text tương ứng
-            leadership_tab = soup.find("a", string=re.compile("Ban lãnh đạo & Sở hữu"))
-            if leadership_tab and "href" in leadership_tab.attrs:
-                leadership_url = f"{self.BASE_URL}{leadership_tab['href']}"
-                page.goto(leadership_url, timeout=15000)
-                profile_data.append("[Ban lãnh đạo & Sở hữu]")
-                profile_data.append(self._get_page_content(page))
-
-            # Lấy thêm thông tin từ tab "Danh sách cổ đông" từ thẻ h2 có text tương ứng
-            # Định nghĩa bộ lọc
-            h2_locators = page.locator("h2.owner-tab")
-
-            # Lặp qua số lượng phần tử
-            for i in range(h2_locators.count()):
-                current_h2 = h2_locators.nth(i)
-                text = current_h2.inner_text()
-                if any(
-                    keyword in text
-                    for keyword in [
-                        "Danh sách cổ đông",
-                        "Đang sở hữu",
-                        "GD CĐ nội bộ & CĐ lớn",
-                    ]
-                ):
-                    current_h2.click()
-                    page.wait_for_timeout(1000)
-                    profile_data.append(f"[{text.strip()}]")
-                    profile_data.append(self._get_page_content(page))
-
-                    # Trong trường hợp, tồn tại thẻ a có class là `info-menu-item` và text chứa `Khối ngoại`, lấy href rồi truy cập
-                    foreign_investors_tab = page.locator(
-                        "a.info-menu-item", has_text=re.compile("Khối ngoại")
-                    )
-                    if foreign_investors_tab.count() > 0:
-                        foreign_investors_tab.click()
-                        page.wait_for_timeout(1000)
-                        profile_data.append("[Khối ngoại]")
-                        profile_data.append(self._get_page_content(page))
-
-            # Back về trang công ty chính
-            page.goto(company_url, timeout=15000)
-            # Lấy kết quả kinh doanh
-            page.wait_for_timeout(1000)
-
-            # Lấy thêm thông tin từ tab "Kết quả kinh doanh" từ thẻ h2 có text tương ứng
-            business_tab = page.locator("h2", has_text=re.compile("Kết quả kinh doanh"))
-            if business_tab:
-                business_tab.click()
-                page.wait_for_timeout(1000)
-                profile_data.append("[Kết quả kinh doanh]")
-                profile_data.append(self._get_page_content(page))
-
-                # Nếu tồn tại thẻ a có href chứa `incsta`, text chứa `Chi tiết` hoặc `Xem tất cả`
-                detailed_business_tab = page.locator(
-                    "a", has_text=re.compile(r"Chi tiết|Xem tất cả")
-                )
-                for i in range(detailed_business_tab.count()):
-                    current_a = detailed_business_tab.nth(i)
-                    href = current_a.get_attribute("href") or ""
-                    if "incsta" in href:
-                        current_a.click()
-                        page.wait_for_timeout(1000)
-                        profile_data.append("[Kết quả kinh doanh chi tiết]")
-                        profile_data.append(self._get_page_content(page))
-
-                        # Back về trang công ty chính
-                        page.goto(company_url, timeout=15000)
-                        # Lấy kết quả kinh doanh
-                        page.wait_for_timeout(1000)
-                        break
-
-            # Lấy thêm thông tin từ tab "Tài nguyên - Nguồn vốn" từ thẻ h2 có text tương ứng
-            resource_tab = page.locator(
-                "h2", has_text=re.compile("Tài nguyên - Nguồn vốn")
+        except Exception as e:
+            # Profile thiếu section không được đưa sang LLM/cache: để caller thử lại
+            raise Exception(f"Error while fetching profile for {symbol} from Cafef: {e}") from e
+
+        ordered = self._ordered_sections(sections, owner_labels)
+        if not ordered:
+            raise Exception(f"No profile section found for {symbol} on Cafef")
+        return ordered
+
+    def _accept(
+        self, extracted: Optional[HtmlExtract], symbol: str = None, table: bool = False
+    ) -> bool:
+        """
+        Nội dung HTTP chỉ được nhận khi có dấu hiệu của trang thật, không phải trang lỗi/soft-404:
+        - trang: có vùng nội dung chính và nhắc tới mã;
+        - fragment/trang chi tiết dạng bảng: có ít nhất một dòng dữ liệu.
+        """
+        if not extracted or not extracted.text:
+            return False
+        if table:
+            return bool(extracted.texts.get("rows"))
+        return extracted.matched_main and symbol.upper() in extracted.text.upper()
+
+    async def _fetch_static_sections(self, symbol: str, company_url: str):
+        """
+        Trả về (sections, owner_labels, links, page_tabs).
+        page_tabs: text các thẻ h2 trên trang chính, dùng để biết tab JS nào thực sự có.
+        """
+        sections = {}
+        owner_labels = []
+        html = await http_fetcher.fetch(company_url)
+        overview = await self._extract(html, texts={"h2": "//h2"})
+        if not self._accept(overview, symbol):
+            return sections, owner_labels, {}, None
+
+        sections[self.OVERVIEW_LABEL] = overview.text
+        links = self._find_profile_links(overview.anchors, company_url)
+        page_tabs = overview.texts["h2"]
+
+        # Thông tin cơ bản, Ban lãnh đạo & Sở hữu, các trang chi tiết incsta/bsheet
+        static_pages = [
+            ("basic", self.BASIC_INFO_LABEL, False),
+            ("leadership", self.LEADERSHIP_LABEL, False),
+        ] + [
+            (detail_href, detail_label, True)
+            for _, _, detail_href, detail_label in self.MAIN_TABS
+            if detail_href
+        ]
+        pages = await http_fetcher.fetch_many(links.get(key) for key, _, _ in static_pages)
+        # Tên các tab cổ đông lấy luôn từ lần parse trang Ban lãnh đạo
+        markers = {"owner_tabs": self.OWNER_TAB_XPATH, "rows": self.TABLE_ROW_XPATH}
+        extracts = await asyncio.gather(
+            *(self._extract(page_html, texts=markers) for page_html in pages)
+        )
+        for (key, label, table), extracted in zip(static_pages, extracts):
+            if self._accept(extracted, symbol, table):
+                sections[label] = extracted.text
+
+        # Fragment AJAX đã biết endpoint: các tab cổ đông trên trang Ban lãnh đạo, tab JS trên trang chính
+        fragments = []
+        leadership = extracts[1]
+        if sections.get(self.LEADERSHIP_LABEL):
+            for text in leadership.texts["owner_tabs"]:
+                keyword = self._match_owner_keyword(text)
+                if keyword:
+                    owner_labels.append(f"[{text}]")
+                    fragments.append((f"[{text}]", keyword))
+            fragments.append((self.FOREIGN_LABEL, self.FOREIGN_KEYWORD))
+        for tab_text, label, _, _ in self.MAIN_TABS:
+            if self._has_tab(page_tabs, tab_text):
+                fragments.append((label, label))
+
+        fragment_pages = await http_fetcher.fetch_many(
+            self._fragment_url(key, symbol) for _, key in fragments
+        )
+        fragment_extracts = await asyncio.gather(
+            *(
+                self._extract(fragment_html, texts={"rows": self.TABLE_ROW_XPATH})
+                for fragment_html in fragment_pages
             )
-            if resource_tab:
-                resource_tab.click()
-                page.wait_for_timeout(1000)
-                profile_data.append("[Tài nguyên - Nguồn vốn]")
-                profile_data.append(self._get_page_content(page))
-
-                # Nếu tồn tại thẻ a có href chứa `bsheet`
-                detailed_resource_tab = page.locator(
-                    "a", has_text=re.compile(r"Chi tiết|Xem tất cả")
+        )
+        for (label, _), extracted in zip(fragments, fragment_extracts):
+            if self._accept(extracted, table=True):
+                sections[label] = extracted.text
+
+        return sections, owner_labels, links, page_tabs
+
+    @staticmethod
+    def _has_tab(page_tabs: Optional[List[str]], tab_text: str) -> bool:
+        # Chưa biết trang có những tab nào (HTTP lỗi): coi như có
+        return page_tabs is None or any(re.search(tab_text, text) for text in page_tabs)
+
+    def _pending_main_tabs(self, sections: dict, page_tabs: Optional[List[str]]) -> list:
+        return [
+            (tab_text, label, detail_href, detail_label)
+            for tab_text, label, detail_href, detail_label in self.MAIN_TABS
+            if self._has_tab(page_tabs, tab_text)
+            and (not sections.get(label) or (detail_href and not sections.get(detail_label)))
+        ]
+
+    def _leadership_pending(self, sections: dict, owner_labels: list, links: dict) -> bool:
+        if not links.get("leadership"):
+            return False
+        # Trang Ban lãnh đạo đã lấy được thì danh sách tab cổ đông là đầy đủ
+        return not sections.get(self.LEADERSHIP_LABEL) or any(
+            not sections.get(label) for label in owner_labels + [self.FOREIGN_LABEL]
+        )
+
+    async def _crawl_dynamic_sections(
+        self,
+        symbol: str,
+        company_url: str,
+        sections: dict,
+        owner_labels: list,
+        links: dict,
+        page_tabs: Optional[List[str]],
+    ):
+        """Mở browser chỉ khi còn section HTTP chưa lấy được, và chỉ cho các section đó"""
+        if (
+            sections.get(self.OVERVIEW_LABEL)
+            and not (links.get("basic") and not sections.get(self.BASIC_INFO_LABEL))
+            and not self._leadership_pending(sections, owner_labels, links)
+            and not self._pending_main_tabs(sections, page_tabs)
+        ):
+            return
+
+        tab_policy = get_wait_policy("cafef", "tab")
+        start = time.perf_counter()
+        async with BrowserPool.get_instance().page(site="cafef") as page:
+            # Tổng quan (khi HTTP lỗi)
+            if not sections.get(self.OVERVIEW_LABEL):
+                await page.goto(company_url, timeout=15000)
+                overview = await self._extract(await page.content(), texts={"h2": "//h2"})
+                if overview:
+                    sections[self.OVERVIEW_LABEL] = overview.text
+                    page_tabs = overview.texts["h2"]
+                    for key, url in self._find_profile_links(overview.anchors, company_url).items():
+                        links.setdefault(key, url)
+
+            # Lấy thêm thông tin từ tab "Thông tin cơ bản"
+            if not sections.get(self.BASIC_INFO_LABEL) and links.get("basic"):
+                await page.goto(links["basic"], timeout=15000)
+                sections[self.BASIC_INFO_LABEL] = await self._get_page_content(page)
+
+            # Lấy thêm thông tin từ tab "Ban lãnh đạo & Sở hữu" và các tab cổ đông
+            if self._leadership_pending(sections, owner_labels, links):
+                await page.goto(links["leadership"], timeout=15000)
+                if not sections.get(self.LEADERSHIP_LABEL):
+                    sections[self.LEADERSHIP_LABEL] = await self._get_page_content(page)
+
+                h2_locators = page.locator("h2.owner-tab")
+                for i in range(await h2_locators.count()):
+                    current_h2 = h2_locators.nth(i)
+                    text = " ".join((await current_h2.inner_text()).split())
+                    keyword = self._match_owner_keyword(text)
+                    label = f"[{text}]"
+                    if not keyword or sections.get(label):
+                        continue
+                    if label not in owner_labels:
+                        owner_labels.append(label)
+                    await self._click_and_learn(page, current_h2, tab_policy, symbol, keyword)
+                    sections[label] = await self._get_page_content(page)
+
+                # Trong trường hợp, tồn tại thẻ a có class là `info-menu-item` và text chứa `Khối ngoại`
+                foreign_investors_tab = page.locator(
+                    "a.info-menu-item", has_text=re.compile(self.FOREIGN_KEYWORD)
                 )
-                for i in range(detailed_resource_tab.count()):
-                    current_a = detailed_resource_tab.nth(i)
-                    href = current_a.get_attribute("href") or ""
-                    if "bsheet" in href:
-                        current_a.click()
-                        page.wait_for_timeout(1000)
-                        profile_data.append("[Tài nguyên - Nguồn vốn chi tiết]")
-                        profile_data.append(self._get_page_content(page))
-
-                        # Back về trang công ty chính
-                        page.goto(company_url, timeout=15000)
-                        # Lấy kết quả kinh doanh
-                        page.wait_for_timeout(1000)
-                        break
-
-            # Lấy thêm thông tin từ tab "Chỉ số tài chính" từ thẻ h2 có text tương ứng
-            financial_tab = page.locator("h2", has_text=re.compile("Chỉ số tài chính"))
-            if financial_tab:
-                financial_tab.click()
-                page.wait_for_timeout(1000)
-                profile_data.append("[Chỉ số tài chính]")
-                profile_data.append(self._get_page_content(page))
-
-            # Lấy thêm thông tin từ tab "Công ty con & liên kết" từ thẻ h2 có text tương ứng
-            subsidiaries_tab = page.locator(
-                "h2", has_text=re.compile("Công ty con & liên kết")
+                if not sections.get(self.FOREIGN_LABEL) and await foreign_investors_tab.count() > 0:
+                    await self._click_and_learn(
+                        page, foreign_investors_tab.first, tab_policy, symbol, self.FOREIGN_KEYWORD
+                    )
+                    sections[self.FOREIGN_LABEL] = await self._get_page_content(page)
+
+            # Các tab h2 trên trang chính cần JS, kèm link chi tiết (incsta/bsheet) nếu HTTP chưa lấy được
+            pending_tabs = self._pending_main_tabs(sections, page_tabs)
+            if pending_tabs and page.url != company_url:
+                await page.goto(company_url, timeout=15000)
+            for tab_text, label, detail_href, detail_label in pending_tabs:
+                tab = page.locator("h2", has_text=re.compile(tab_text))
+                if await tab.count() == 0:
+                    continue
+
+                if not sections.get(label):
+                    # Học endpoint AJAX của tab để lần sau lấy bằng HTTP
+                    await self._click_and_learn(page, tab.first, tab_policy, symbol, label)
+                    sections[label] = await self._get_page_content(page)
+
+                if not detail_href or sections.get(detail_label):
+                    continue
+
+                if not links.get(detail_href):
+                    detail_links = page.locator(
+                        "a", has_text=re.compile(r"Chi tiết|Xem tất cả")
+                    )
+                    for i in range(await detail_links.count()):
+                        href = await detail_links.nth(i).get_attribute("href") or ""
+                        if detail_href in href:
+                            links[detail_href] = urljoin(page.url, href)
+                            break
+                if links.get(detail_href):
+                    # Link chi tiết là trang riêng: goto trực tiếp thay vì click rồi chờ
+                    await page.goto(links[detail_href], timeout=15000)
+                    sections[detail_label] = await self._get_page_content(page)
+
+                    # Back về trang công ty chính
+                    await page.goto(company_url, timeout=15000)
+
+            logger.info(
+                f"{symbol} browser crawl {time.perf_counter() - start:.1f}s, "
+                f"requests: {get_route_stats(page)}"
             )
-            if subsidiaries_tab:
-                subsidiaries_tab.click()
-                page.wait_for_timeout(1000)
-                profile_data.append("[Công ty con & liên kết]")
-                profile_data.append(self._get_page_content(page))
 
-        except Exception as e:
-            logger.warning(f"Error while fetching profile for {symbol} from Cafef: {e}")
+    async def _click_and_learn(self, page: AsyncPage, locator, policy, symbol: str, key: str):
+        """Click tab, đồng thời ghi nhớ endpoint AJAX phía sau để lần sau fetch bằng HTTP"""
+        seen_urls = []
+
+        def on_request_finished(request):
+            if request.resource_type in ("xhr", "fetch"):
+                seen_urls.append(request.url)
+
+        page.on("requestfinished", on_request_finished)
+        try:
+            await click_and_wait(page, locator, policy)
         finally:
-            page.context.close()
+            page.remove_listener("requestfinished", on_request_finished)
+
+        for url in reversed(seen_urls):
+            template = self._fragment_template(url, symbol)
+            if template:
+                CafefCrawler._fragment_templates[key] = template
+                break
+
+    def _fragment_template(self, url: str, symbol: str) -> Optional[str]:
+        """
+        Thay mã trong URL bằng placeholder, chỉ ở vị trí được phân tách rõ ràng:
+        - giá trị query bằng đúng mã (không phân biệt hoa thường), vd: ?symbol=vnm;
+        - segment path bằng đúng mã (phân biệt hoa thường, có thể kèm đuôi), vd: /VNM.chn.
+        Không thay chuỗi con, để mã như "API" không làm hỏng đường dẫn /api/.
+        None nếu URL không chứa mã.
+        """
+        parts = urlsplit(url)
+        segment = re.compile(rf"^{re.escape(symbol)}(\.\w+)?$")
+        replaced = False
+
+        segments = []
+        for part in parts.path.split("/"):
+            match = segment.match(part)
+            if match:
+                part = self.SYMBOL_PLACEHOLDER + (match.group(1) or "")
+                replaced = True
+            segments.append(part)
+
+        params = []
+        for param in parts.query.split("&") if parts.query else []:
+            name, sep, value = param.partition("=")
+            if sep and unquote_plus(value).upper() == symbol.upper():
+                value = self.SYMBOL_PLACEHOLDER
+                replaced = True
+            params.append(f"{name}{sep}{value}")
+
+        if not replaced:
+            return None
+        return urlunsplit(
+            (parts.scheme, parts.netloc, "/".join(segments), "&".join(params), parts.fragment)
+        )
 
-        return "\n".join(profile_data)
+    def _fragment_url(self, key: str, symbol: str) -> Optional[str]:
+        template = self._fragment_templates.get(key)
+        return template.replace(self.SYMBOL_PLACEHOLDER, symbol) if template else None
+
+    def _match_owner_keyword(self, text: str) -> Optional[str]:
+        for keyword in self.OWNER_TAB_KEYWORDS:
+            if keyword in text:
+                return keyword
+        return None
+
+    def _find_profile_links(self, anchors: List[Tuple[str, str]], company_url: str) -> dict:
+        links = {}
+        for text, href in anchors:
+            if "basic" not in links and "Thông tin cơ bản" in text:
+                links["basic"] = urljoin(company_url, href)
+            if "leadership" not in links and "Ban lãnh đạo & Sở hữu" in text:
+                links["leadership"] = urljoin(company_url, href)
+
+            # Link chi tiết có href chứa `incsta` / `bsheet`, text chứa `Chi tiết` hoặc `Xem tất cả`
+            if re.search(r"Chi tiết|Xem tất cả", text):
+                for _, _, detail_href, _ in self.MAIN_TABS:
+                    if detail_href and detail_href in href and detail_href not in links:
+                        links[detail_href] = urljoin(company_url, href)
+        return links
+
+    def _ordered_sections(self, sections: dict, owner_labels: list) -> List[ProfileSection]:
+        order = [
+            self.OVERVIEW_LABEL,
+            self.BASIC_INFO_LABEL,
+            self.LEADERSHIP_LABEL,
+            *owner_labels,
+            self.FOREIGN_LABEL,
+        ]
+        for _, label, _, detail_label in self.MAIN_TABS:
+            order += [label, detail_label]
+
+        return [
+            make_section(label, sections[label])
+            for label in order
+            if label and sections.get(label)
+        ]
 
     @retry(
         stop=stop_after_attempt(3),
@@ -251,40 +546,34 @@ class CafefCrawler:
     )
     @log_execution_time
     def get_macro_data(self):
+        return BrowserPool.get_instance().run(self._crawl_macro_data())
+
+    async def _crawl_macro_data(self):
         endpoint_url = f"{self.BASE_URL}/du-lieu.chn"
-        page = PlaywrightManager.get_page()
-        page.goto(endpoint_url, timeout=15000)
-        try:
-            # find the h3 tag with text contains `Hàng hóa`, `Tỷ giá`, `Tiền mã hóa`
-            h3_locators = page.locator("h3")
-            macro_data = {}
-            for i in range(h3_locators.count()):
-                current_h3 = h3_locators.nth(i)
-                text = current_h3.inner_text()
-                if "Hàng hóa" in text:
-                    current_h3.click()
-                    page.wait_for_timeout(1000)
-                    commodity_text = self._get_table_by_selector(
-                        page, "table#dataBusiness"
-                    )
-                    macro_data["commodity"] = commodity_text
-                elif "Tỷ giá" in text:
-                    current_h3.click()
-                    page.wait_for_timeout(1000)
-                    exchange_rate_text = self._get_table_by_selector(
-                        page, "table#dataBusiness"
-                    )
-                    macro_data["exchange_rate"] = exchange_rate_text
-                elif "Tiền mã hóa" in text:
-                    current_h3.click()
-                    page.wait_for_timeout(1000)
-                    cryptocurrency_text = self._get_table_by_selector(
-                        page, "table#dataBusiness"
-                    )
-                    macro_data["cryptocurrency"] = cryptocurrency_text
-        except Exception as e:
-            logger.warning(f"Error while fetching macro data from Cafef: {e}")
-        finally:
-            page.context.close()
+        # text của thẻ h3 -> key trong kết quả
+        macro_tabs = {
+            "Hàng hóa": "commodity",
+            "Tỷ giá": "exchange_rate",
+            "Tiền mã hóa": "cryptocurrency",
+        }
+        tab_policy = get_wait_policy("cafef", "macro_tab")
+        macro_data = {}
+        async with BrowserPool.get_instance().page(site="cafef") as page:
+            await page.goto(endpoint_url, timeout=15000)
+            try:
+                # find the h3 tag with text contains `Hàng hóa`, `Tỷ giá`, `Tiền mã hóa`
+                h3_locators = page.locator("h3")
+                for i in range(await h3_locators.count()):
+                    current_h3 = h3_locators.nth(i)
+                    text = await current_h3.inner_text()
+                    for keyword, key in macro_tabs.items():
+                        if keyword in text:
+                            await click_and_wait(page, current_h3, tab_policy)
+                            macro_data[key] = await self._get_table_by_selector(
+                                page, "table#dataBusiness"
+                            )
+                            break
+            except Exception as e:
+                logger.warning(f"Error while fetching macro data from Cafef: {e}")
 
         return macro_data
@@ -1,8 +1,10 @@
-from bs4 import BeautifulSoup
 from tenacity import retry, stop_after_attempt, wait_random
 
+from app.logger import logger
+from app.utils.browser_pool import BrowserPool
 from app.utils.decorators import log_execution_time
-from app.utils.playwright_manager import PlaywrightManager
+from app.utils.html_extract import extract_html_async
+from app.utils.request_router import get_route_stats
 
 
 class VietnambizCrawler:
@@ -14,12 +16,13 @@ class VietnambizCrawler:
     )
     @log_execution_time
     def get_macro_data(self):
-        page = PlaywrightManager().get_page()
-        url = f"{self.BASE_URL}/macro-economic"
-        page.goto(url, timeout=60000)
-        page.wait_for_load_state("networkidle")
-        content = page.content()
-        soup = BeautifulSoup(content, "html.parser")
+        return BrowserPool.get_instance().run(self._get_macro_data())
 
-        text = soup.get_text(separator=" ", strip=True)
-        return text
+    async def _get_macro_data(self):
+        url = f"{self.BASE_URL}/macro-economic"
+        async with BrowserPool.get_instance().page(site="vietnambiz") as page:
+            await page.goto(url, timeout=60000)
+            await page.wait_for_load_state("networkidle")
+            content = await page.content()
+            logger.info(f"Vietnambiz macro page requests: {get_route_stats(page)}")
+        return (await extract_html_async(content, separator=" ")).text
@@ -1,8 +1,16 @@
-from sqlalchemy import create_engine
+import io
+import itertools
+import time
+import uuid
+from datetime import date, datetime
+from typing import Iterable, List, NamedTuple
+
+from sqlalchemy import UniqueConstraint, create_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import QueuePool
 from app.config import config
+from app.logger import logger
 
 # Configure connection pool for production
 engine = create_engine(
@@ -25,4 +33,132 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+class BulkUpsertResult(NamedTuple):
+    table: str
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def natural_key(model) -> List[str]:
+    """Các cột của unique constraint (khóa tự nhiên) của model"""
+    for constraint in model.__table__.constraints:
+        if isinstance(constraint, UniqueConstraint):
+            return [column.name for column in constraint.columns]
+    raise ValueError(f"Model {model.__name__} has no unique constraint")
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _copy_value(value) -> str:
+    # CSV của COPY: ô trống không quote là NULL, "" là chuỗi rỗng
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _copy_rows(cursor, table: str, columns: List[str], rows: Iterable[dict], batch_size: int) -> int:
+    copy_sql = (
+        f"COPY {table} ({', '.join(_quote(c) for c in columns)}) FROM STDIN WITH (FORMAT csv)"
+    )
+    buffer = io.StringIO()
+    total = pending = 0
+    for row in rows:
+        buffer.write(",".join(_copy_value(row.get(column)) for column in columns))
+        buffer.write("\n")
+        pending += 1
+        if pending >= batch_size:
+            buffer.seek(0)
+            cursor.copy_expert(copy_sql, buffer)
+            total += pending
+            buffer, pending = io.StringIO(), 0
+    if pending:
+        buffer.seek(0)
+        cursor.copy_expert(copy_sql, buffer)
+        total += pending
+    return total
+
+
+def bulk_upsert(
+    model,
+    rows: Iterable[dict],
+    key_columns: List[str] = None,
+    update_columns: List[str] = None,
+    session: Session = None,
+    batch_size: int = 50000,
+) -> BulkUpsertResult:
+    """
+    Ghi số lượng lớn bản ghi vào PostgreSQL:
+    COPY từng lô vào bảng tạm, sau đó INSERT ... ON CONFLICT (khóa tự nhiên) DO UPDATE một lần.
+    - key_columns: mặc định là unique constraint của model.
+    - update_columns: mặc định là mọi cột có trong rows trừ khóa.
+    - session: ghi trong transaction của session (caller commit); nếu None dùng kết nối riêng và tự commit.
+    Dòng trùng khóa trong cùng một lần ghi: giữ dòng xuất hiện sau cùng.
+    """
+    start = time.perf_counter()
+    table = model.__table__
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return BulkUpsertResult(table.name, 0, 0.0)
+
+    columns = [column.name for column in table.columns if column.name in first]
+    key_columns = key_columns or natural_key(model)
+    if update_columns is None:
+        update_columns = [column for column in columns if column not in key_columns]
+
+    target = _quote(table.name)
+    staging = _quote(f"tmp_{table.name}_{uuid.uuid4().hex[:8]}")
+    column_list = ", ".join(_quote(c) for c in columns)
+    key_list = ", ".join(_quote(c) for c in key_columns)
+    assignments = [f"{_quote(c)} = EXCLUDED.{_quote(c)}" for c in update_columns]
+    if assignments and "updated_at" in table.columns and "updated_at" not in update_columns:
+        assignments.append(f"{_quote('updated_at')} = now()")
+    assignments = ", ".join(assignments)
+    conflict_action = f"DO UPDATE SET {assignments}" if assignments else "DO NOTHING"
+
+    owns_connection = session is None
+    raw_connection = engine.raw_connection() if owns_connection else session.connection().connection
+    try:
+        cursor = raw_connection.cursor()
+        cursor.execute(
+            f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+            f"SELECT {column_list} FROM {target} WITH NO DATA"
+        )
+        count = _copy_rows(cursor, staging, columns, itertools.chain([first], rows), batch_size)
+        # ctid tăng theo thứ tự COPY: DISTINCT ON giữ dòng sau cùng của mỗi khóa
+        cursor.execute(
+            f"INSERT INTO {target} ({column_list}) "
+            f"SELECT DISTINCT ON ({key_list}) {column_list} FROM {staging} "
+            f"ORDER BY {key_list}, ctid DESC "
+            f"ON CONFLICT ({key_list}) {conflict_action}"
+        )
+        if owns_connection:
+            raw_connection.commit()
+    except Exception:
+        if owns_connection:
+            raw_connection.rollback()
+        raise
+    finally:
+        if owns_connection:
+            raw_connection.close()
+
+    result = BulkUpsertResult(table.name, count, time.perf_counter() - start)
+    logger.info(
+        f"Bulk upserted {result.rows} rows into {result.table} in {result.seconds:.2f}s "
+        f"({result.rows_per_second:,.0f} rows/s)"
+    )
+    return result
@@ -0,0 +1,49 @@
+from sqlalchemy import Column, DateTime, Float, Integer, String, Text, UniqueConstraint, func
+
+from app.database import Base
+
+
+class CompanyProfile(Base):
+    __tablename__ = "company_profiles"
+    __table_args__ = (UniqueConstraint("symbol", name="uq_company_profiles_symbol"),)
+
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String(20), nullable=False)
+    company_name = Column(String(255))
+    short_name = Column(String(100))
+    industry = Column(String(255))
+    sector = Column(String(255))
+    country = Column(String(100))
+    website = Column(String(255))
+    description = Column(Text)
+    strengths = Column(Text)
+    weaknesses = Column(Text)
+    opportunities = Column(Text)
+    threats = Column(Text)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class Shareholder(Base):
+    __tablename__ = "shareholders"
+    __table_args__ = (UniqueConstraint("symbol", "name", name="uq_shareholders_symbol_name"),)
+
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String(20), nullable=False, index=True)
+    name = Column(String(255), nullable=False)
+    ownership_percent = Column(Float)
+    shares_owned = Column(Float)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class Officer(Base):
+    __tablename__ = "officers"
+    __table_args__ = (UniqueConstraint("symbol", "name", name="uq_officers_symbol_name"),)
+
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String(20), nullable=False, index=True)
+    name = Column(String(255), nullable=False)
+    position = Column(String(255))
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,55 @@
+from sqlalchemy import Column, DateTime, Float, Integer, String, UniqueConstraint, func
+
+from app.database import Base
+
+
+class IncomeStatement(Base):
+    __tablename__ = "income_statements"
+    __table_args__ = (
+        UniqueConstraint(
+            "symbol", "year", "quarter", "item", name="uq_income_statements_symbol_period_item"
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String(20), nullable=False, index=True)
+    year = Column(Integer, nullable=False)
+    quarter = Column(Integer, nullable=False)
+    item = Column(String(255), nullable=False)
+    value = Column(Float)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class BalanceSheet(Base):
+    __tablename__ = "balance_sheets"
+    __table_args__ = (
+        UniqueConstraint(
+            "symbol", "year", "quarter", "item", name="uq_balance_sheets_symbol_period_item"
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String(20), nullable=False, index=True)
+    year = Column(Integer, nullable=False)
+    quarter = Column(Integer, nullable=False)
+    item = Column(String(255), nullable=False)
+    value = Column(Float)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class Ratio(Base):
+    __tablename__ = "ratios"
+    __table_args__ = (
+        UniqueConstraint("symbol", "year", "quarter", "item", name="uq_ratios_symbol_period_item"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String(20), nullable=False, index=True)
+    year = Column(Integer, nullable=False)
+    quarter = Column(Integer, nullable=False)
+    item = Column(String(255), nullable=False)
+    value = Column(Float)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
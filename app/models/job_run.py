@@ -0,0 +1,20 @@
+from sqlalchemy import Column, DateTime, Float, Integer, String, Text, func
+
+from app.database import Base
+
+
+class JobRun(Base):
+    __tablename__ = "job_runs"
+
+    id = Column(Integer, primary_key=True)
+    job_id = Column(String(100), nullable=False, index=True)
+    executor = Column(String(50))
+    status = Column(String(20), nullable=False)
+    scheduled_at = Column(DateTime(timezone=True), nullable=False)
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    # Thời gian chờ trong hàng đợi executor (từ giờ đã lên lịch tới lúc bắt đầu chạy)
+    queue_wait_seconds = Column(Float)
+    duration_seconds = Column(Float)
+    error = Column(Text)
+    created_at = Column(DateTime, server_default=func.now())
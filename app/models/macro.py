@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Date, DateTime, Float, Integer, String, UniqueConstraint, func
+
+from app.database import Base
+
+
+class MacroAsset(Base):
+    __tablename__ = "macro_assets"
+    __table_args__ = (UniqueConstraint("as_of", "asset_type", name="uq_macro_assets_date_asset"),)
+
+    id = Column(Integer, primary_key=True)
+    as_of = Column(Date, nullable=False, index=True)
+    asset_type = Column(String(255), nullable=False)
+    price = Column(Float)
+    change_percent = Column(Float)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class MacroIndicator(Base):
+    __tablename__ = "macro_indicators"
+    __table_args__ = (
+        UniqueConstraint("indicator", "period", name="uq_macro_indicators_indicator_period"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    indicator = Column(String(255), nullable=False)
+    period = Column(String(100), nullable=False)
+    current_value = Column(Float)
+    previous_value = Column(Float)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
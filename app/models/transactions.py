@@ -0,0 +1,45 @@
+from sqlalchemy import Column, Date, DateTime, Float, Integer, String, UniqueConstraint, func
+
+from app.database import Base
+
+
+class InsiderTransaction(Base):
+    __tablename__ = "insider_transactions"
+    __table_args__ = (
+        UniqueConstraint(
+            "symbol",
+            "transaction_date",
+            "insider_name",
+            "transaction_type",
+            name="uq_insider_transactions_natural_key",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String(20), nullable=False, index=True)
+    transaction_date = Column(Date, nullable=False)
+    insider_name = Column(String(255), nullable=False)
+    position = Column(String(255))
+    # Chuỗi rỗng thay cho NULL để unique constraint có hiệu lực
+    transaction_type = Column(String(100), nullable=False, server_default="")
+    shares = Column(Float)
+    price = Column(Float)
+    value = Column(Float)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class ForeignTransaction(Base):
+    __tablename__ = "foreign_transactions"
+    __table_args__ = (
+        UniqueConstraint("symbol", "transaction_date", name="uq_foreign_transactions_symbol_date"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String(20), nullable=False, index=True)
+    transaction_date = Column(Date, nullable=False)
+    net_buy_sell = Column(Float)
+    buy_volume = Column(Float)
+    sell_volume = Column(Float)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
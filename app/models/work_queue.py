@@ -0,0 +1,29 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.database import Base
+
+
+class WorkQueueItem(Base):
+    __tablename__ = "work_queue"
+    __table_args__ = (
+        UniqueConstraint("queue", "key", name="uq_work_queue_queue_key"),
+        # Phục vụ truy vấn claim: việc đang chờ theo độ ưu tiên
+        Index("ix_work_queue_claim", "queue", "status", "priority", "available_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    queue = Column(String(50), nullable=False)
+    key = Column(String(100), nullable=False)
+    payload = Column(JSONB)
+    # pending -> running -> done | failed; running hết lease được worker khác nhận lại
+    status = Column(String(20), nullable=False, server_default="pending")
+    priority = Column(Integer, nullable=False, server_default="0")
+    attempts = Column(Integer, nullable=False, server_default="0")
+    max_attempts = Column(Integer, nullable=False, server_default="5")
+    available_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    lease_owner = Column(String(100))
+    lease_expires_at = Column(DateTime(timezone=True))
+    last_error = Column(Text)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,42 @@
+from datetime import date
+
+from app.config import config
+from app.crawler.cafef import CafefCrawler
+from app.database import SessionLocal
+from app.logger import logger
+from app.scheduler.metrics import job_metrics
+from app.services.macro_service import MacroService
+from app.services.universe_sync_service import UniverseSyncService
+from app.utils.browser_pool import BrowserPool
+from app.utils.checkpoint import SyncCheckpoint
+from app.utils.gemini_api import rotator
+from app.utils.resource_limits import ResourceLimits
+
+# Các job được lưu trong job store theo tham chiếu "app.scheduler.jobs:<tên hàm>",
+# nên phải là hàm cấp module và không nhận tham số
+
+
+@job_metrics.tracked
+def sync_macro_data():
+    db = SessionLocal()
+    try:
+        MacroService(db).fetch_and_save_macro_data()
+    finally:
+        db.close()
+
+
+@job_metrics.tracked
+def sync_company_profiles():
+    # Checkpoint theo tuần: job bị dừng giữa chừng sẽ chạy tiếp khi được chạy bù trong tuần
+    year, week, _ = date.today().isocalendar()
+    checkpoint = SyncCheckpoint(f"company_profiles_{year}W{week:02d}")
+    limits = ResourceLimits({
+        "browser": config.SYNC_BROWSER_CONCURRENCY
+        or config.BROWSER_POOL_SIZE * config.BROWSER_POOL_CONTEXTS,
+        "llm": config.SYNC_LLM_CONCURRENCY or rotator.max_concurrency,
+        "db": config.SYNC_DB_CONCURRENCY,
+    })
+    summary = UniverseSyncService(limits, checkpoint).run(CafefCrawler().list_symbols())
+    logger.info(f"Weekly company profile sync: {dict(summary)}")
+    # Scheduler chạy lâu: theo dõi việc dùng lại context và số lần restart browser
+    logger.info(f"Browser pool: {BrowserPool.get_instance().stats()}")
@@ -0,0 +1,82 @@
+import functools
+import threading
+from datetime import datetime, timezone
+
+from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED, EVENT_JOB_MISSED
+
+from app.database import SessionLocal
+from app.logger import logger
+from app.models.job_run import JobRun
+
+
+class JobMetrics:
+    """
+    Ghi lại mỗi lần chạy job vào bảng job_runs:
+    thời gian chờ trong hàng đợi executor (giờ lên lịch -> lúc bắt đầu) và thời gian chạy.
+    Job được đánh dấu bắt đầu qua decorator `tracked`, kết thúc qua listener của scheduler.
+    """
+
+    EVENTS = EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED
+
+    def __init__(self):
+        # max_instances=1 nên mỗi job id chỉ có một lần chạy dở tại một thời điểm
+        self._started = {}
+        self._lock = threading.Lock()
+
+    def tracked(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self._lock:
+                self._started[func.__name__] = datetime.now(timezone.utc)
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    def listen(self, scheduler):
+        def listener(event):
+            job = scheduler.get_job(event.job_id)
+            self.record(event, job.executor if job else None)
+
+        scheduler.add_listener(listener, self.EVENTS)
+
+    def record(self, event, executor: str = None):
+        finished_at = datetime.now(timezone.utc)
+        with self._lock:
+            started_at = self._started.pop(event.job_id, None)
+        scheduled_at = event.scheduled_run_time
+
+        if event.code == EVENT_JOB_MISSED:
+            status, started_at, finished_at = "missed", None, None
+        else:
+            status = "error" if event.exception else "success"
+
+        queue_wait = (started_at - scheduled_at).total_seconds() if started_at else None
+        duration = (finished_at - started_at).total_seconds() if started_at and finished_at else None
+        logger.info(
+            f"Job {event.job_id} {status}: queue wait {queue_wait}s, duration {duration}s"
+        )
+
+        db = SessionLocal()
+        try:
+            db.add(
+                JobRun(
+                    job_id=event.job_id,
+                    executor=executor,
+                    status=status,
+                    scheduled_at=scheduled_at,
+                    started_at=started_at,
+                    finished_at=finished_at,
+                    queue_wait_seconds=queue_wait,
+                    duration_seconds=duration,
+                    error=repr(event.exception)[:2000] if event.exception else None,
+                )
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error while recording run of job {event.job_id}: {e}")
+        finally:
+            db.close()
+
+
+job_metrics = JobMetrics()
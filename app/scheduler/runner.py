@@ -0,0 +1,108 @@
+import signal
+import threading
+
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
+
+from app.config import config
+from app.database import engine
+from app.logger import logger
+from app.scheduler import jobs
+from app.scheduler.metrics import job_metrics
+from app.utils.browser_pool import BrowserPool
+from app.utils.gemini_api import rotator
+from app.utils.html_extract import shutdown_html_workers
+
+# Job hằng tuần: lần chạy bị lỡ dù trễ bao lâu vẫn được chạy bù (gộp một lần nhờ coalesce),
+# thay vì bị bỏ qua và phải chờ thêm một tuần
+WEEKLY_JOB_OPTIONS = {"misfire_grace_time": None}
+
+# (hàm job, lịch cron, executor theo loại tài nguyên mà job dùng nhiều nhất, tùy chọn riêng của job)
+JOBS = [
+    (jobs.sync_macro_data, {"hour": 8, "minute": 0}, "llm", {}),
+    (
+        jobs.sync_company_profiles,
+        {"day_of_week": "mon", "hour": 10, "minute": 0},
+        "browser",
+        WEEKLY_JOB_OPTIONS,
+    ),
+]
+
+
+def create_scheduler() -> BackgroundScheduler:
+    return BackgroundScheduler(
+        # Job store trong PostgreSQL: lịch và next_run_time được giữ qua các lần khởi động lại
+        jobstores={"default": SQLAlchemyJobStore(engine=engine, tablename="apscheduler_jobs")},
+        executors={
+            "default": ThreadPoolExecutor(1),
+            "browser": ThreadPoolExecutor(config.SCHEDULER_BROWSER_WORKERS),
+            "llm": ThreadPoolExecutor(config.SCHEDULER_LLM_WORKERS),
+            "db": ThreadPoolExecutor(config.SCHEDULER_DB_WORKERS),
+        },
+        job_defaults={
+            # Các lần chạy bị lỡ (process tắt, executor bận) được gộp thành một lần chạy bù
+            "coalesce": True,
+            "max_instances": 1,
+            "misfire_grace_time": config.SCHEDULER_MISFIRE_GRACE_SECONDS,
+        },
+        timezone=config.SCHEDULER_TIMEZONE,
+    )
+
+
+def register_jobs(scheduler: BackgroundScheduler):
+    for func, schedule, executor, options in JOBS:
+        job_id = func.__name__
+        trigger = CronTrigger(
+            jitter=config.SCHEDULER_JITTER_SECONDS,
+            timezone=config.SCHEDULER_TIMEZONE,
+            **schedule,
+        )
+        options = {
+            "misfire_grace_time": config.SCHEDULER_MISFIRE_GRACE_SECONDS,
+            **options,
+        }
+        job = scheduler.get_job(job_id)
+        if job is None:
+            scheduler.add_job(
+                func, trigger, id=job_id, name=job_id, executor=executor, **options
+            )
+            logger.info(f"Scheduled job {job_id}: {trigger} on {executor}")
+        elif str(job.trigger) != str(trigger) or job.executor != executor:
+            scheduler.modify_job(job_id, executor=executor, **options)
+            scheduler.reschedule_job(job_id, trigger=trigger)
+            logger.info(f"Rescheduled job {job_id}: {trigger} on {executor}")
+        elif job.misfire_grace_time != options["misfire_grace_time"]:
+            # Chỉ đổi tùy chọn: không reschedule để giữ next_run_time (lần chạy bù đang chờ)
+            scheduler.modify_job(job_id, **options)
+            logger.info(f"Updated job {job_id} options: {options}")
+        # Job đã có và không đổi: giữ nguyên next_run_time trong job store để chạy bù lần bị lỡ
+
+
+def main():
+    scheduler = create_scheduler()
+    job_metrics.listen(scheduler)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    # Start ở trạng thái pause để đọc job store trước khi đăng ký job
+    scheduler.start(paused=True)
+    register_jobs(scheduler)
+    scheduler.resume()
+    logger.info("Scheduler started")
+
+    try:
+        stop.wait()
+    finally:
+        logger.info("Shutting down scheduler...")
+        scheduler.shutdown(wait=True)
+        rotator.close()
+        BrowserPool.shutdown()
+        shutdown_html_workers()
+
+
+if __name__ == "__main__":
+    main()
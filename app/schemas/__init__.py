@@ -0,0 +1,3 @@
+from app.schemas.company import Officer, QuarterlyFinancial, Shareholder
+
+__all__ = ["Officer", "QuarterlyFinancial", "Shareholder"]
@@ -0,0 +1,25 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class Shareholder(BaseModel):
+    name: str = Field(description="Tên cổ đông")
+    shares: Optional[float] = Field(None, description="Số cổ phiếu nắm giữ")
+    ownership_pct: Optional[float] = Field(None, description="Tỷ lệ sở hữu (%)")
+    as_of: Optional[str] = Field(None, description="Ngày cập nhật (dd/mm/yyyy)")
+
+
+class Officer(BaseModel):
+    name: str = Field(description="Họ tên")
+    position: str = Field(description="Chức vụ")
+    since: Optional[str] = Field(None, description="Thời gian bắt đầu giữ chức vụ")
+    shares: Optional[float] = Field(None, description="Số cổ phiếu nắm giữ")
+
+
+class QuarterlyFinancial(BaseModel):
+    period: str = Field(description="Kỳ báo cáo, dạng Q3/2025")
+    revenue: Optional[float] = Field(None, description="Doanh thu thuần (tỷ đồng)")
+    gross_profit: Optional[float] = Field(None, description="Lợi nhuận gộp (tỷ đồng)")
+    net_profit: Optional[float] = Field(None, description="Lợi nhuận sau thuế (tỷ đồng)")
+    eps: Optional[float] = Field(None, description="EPS (đồng)")
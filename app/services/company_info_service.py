@@ -1,10 +1,111 @@
+import re
+from collections import OrderedDict
+from functools import partial
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
 from sqlalchemy.orm import Session
 
+from app.config import config
 from app.crawler.cafef import CafefCrawler
-from app.utils.decorators import cached_data, try_catch_decorator
-from app.utils.gemini_api import generate
+from app.logger import logger
+from app.services.record_service import RecordService
+from app.utils.decorators import cache_service, cached_data, try_catch_decorator
+from app.utils.gemini_api import (
+    InvalidResponseError,
+    generate,
+    generate_many,
+    markdown_response,
+)
+from app.utils.markdown_tables import (
+    Block,
+    Bullet,
+    Document,
+    Table,
+    is_empty_value,
+    merge_documents,
+    parse_markdown,
+    render_markdown,
+)
+from app.utils.profile_sections import (
+    ProfileSection,
+    SectionFingerprintStore,
+    chunk_sections,
+    join_sections,
+    section_tokens,
+)
 from app.utils.prompt_loader import PromptLoader, PromptTemplate
+from app.utils.resource_limits import ResourceLimits
 from app.utils.string_utils import clean_markdown_string
+from app.utils.text_compactor import TextCompactor
+
+# Kết quả của từng mã trong batch được bọc bởi <<<TICKER: X>>> ... <<<END: X>>>
+_BATCH_BLOCK = re.compile(
+    r"<<<TICKER:\s*([A-Z0-9]+)\s*>>>(.*?)<<<END:\s*\1\s*>>>", re.DOTALL
+)
+
+
+# Section thay đổi hằng ngày (giá, giao dịch khối ngoại) -> (cấp, tiền tố viết thường) của các
+# heading trong markdown lấy dữ liệu từ section đó. Khi chỉ các section này thay đổi, chỉ chúng
+# được trích xuất lại và các heading tương ứng được thay vào kết quả cũ. Khớp theo cấp để
+# "### Tổng quan" không khớp heading cha "## Tổng quan thị trường".
+VOLATILE_SECTIONS = {
+    CafefCrawler.OVERVIEW_LABEL: ((3, "tổng quan"),),
+    CafefCrawler.FOREIGN_LABEL: ((3, "giao dịch khối ngoại"),),
+}
+
+
+# Section nguồn (khớp một phần nhãn) -> tiền tố (viết thường) các heading lấy dữ liệu từ section đó.
+# Khi gộp kết quả trích xuất theo chunk, giá trị của chunk chứa section nguồn được ưu tiên.
+SECTION_HEADINGS = [
+    (
+        CafefCrawler.OVERVIEW_LABEL,
+        ("hồ sơ doanh nghiệp", "tổng quan", "các yếu tố định hướng", "lịch sự kiện"),
+    ),
+    (CafefCrawler.BASIC_INFO_LABEL, ("hồ sơ doanh nghiệp",)),
+    (CafefCrawler.LEADERSHIP_LABEL, ("ban điều hành chủ chốt", "cơ cấu cổ đông")),
+    ("Danh sách cổ đông", ("cơ cấu cổ đông",)),
+    ("Đang sở hữu", ("cơ cấu cổ đông",)),
+    ("GD CĐ nội bộ", ("giao dịch nội bộ",)),
+    (CafefCrawler.FOREIGN_LABEL, ("giao dịch khối ngoại",)),
+    ("[Kết quả kinh doanh", ("kết quả kinh doanh",)),
+    ("[Tài nguyên - Nguồn vốn", ("tài nguyên - nguồn vốn",)),
+    ("[Chỉ số tài chính", ("chỉ số tài chính",)),
+]
+
+
+def section_headings(label: str) -> Tuple[str, ...]:
+    return tuple(
+        prefix for key, prefixes in SECTION_HEADINGS if key in label for prefix in prefixes
+    )
+
+
+class PreparedProfile(NamedTuple):
+    sections: List[ProfileSection]
+    # Section (đã rút gọn) cần gửi cho LLM
+    prompt_sections: List[ProfileSection]
+    # Kết quả cũ dùng lại nguyên vẹn khi không section nào thay đổi
+    markdown: Optional[str] = None
+    # Kết quả cũ cần vá khi chỉ section trong VOLATILE_SECTIONS thay đổi
+    patch_base: Optional[str] = None
+
+
+def split_batch_response(response: str, tickers: List[str]) -> Dict[str, str]:
+    """Tách response của batch thành markdown theo từng mã; mã thiếu hoặc rỗng bị bỏ qua"""
+    results = {}
+    for match in _BATCH_BLOCK.finditer(response or ""):
+        ticker = match.group(1)
+        markdown = clean_markdown_string(match.group(2).strip())
+        if ticker in tickers and markdown and ticker not in results:
+            results[ticker] = markdown
+    return results
+
+
+def parse_batch_response(response: str, tickers: List[str]) -> Dict[str, str]:
+    """Như split_batch_response, nhưng response không có mã nào là không hợp lệ (không cache)"""
+    results = split_batch_response(response, tickers)
+    if not results:
+        raise InvalidResponseError(f"No ticker block in batch response for {tickers}")
+    return results
 
 
 class CompanyInfoService:
@@ -12,15 +113,336 @@ class CompanyInfoService:
         self.cafef_crawler = CafefCrawler()
         self.db = db
         self.prompt_loader = PromptLoader()
+        self.fingerprints = SectionFingerprintStore()
+        self.compactor = TextCompactor()
+        self.records = RecordService(db)
 
     @cached_data(cache_key_prefix="company_profile", extension="md")
     @try_catch_decorator
     def fetch_and_save_company_profiles(self, ticker: str):
-        company_text = self.cafef_crawler.get_company_profile(ticker.upper())
-        prompt = self.prompt_loader.apply_template(
-            PromptTemplate.COMPANY_PROFILE, company_text=company_text
+        ticker = ticker.upper()
+        sections, prompt_sections, previous_markdown, patch_base = self._prepare_sections(ticker)
+        if previous_markdown:
+            return previous_markdown
+
+        markdown = self._extract_profile(ticker, prompt_sections, patch_base)
+        self.fingerprints.save(ticker, sections, markdown)
+        self._save_records(ticker, markdown)
+        return markdown
+
+    def sync_company_profile(self, ticker: str, limits: ResourceLimits = None) -> str:
+        """
+        Như fetch_and_save_company_profiles nhưng mỗi bước chỉ chạy khi có slot
+        của tài nguyên tương ứng (browser -> llm -> db). Lỗi được raise cho caller
+        (crawl lỗi hoặc không có section nào: không gọi LLM, không ghi cache).
+        """
+        limits = limits or ResourceLimits()
+        ticker = ticker.upper()
+        cached_markdown, is_fresh = cache_service.get_entry(self._cache_key(ticker), "md")
+        if cached_markdown is not None and is_fresh:
+            return cached_markdown
+
+        with limits.use("browser"):
+            sections, prompt_sections, markdown, patch_base = self._prepare_sections(ticker)
+        if not markdown:
+            with limits.use("llm"):
+                markdown = self._extract_profile(ticker, prompt_sections, patch_base)
+        if not markdown:
+            raise ValueError(f"Empty extraction result for {ticker}")
+
+        with limits.use("db"):
+            self.fingerprints.save(ticker, sections, markdown)
+            cache_service.set(self._cache_key(ticker), "md", markdown)
+            self.records.save_markdown(markdown, ticker)
+        return markdown
+
+    def fetch_and_save_company_profiles_batch(
+        self, tickers: List[str]
+    ) -> Dict[str, Optional[str]]:
+        """
+        Trích xuất profile cho nhiều mã; các mã nhỏ được gộp chung một request LLM
+        (theo ngân sách token) để giảm số request trên mỗi key.
+        Kết quả ghi vào cùng cache với fetch_and_save_company_profiles.
+        Trả về {ticker: markdown}, None nếu mã đó lỗi.
+        """
+        results: Dict[str, Optional[str]] = {}
+        prepared: Dict[str, PreparedProfile] = {}
+        small: List[Tuple[str, List[ProfileSection]]] = []
+        for ticker in dict.fromkeys(t.upper() for t in tickers):
+            cached_markdown, is_fresh = cache_service.get_entry(self._cache_key(ticker), "md")
+            if cached_markdown is not None and is_fresh:
+                results[ticker] = cached_markdown
+                continue
+            try:
+                prepared[ticker] = self._prepare_sections(ticker)
+            except Exception as e:
+                logger.error(f"Error while crawling profile for {ticker}: {e}")
+                results[ticker] = None
+                continue
+            sections, prompt_sections, previous_markdown, _ = prepared[ticker]
+            if previous_markdown:
+                self._save_profile(ticker, sections, previous_markdown)
+                results[ticker] = previous_markdown
+                continue
+
+            tokens = sum(section_tokens(section) for section in prompt_sections)
+            if tokens <= config.BATCH_TICKER_MAX_TOKENS:
+                small.append((ticker, prompt_sections))
+            else:
+                results[ticker] = self._extract_single(ticker, prepared[ticker])
+
+        batches = self._pack_batches(small)
+        prompts = [self._render_batch_prompt(batch, prepared) for batch in batches]
+        # Batch một mã dùng prompt đơn, response chính là markdown của mã đó
+        parsers = [
+            markdown_response
+            if len(batch) == 1
+            else partial(parse_batch_response, tickers=[ticker for ticker, _ in batch])
+            for batch in batches
+        ]
+        responses = (
+            generate_many(prompts, parse=parsers, return_exceptions=True) if prompts else []
         )
 
-        generated_response = generate(prompt)
-        markdown = clean_markdown_string(generated_response)
+        for batch, response in zip(batches, responses):
+            symbols = [ticker for ticker, _ in batch]
+            if isinstance(response, Exception):
+                logger.error(
+                    f"Batch {symbols} extraction failed, falling back to single-ticker calls: {response}"
+                )
+                extracted = {}
+            elif len(batch) == 1:
+                extracted = {symbols[0]: response}
+            else:
+                extracted = response
+            logger.info(f"Batch {symbols}: split {len(extracted)}/{len(symbols)} profiles")
+            for ticker, prompt_sections in batch:
+                markdown = extracted.get(ticker)
+                if markdown:
+                    patch_base = prepared[ticker].patch_base
+                    if patch_base:
+                        markdown = self._patch_profile(patch_base, markdown, prompt_sections)
+                    self._save_profile(ticker, prepared[ticker].sections, markdown)
+                    results[ticker] = markdown
+                else:
+                    results[ticker] = self._extract_single(ticker, prepared[ticker])
+        return results
+
+    @staticmethod
+    def _cache_key(ticker: str) -> str:
+        # Cùng key với @cached_data của fetch_and_save_company_profiles
+        return f"company_profile_{ticker}"
+
+    def _prepare_sections(self, ticker: str) -> PreparedProfile:
+        """
+        Crawl và rút gọn section; trả kèm markdown cũ nếu không section nào thay đổi,
+        hoặc markdown cũ cần vá nếu chỉ section thay đổi hằng ngày (VOLATILE_SECTIONS) khác đi.
+        """
+        sections = self.cafef_crawler.get_company_sections(ticker)
+        if not sections:
+            # Không gọi LLM / ghi cache cho profile rỗng
+            raise ValueError(f"No profile sections crawled for {ticker}")
+
+        # Không section nào thay đổi so với lần crawl trước: dùng lại kết quả cũ, bỏ qua LLM
+        changes = self.fingerprints.diff(ticker, sections)
+        previous_markdown = self.fingerprints.previous_result(ticker)
+        if not changes.has_changes and previous_markdown:
+            logger.info(f"No section changed for {ticker}, reusing previous extraction")
+            return PreparedProfile(sections, sections, previous_markdown)
+        logger.info(f"Changed sections for {ticker}: {changes.changed + changes.removed}")
+
+        patch_base = None
+        if (
+            previous_markdown
+            and not changes.removed
+            and all(label in VOLATILE_SECTIONS for label in changes.changed)
+        ):
+            # Chỉ giá / khối ngoại thay đổi: trích xuất lại riêng các section đó
+            patch_base = previous_markdown
+
+        if config.COMPACTION_ENABLED:
+            prompt_sections, report = self.compactor.compact(sections)
+            logger.info(
+                f"Compacted {ticker} profile: ~{report.input_tokens} -> ~{report.output_tokens} tokens, "
+                f"{report.boilerplate_lines} boilerplate lines dropped, truncated: {report.truncated_sections}"
+            )
+        else:
+            prompt_sections = sections
+        if patch_base:
+            prompt_sections = [s for s in prompt_sections if s.label in changes.changed]
+            if not prompt_sections:
+                return PreparedProfile(sections, sections, previous_markdown)
+        return PreparedProfile(sections, prompt_sections, patch_base=patch_base)
+
+    def _save_profile(self, ticker: str, sections: List[ProfileSection], markdown: str):
+        self.fingerprints.save(ticker, sections, markdown)
+        cache_service.set(self._cache_key(ticker), "md", markdown)
+        self._save_records(ticker, markdown)
+
+    def _save_records(self, ticker: str, markdown: str):
+        # Lỗi ghi DB không làm mất kết quả trích xuất (vẫn được cache)
+        try:
+            self.records.save_markdown(markdown, ticker)
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error while saving records for {ticker}: {e}")
+
+    def _extract_single(self, ticker: str, prepared: PreparedProfile) -> Optional[str]:
+        sections, prompt_sections, _, patch_base = prepared
+        try:
+            markdown = self._extract_profile(ticker, prompt_sections, patch_base)
+        except Exception as e:
+            logger.error(f"Error while extracting profile for {ticker}: {e}")
+            return None
+        if not markdown:
+            return None
+        self._save_profile(ticker, sections, markdown)
         return markdown
+
+    @staticmethod
+    def _pack_batches(
+        items: List[Tuple[str, List[ProfileSection]]]
+    ) -> List[List[Tuple[str, List[ProfileSection]]]]:
+        # Xếp tham lam theo thứ tự đầu vào, giới hạn theo tổng token và số mã mỗi batch
+        batches, current, current_tokens = [], [], 0
+        for ticker, prompt_sections in items:
+            tokens = sum(section_tokens(section) for section in prompt_sections)
+            if current and (
+                current_tokens + tokens > config.BATCH_EXTRACTION_TOKEN_BUDGET
+                or len(current) >= config.BATCH_MAX_TICKERS
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append((ticker, prompt_sections))
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _render_batch_prompt(
+        self,
+        batch: List[Tuple[str, List[ProfileSection]]],
+        prepared: Dict[str, PreparedProfile],
+    ) -> str:
+        # Mã có patch_base chỉ gửi các section volatile đã thay đổi: một phần hồ sơ
+        if len(batch) == 1:
+            ticker, prompt_sections = batch[0]
+            return self._render_prompt(
+                prompt_sections, partial=bool(prepared[ticker].patch_base)
+            )
+        return self.prompt_loader.apply_template(
+            PromptTemplate.COMPANY_PROFILE_BATCH,
+            companies=[
+                {
+                    "symbol": ticker,
+                    "text": join_sections(prompt_sections),
+                    "partial": bool(prepared[ticker].patch_base),
+                }
+                for ticker, prompt_sections in batch
+            ],
+        )
+
+    def _render_prompt(self, sections: List[ProfileSection], partial: bool = False) -> str:
+        """partial: sections chỉ là một phần hồ sơ, LLM để trống trường không có trong đó"""
+        return self.prompt_loader.apply_template(
+            PromptTemplate.COMPANY_PROFILE,
+            company_text=join_sections(sections),
+            partial=partial,
+        )
+
+    def _extract_profile(
+        self, ticker: str, sections: List[ProfileSection], patch_base: str = None
+    ) -> str:
+        if patch_base:
+            logger.info(f"Re-extracting volatile sections for {ticker}: {[s.label for s in sections]}")
+            markdown = generate(
+                self._render_prompt(sections, partial=True), parse=markdown_response
+            )
+            return self._patch_profile(patch_base, markdown, sections)
+
+        budget = config.CHUNKED_EXTRACTION_TOKEN_BUDGET
+        total_tokens = sum(section_tokens(section) for section in sections)
+        if config.CHUNKED_EXTRACTION_ENABLED and total_tokens > budget:
+            return self._extract_profile_chunked(ticker, sections, budget)
+
+        return generate(self._render_prompt(sections), parse=markdown_response)
+
+    def _extract_profile_chunked(
+        self, ticker: str, sections: List[ProfileSection], token_budget: int
+    ) -> str:
+        """
+        Map-reduce cho profile quá lớn: mỗi nhóm section được trích xuất song song
+        (trải đều trên các API key), sau đó các bảng được gộp theo thứ tự cố định;
+        mỗi heading ưu tiên giá trị từ nhóm chứa section nguồn của nó (SECTION_HEADINGS).
+        Nhóm không đổi so với lần trước sẽ trúng cache prompt của generate.
+        """
+        chunks = chunk_sections(sections, token_budget)
+        logger.info(f"Extracting {ticker} profile in {len(chunks)} chunks")
+        responses = generate_many(
+            [self._render_prompt(chunk, partial=True) for chunk in chunks],
+            parse=markdown_response,
+        )
+        documents = [parse_markdown(response) for response in responses]
+        preferred = [
+            {prefix for section in chunk for prefix in section_headings(section.label)}
+            for chunk in chunks
+        ]
+        return render_markdown(merge_documents(documents, preferred))
+
+    @staticmethod
+    def _patch_profile(
+        previous_markdown: str, markdown: str, sections: List[ProfileSection]
+    ) -> str:
+        """
+        Thay các heading lấy dữ liệu từ các section volatile đã trích xuất lại bằng kết quả mới
+        (nếu kết quả mới có dữ liệu), mọi heading khác giữ nguyên từ kết quả cũ.
+        Heading cũ khớp cùng tiền tố đều bị bỏ (LLM có thể đặt tên heading hơi khác lần trước),
+        heading mới được chèn vào vị trí của heading cũ đầu tiên.
+        """
+        headings = [
+            heading for section in sections for heading in VOLATILE_SECTIONS.get(section.label, ())
+        ]
+        replacements: Dict[Tuple[int, str], Document] = {}
+        for key, blocks in parse_markdown(markdown).items():
+            heading = _match_heading(key, headings)
+            if heading and _has_values(blocks):
+                replacements.setdefault(heading, OrderedDict())[key] = blocks
+
+        replaced = list(replacements)
+        document = OrderedDict()
+        for key, blocks in parse_markdown(previous_markdown).items():
+            heading = _match_heading(key, replaced)
+            if heading is None:
+                document[key] = blocks
+            elif heading in replacements:
+                document.update(replacements.pop(heading))
+        # Heading chưa có trong kết quả cũ: thêm vào cuối
+        for blocks_by_key in replacements.values():
+            document.update(blocks_by_key)
+        return render_markdown(document)
+
+
+def _match_heading(
+    key: Tuple[int, str], headings: Iterable[Tuple[int, str]]
+) -> Optional[Tuple[int, str]]:
+    """(cấp, tiền tố) đầu tiên khớp heading `key`, None nếu không khớp"""
+    level, title = key
+    title = title.lower()
+    for heading in headings:
+        if level == heading[0] and title.startswith(heading[1]):
+            return heading
+    return None
+
+
+def _has_values(blocks: List[Block]) -> bool:
+    for block in blocks:
+        if isinstance(block, Table):
+            # Cột đầu là nhãn dòng (Giá, Ngày, ...), chỉ ô dữ liệu mới tính
+            if any(not is_empty_value(cell) for row in block.rows for cell in row[1:]):
+                return True
+        elif isinstance(block, Bullet):
+            if not is_empty_value(block.value):
+                return True
+        elif not is_empty_value(block.text):
+            return True
+    return False
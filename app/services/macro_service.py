@@ -2,10 +2,11 @@ from sqlalchemy.orm import Session
 
 from app.crawler.cafef import CafefCrawler
 from app.crawler.vietnambiz import VietnambizCrawler
+from app.logger import logger
+from app.services.record_service import RecordService
 from app.utils.decorators import cached_data, try_catch_decorator
-from app.utils.gemini_api import generate
+from app.utils.gemini_api import generate, markdown_response
 from app.utils.prompt_loader import PromptLoader, PromptTemplate
-from app.utils.string_utils import clean_markdown_string
 
 
 class MacroService:
@@ -14,6 +15,7 @@ class MacroService:
         self.cafef_crawler = CafefCrawler()
         self.vietnambiz = VietnambizCrawler()
         self.prompt_loader = PromptLoader()
+        self.records = RecordService(db)
 
     @cached_data(cache_key_prefix="macro_data", extension="md")
     @try_catch_decorator
@@ -24,6 +26,10 @@ class MacroService:
         prompt = self.prompt_loader.apply_template(
             PromptTemplate.MACRO_DATA, macro_data=macro_data
         )
-        response = generate(prompt)
-        markdown_text = clean_markdown_string(response)
+        markdown_text = generate(prompt, parse=markdown_response)
+        try:
+            self.records.save_markdown(markdown_text)
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error while saving macro records: {e}")
         return markdown_text
@@ -0,0 +1,90 @@
+from typing import Dict, List
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+
+from app.database import bulk_upsert, natural_key
+from app.logger import logger
+from app.models.company import CompanyProfile, Officer, Shareholder
+from app.models.financials import BalanceSheet, IncomeStatement, Ratio
+from app.models.macro import MacroAsset, MacroIndicator
+from app.models.transactions import ForeignTransaction, InsiderTransaction
+from app.utils.markdown_records import (
+    BalanceSheetRecord,
+    CompanyProfileRecord,
+    ForeignTransactionRecord,
+    IncomeStatementRecord,
+    InsiderTransactionRecord,
+    MacroAssetRecord,
+    MacroIndicatorRecord,
+    OfficerRecord,
+    RatioRecord,
+    Record,
+    ShareholderRecord,
+    parse_records,
+)
+
+RECORD_MODELS = {
+    CompanyProfileRecord: CompanyProfile,
+    OfficerRecord: Officer,
+    ShareholderRecord: Shareholder,
+    IncomeStatementRecord: IncomeStatement,
+    BalanceSheetRecord: BalanceSheet,
+    RatioRecord: Ratio,
+    InsiderTransactionRecord: InsiderTransaction,
+    ForeignTransactionRecord: ForeignTransaction,
+    MacroAssetRecord: MacroAsset,
+    MacroIndicatorRecord: MacroIndicator,
+}
+
+# Bảng là ảnh chụp hiện tại theo mã: dòng không còn trong lần trích xuất mới bị xóa
+SNAPSHOT_RECORDS = (OfficerRecord, ShareholderRecord)
+
+
+class RecordService:
+    """Ghi record parse từ markdown của LLM vào các bảng tương ứng (bulk upsert theo khóa tự nhiên)"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def save_markdown(self, markdown: str, symbol: str = None) -> Dict[str, int]:
+        return self.save(parse_records(markdown, symbol))
+
+    def save(self, grouped: Dict[type, List[Record]]) -> Dict[str, int]:
+        counts = {}
+        for record_type, records in grouped.items():
+            model = RECORD_MODELS[record_type]
+            result = bulk_upsert(
+                model, (record.as_dict() for record in records), session=self.db
+            )
+            counts[model.__tablename__] = result.rows
+            if record_type in SNAPSHOT_RECORDS:
+                deleted = self._delete_missing(model, records)
+                if deleted:
+                    counts[f"{model.__tablename__}_deleted"] = deleted
+        self.db.commit()
+        logger.info(f"Saved records: {counts}")
+        return counts
+
+    def _delete_missing(self, model, records: List[Record]) -> int:
+        """
+        Xóa các dòng của những mã có trong records nhưng không còn trong lần trích xuất này
+        (cùng transaction với upsert). Mã không có record nào thì giữ nguyên dữ liệu cũ.
+        """
+        key_columns = [column for column in natural_key(model) if column != "symbol"]
+        keys_by_symbol: Dict[str, set] = {}
+        for record in records:
+            values = record.as_dict()
+            keys_by_symbol.setdefault(values["symbol"], set()).add(
+                tuple(values[column] for column in key_columns)
+            )
+
+        key = tuple_(*(getattr(model, column) for column in key_columns))
+        deleted = 0
+        for symbol, keys in keys_by_symbol.items():
+            deleted += (
+                self.db.query(model)
+                .filter(model.symbol == symbol, key.notin_(list(keys)))
+                .delete(synchronize_session=False)
+            )
+        return deleted
@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable, List
+
+from app.database import SessionLocal
+from app.logger import logger
+from app.services.company_info_service import CompanyInfoService
+from app.utils.checkpoint import SyncCheckpoint
+from app.utils.resource_limits import ResourceLimits
+
+
+class UniverseSyncService:
+    """
+    Đồng bộ profile cho cả danh sách mã trong một process:
+    worker pool dùng chung engine/browser pool/LLM client, mỗi bước bị giới hạn theo tài nguyên,
+    tiến độ từng mã được ghi vào checkpoint để chạy lại không làm lại mã đã xong.
+    sync_symbol/close cũng được worker của hàng đợi (scripts/queue_worker.py) dùng lại,
+    khi đó tiến độ nằm trong bảng work_queue thay vì checkpoint.
+    """
+
+    def __init__(self, limits: ResourceLimits, checkpoint: SyncCheckpoint = None):
+        self.limits = limits
+        self.checkpoint = checkpoint
+        # Session và service theo từng worker thread (Session không thread-safe)
+        self._local = threading.local()
+        self._services: List[CompanyInfoService] = []
+        self._services_lock = threading.Lock()
+
+    def _service(self) -> CompanyInfoService:
+        if not hasattr(self._local, "service"):
+            self._local.service = CompanyInfoService(SessionLocal())
+            with self._services_lock:
+                self._services.append(self._local.service)
+        return self._local.service
+
+    def sync_symbol(self, symbol: str):
+        service = self._service()
+        try:
+            service.sync_company_profile(symbol, self.limits)
+        except Exception:
+            service.db.rollback()
+            raise
+
+    def run(self, symbols: Iterable[str]) -> Counter:
+        symbols: List[str] = list(dict.fromkeys(s.upper() for s in symbols))
+        completed = self.checkpoint.completed
+        pending = [symbol for symbol in symbols if symbol not in completed]
+        summary = Counter(skipped=len(symbols) - len(pending))
+        logger.info(
+            f"Syncing {len(pending)} symbols ({summary['skipped']} already done), "
+            f"limits: {self.limits.limits}"
+        )
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(
+            max_workers=self.limits.max_workers, thread_name_prefix="sync"
+        ) as executor:
+            futures = {executor.submit(self.sync_symbol, symbol): symbol for symbol in pending}
+            for index, future in enumerate(as_completed(futures), start=1):
+                symbol = futures[future]
+                try:
+                    future.result()
+                    self.checkpoint.mark(symbol, SyncCheckpoint.DONE)
+                    summary["done"] += 1
+                except Exception as e:
+                    logger.error(f"Sync failed for {symbol}: {e}")
+                    self.checkpoint.mark(symbol, SyncCheckpoint.FAILED, str(e))
+                    summary["failed"] += 1
+                if index % 50 == 0 or index == len(pending):
+                    elapsed = time.perf_counter() - start
+                    logger.info(
+                        f"Progress {index}/{len(pending)}: {summary['done']} done, "
+                        f"{summary['failed']} failed, {index / elapsed:.2f} symbols/s"
+                    )
+
+        self.close()
+        return summary
+
+    def close(self):
+        with self._services_lock:
+            for service in self._services:
+                service.db.close()
+            self._services.clear()
@@ -0,0 +1,343 @@
+import asyncio
+import concurrent.futures
+import threading
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Set
+from urllib.parse import urlsplit
+
+import psutil
+from playwright.async_api import Browser, BrowserContext, Page, async_playwright
+from playwright_stealth import Stealth
+
+from app.config import config
+from app.logger import logger
+from app.utils.html_extract import shutdown_html_workers
+from app.utils.http_client import http_fetcher
+from app.utils.playwright_manager import BROWSER_ARGS
+from app.utils.request_router import get_route_stats, get_routing_policy, install_routing
+
+_MB = 1024 * 1024
+
+
+class _WarmPage:
+    """Context + page đã áp dụng stealth và routing, dùng lại được cho nhiều lượt crawl"""
+
+    def __init__(self, browser: Browser, context: BrowserContext, page: Page, site: str):
+        self.browser = browser
+        self.context = context
+        self.page = page
+        self.site = site
+        # Origin đã truy cập, cần xóa storage trước khi giao cho mã khác
+        self.origins: Set[str] = set()
+        page.on("framenavigated", self._on_navigated)
+
+    def _on_navigated(self, frame):
+        parts = urlsplit(frame.url)
+        if parts.scheme in ("http", "https"):
+            self.origins.add(f"{parts.scheme}://{parts.netloc}")
+
+
+class _BrowserSlot:
+    """Một Chromium trong pool cùng các page đang rảnh và bộ đếm để quyết định recycle"""
+
+    def __init__(self, browser: Browser, pids: List[int]):
+        self.browser = browser
+        self.pids = pids
+        self.pages_served = 0
+        self.idle: Dict[Optional[str], List[_WarmPage]] = {}
+        self.recycling = False
+
+
+class BrowserPool:
+    """
+    Pool trình duyệt asyncio dùng chung cho cả process.
+
+    Pool chạy trên một event loop riêng ở background thread, gồm `browsers`
+    Chromium, mỗi browser mở tối đa `contexts_per_browser` context cùng lúc.
+    Code đồng bộ đưa coroutine vào pool qua `submit()` / `run()`.
+
+    Context/page được giữ ấm và dùng lại giữa các mã (storage, cookie được xóa khi trả về).
+    Browser được khởi động lại sau BROWSER_RECYCLE_PAGES page hoặc khi RSS vượt
+    BROWSER_RECYCLE_RSS_MB; browser cũ chỉ đóng khi page cuối cùng của nó được trả về.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, browsers: int = None, contexts_per_browser: int = None):
+        self.browsers = browsers or config.BROWSER_POOL_SIZE
+        self.contexts_per_browser = (
+            contexts_per_browser or config.BROWSER_POOL_CONTEXTS
+        )
+        self._playwright = None
+        self._browsers: List[_BrowserSlot] = []
+        self._slots = None
+        self._launch_lock = None
+        # Số page đang mượn theo browser; browser đã bị thay thế nhưng còn page đang chạy
+        self._in_use: Dict[Browser, int] = {}
+        self._retiring: Set[Browser] = set()
+        self._stats = {
+            "pages_served": 0,
+            "contexts_created": 0,
+            "contexts_reused": 0,
+            "restarts": 0,
+            "peak_rss_mb": 0.0,
+        }
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="browser-pool", daemon=True
+        )
+        self._thread.start()
+        self.run(self._start())
+
+    @classmethod
+    def get_instance(cls) -> "BrowserPool":
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    @classmethod
+    def shutdown(cls):
+        """Đóng pool dùng chung nếu đã được khởi động (không khởi động pool mới chỉ để đóng)"""
+        with cls._lock:
+            instance = cls._instance
+        if instance is not None:
+            instance.close()
+
+    @property
+    def size(self) -> int:
+        """Số page có thể mở đồng thời"""
+        return self.browsers * self.contexts_per_browser
+
+    async def _start(self):
+        self._playwright = await async_playwright().start()
+        self._launch_lock = asyncio.Lock()
+        for _ in range(self.browsers):
+            self._browsers.append(await self._launch())
+
+        # Xếp slot xen kẽ giữa các browser để tải được chia đều
+        self._slots = asyncio.Queue()
+        for _ in range(self.contexts_per_browser):
+            for slot in self._browsers:
+                self._slots.put_nowait(slot)
+        logger.info(
+            f"Browser pool started: {self.browsers} browsers x {self.contexts_per_browser} contexts"
+        )
+
+    async def _launch(self) -> _BrowserSlot:
+        # Tuần tự hóa việc launch để xác định được process gốc của từng Chromium
+        async with self._launch_lock:
+            before = _child_pids()
+            browser = await self._playwright.chromium.launch(
+                headless=True, args=BROWSER_ARGS, slow_mo=config.BROWSER_SLOW_MO
+            )
+            started = _child_pids() - before
+        # Process gốc của Chromium là con trực tiếp của driver playwright (con trực tiếp của
+        # process này); renderer mà browser khác sinh ra trong lúc launch có cha là browser đó
+        drivers = _child_pids(recursive=False)
+        pids = [pid for pid in started if _parent_pid(pid) in drivers]
+        return _BrowserSlot(browser, pids)
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        """Đưa coroutine vào event loop của pool, trả về Future đồng bộ"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro):
+        """Chạy coroutine trên pool và chờ kết quả (không gọi từ bên trong pool)"""
+        return self.submit(coro).result()
+
+    @asynccontextmanager
+    async def page(self, site: str = None):
+        """
+        Mượn một slot và trả về page đã áp dụng stealth và routing policy của `site`
+        (chặn ảnh/font/quảng cáo); page ấm được dùng lại nếu có.
+        Bộ đếm request của lượt mượn: get_route_stats(page).
+        """
+        slot: _BrowserSlot = await self._slots.get()
+        warm = None
+        try:
+            warm = await self._checkout(slot, site)
+            yield warm.page
+        finally:
+            try:
+                if warm is not None:
+                    await self._checkin(slot, warm)
+                await self._maybe_recycle(slot)
+            finally:
+                self._slots.put_nowait(slot)
+
+    async def _checkout(self, slot: _BrowserSlot, site: Optional[str]) -> _WarmPage:
+        idle = slot.idle.get(site)
+        if idle and config.BROWSER_CONTEXT_REUSE:
+            warm = idle.pop()
+            self._stats["contexts_reused"] += 1
+            stats = get_route_stats(warm.page)
+            if stats is not None:
+                stats.reset()
+        else:
+            context = await slot.browser.new_context(no_viewport=True)
+            try:
+                context.set_default_timeout(15000)
+                page: Page = await context.new_page()
+                await Stealth().apply_stealth_async(page)
+                await install_routing(page, get_routing_policy(site))
+            except Exception:
+                await context.close()
+                raise
+            warm = _WarmPage(slot.browser, context, page, site)
+            self._stats["contexts_created"] += 1
+        self._in_use[warm.browser] = self._in_use.get(warm.browser, 0) + 1
+        return warm
+
+    async def _checkin(self, slot: _BrowserSlot, warm: _WarmPage):
+        self._stats["pages_served"] += 1
+        self._in_use[warm.browser] -= 1
+        reusable = (
+            config.BROWSER_CONTEXT_REUSE
+            and warm.browser is slot.browser
+            and not warm.page.is_closed()
+            and await self._clear_storage(warm)
+        )
+        if reusable:
+            slot.idle.setdefault(warm.site, []).append(warm)
+        else:
+            await _close_quietly(warm.context)
+
+        if warm.browser in self._retiring and self._in_use[warm.browser] == 0:
+            # Page cuối cùng của browser cũ đã xong: giờ mới đóng browser
+            self._retiring.discard(warm.browser)
+            del self._in_use[warm.browser]
+            await _close_quietly(warm.browser)
+
+    async def _clear_storage(self, warm: _WarmPage) -> bool:
+        """Xóa cookie, storage, cache của các origin đã truy cập; lỗi thì bỏ page này"""
+        try:
+            await warm.page.goto("about:blank")
+            await warm.context.clear_cookies()
+            if warm.origins:
+                cdp = await warm.context.new_cdp_session(warm.page)
+                try:
+                    for origin in warm.origins:
+                        await cdp.send(
+                            "Storage.clearDataForOrigin",
+                            {"origin": origin, "storageTypes": "all"},
+                        )
+                finally:
+                    await cdp.detach()
+            warm.origins.clear()
+            return True
+        except Exception as e:
+            logger.debug(f"Discarding browser context, cannot clear storage: {e}")
+            return False
+
+    async def _maybe_recycle(self, slot: _BrowserSlot):
+        slot.pages_served += 1
+        if slot.recycling:
+            return
+
+        rss_mb = _rss(slot.pids) / _MB
+        self._stats["peak_rss_mb"] = max(self._stats["peak_rss_mb"], round(rss_mb, 1))
+        reason = None
+        if not slot.browser.is_connected():
+            reason = "browser disconnected"
+        elif config.BROWSER_RECYCLE_PAGES and slot.pages_served >= config.BROWSER_RECYCLE_PAGES:
+            reason = f"{slot.pages_served} pages"
+        elif config.BROWSER_RECYCLE_RSS_MB and rss_mb >= config.BROWSER_RECYCLE_RSS_MB:
+            reason = f"RSS {rss_mb:.0f} MB"
+        if reason is None:
+            return
+
+        slot.recycling = True
+        try:
+            fresh = await self._launch()
+        except Exception as e:
+            # Không launch được browser mới: dùng tiếp browser cũ, thử lại ở lần trả page sau
+            logger.error(f"Browser recycle failed ({reason}): {e}")
+            slot.recycling = False
+            return
+
+        old_browser = slot.browser
+        idle = [warm for pages in slot.idle.values() for warm in pages]
+        slot.browser, slot.pids, slot.idle = fresh.browser, fresh.pids, {}
+        slot.pages_served = 0
+        slot.recycling = False
+        self._stats["restarts"] += 1
+        logger.info(f"Browser recycled after {reason}")
+
+        for warm in idle:
+            await _close_quietly(warm.context)
+        if self._in_use.get(old_browser, 0) > 0:
+            self._retiring.add(old_browser)
+        else:
+            self._in_use.pop(old_browser, None)
+            await _close_quietly(old_browser)
+
+    def stats(self) -> dict:
+        """Thống kê pool: số page, tỉ lệ dùng lại context, số lần restart, RSS"""
+        stats = dict(self._stats)
+        checkouts = stats["contexts_created"] + stats["contexts_reused"]
+        stats["reuse_rate"] = round(stats["contexts_reused"] / checkouts, 3) if checkouts else 0.0
+        stats["rss_mb"] = round(sum(_rss(slot.pids) for slot in self._browsers) / _MB, 1)
+        return stats
+
+    async def _stop(self):
+        for browser in [slot.browser for slot in self._browsers] + list(self._retiring):
+            await _close_quietly(browser)
+        self._browsers = []
+        self._retiring = set()
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+        await http_fetcher.aclose()
+        shutdown_html_workers()
+
+    def close(self):
+        logger.info(f"Browser pool stats: {self.stats()}")
+        try:
+            self.run(self._stop())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            with BrowserPool._lock:
+                if BrowserPool._instance is self:
+                    BrowserPool._instance = None
+
+
+async def _close_quietly(target):
+    """Đóng context/browser, bỏ qua lỗi (vd: browser đã chết)"""
+    try:
+        await target.close()
+    except Exception as e:
+        logger.debug(f"Error while closing {type(target).__name__}: {e}")
+
+
+def _child_pids(recursive: bool = True) -> Set[int]:
+    try:
+        return {p.pid for p in psutil.Process().children(recursive=recursive)}
+    except psutil.Error:
+        return set()
+
+
+def _parent_pid(pid: int) -> Optional[int]:
+    try:
+        return psutil.Process(pid).ppid()
+    except psutil.Error:
+        return None
+
+
+def _rss(pids: List[int]) -> int:
+    """Tổng RSS (bytes) của các process Chromium gốc và mọi process con (renderer, GPU, ...)"""
+    total = 0
+    for pid in pids:
+        try:
+            root = psutil.Process(pid)
+            for process in [root] + root.children(recursive=True):
+                try:
+                    total += process.memory_info().rss
+                except psutil.Error:
+                    continue
+        except psutil.Error:
+            continue
+    return total
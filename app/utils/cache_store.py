@@ -0,0 +1,188 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from typing import Optional, Tuple
+
+from app.logger import logger
+
+
+class IndexedCacheStore:
+    """
+    Kho cache gồm một index SQLite (key -> vị trí, thời điểm tạo, hạn dùng)
+    và payload nén zlib nằm trong các thư mục con đã shard theo hash của key.
+
+    - Ghi file tạm rồi os.replace nên không bao giờ để lại file cụt khi crash.
+    - Entry hết hạn không bị xóa khi đọc, mà được dọn hàng loạt bằng `sweep()`.
+    """
+
+    INDEX_FILE = "index.sqlite3"
+    DATA_DIR = "data"
+
+    def __init__(self, cache_dir: str, compress_level: int = 6):
+        self.cache_dir = cache_dir
+        self.compress_level = compress_level
+        self.data_dir = os.path.join(cache_dir, self.DATA_DIR)
+        os.makedirs(self.data_dir, exist_ok=True)
+        self.index_path = os.path.join(cache_dir, self.INDEX_FILE)
+        self._local = threading.local()
+
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT NOT NULL,
+                    extension TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    size INTEGER NOT NULL,
+                    PRIMARY KEY (key, extension)
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_entries_expires_at ON entries (expires_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # Mỗi thread một connection; WAL cho phép nhiều process đọc/ghi đồng thời
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.index_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _relative_path(self, key: str, extension: str) -> str:
+        # Mỗi lần ghi một file mới: sweep/ghi đè không bao giờ xóa nhầm payload mới hơn
+        digest = hashlib.sha1(f"{key}.{extension}".encode("utf-8")).hexdigest()
+        return os.path.join(
+            digest[:2], digest[2:4], f"{digest}.{uuid.uuid4().hex[:12]}.{extension}.z"
+        )
+
+    def get(self, key: str, extension: str) -> Optional[Tuple[str, float, float]]:
+        """Trả về (nội dung, created_at, expires_at) hoặc None; không tự kiểm tra hạn"""
+        row = (
+            self._connect()
+            .execute(
+                "SELECT path, created_at, expires_at FROM entries WHERE key = ? AND extension = ?",
+                (key, extension),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+
+        path, created_at, expires_at = row
+        try:
+            with open(os.path.join(self.data_dir, path), "rb") as f:
+                raw = zlib.decompress(f.read()).decode("utf-8")
+        except FileNotFoundError:
+            # Vừa bị ghi đè bởi thread/process khác
+            return None
+        except (OSError, zlib.error) as e:
+            logger.warning(f"Cache entry {key}.{extension} is unreadable: {e}")
+            self._delete_rows([(key, extension, path)])
+            return None
+        return raw, created_at, expires_at
+
+    def set(self, key: str, extension: str, raw: str, created_at: float, expires_at: float) -> str:
+        relative_path = self._relative_path(key, extension)
+        file_path = os.path.join(self.data_dir, relative_path)
+        shard_dir = os.path.dirname(file_path)
+        os.makedirs(shard_dir, exist_ok=True)
+
+        payload = zlib.compress(raw.encode("utf-8"), self.compress_level)
+        fd, tmp_path = tempfile.mkstemp(dir=shard_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            old = conn.execute(
+                "SELECT path FROM entries WHERE key = ? AND extension = ?",
+                (key, extension),
+            ).fetchone()
+            conn.execute(
+                """
+                INSERT INTO entries (key, extension, path, created_at, expires_at, size)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (key, extension) DO UPDATE SET
+                    path = excluded.path,
+                    created_at = excluded.created_at,
+                    expires_at = excluded.expires_at,
+                    size = excluded.size
+                """,
+                (key, extension, relative_path, created_at, expires_at, len(payload)),
+            )
+        if old:
+            self._remove_file(old[0])
+        return file_path
+
+    def delete(self, key: str, extension: str):
+        row = (
+            self._connect()
+            .execute(
+                "SELECT path FROM entries WHERE key = ? AND extension = ?",
+                (key, extension),
+            )
+            .fetchone()
+        )
+        if row:
+            self._delete_rows([(key, extension, row[0])])
+
+    def _delete_rows(self, rows):
+        # Chỉ xóa đúng phiên bản đã đọc (theo path), phiên bản mới ghi sau đó được giữ nguyên
+        with self._connect() as conn:
+            conn.executemany(
+                "DELETE FROM entries WHERE key = ? AND extension = ? AND path = ?", rows
+            )
+        for _, _, path in rows:
+            self._remove_file(path)
+
+    def _remove_file(self, path: str):
+        try:
+            os.remove(os.path.join(self.data_dir, path))
+        except FileNotFoundError:
+            pass
+
+    def sweep(self, now: float = None) -> int:
+        """Xóa hàng loạt các entry đã hết hạn, trả về số entry bị xóa"""
+        now = now or time.time()
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT key, extension, path FROM entries WHERE expires_at < ?", (now,)
+        ).fetchall()
+        if not rows:
+            return 0
+
+        self._delete_rows(rows)
+        logger.info(f"Cache sweep removed {len(rows)} expired entries from {self.cache_dir}")
+        return len(rows)
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_cache_store(cache_dir: str) -> IndexedCacheStore:
+    """Một store cho mỗi thư mục cache trong process"""
+    with _stores_lock:
+        if cache_dir not in _stores:
+            _stores[cache_dir] = IndexedCacheStore(cache_dir)
+        return _stores[cache_dir]
@@ -1,50 +1,193 @@
-import glob
 import json
 import os
+import threading
+import time
+from collections import Counter, OrderedDict
 from datetime import datetime, timedelta
 
 from app.config import config
+from app.logger import logger
+from app.utils.cache_store import get_cache_store
+
+
+class MemoryLRU:
+    """
+    Cache LRU trong process, giới hạn theo số entry và tổng kích thước (byte).
+    Giá trị trả về được dùng chung giữa các lần gọi, caller không được sửa đổi.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # key -> (value, size, created_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, max_age: timedelta):
+        value, _ = self.get_entry(key, max_age)
+        return value
+
+    def get_entry(self, key, max_age: timedelta):
+        """Trả về (value, created_at), hoặc (None, None) nếu không có / quá max_age"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None, None
+
+            value, size, created_at = item
+            if datetime.now() - created_at >= max_age:
+                self._remove(key)
+                self.misses += 1
+                return None, None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value, created_at
+
+    def set(self, key, value, size: int, created_at: datetime):
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, size, created_at)
+            self._bytes += size
+
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                oldest_key = next(iter(self._data))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def pop(self, key):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def _remove(self, key):
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Tầng cache bộ nhớ dùng chung cho mọi CachingUtil trong process
+memory_cache = MemoryLRU(
+    max_entries=config.CACHE_MEMORY_MAX_ENTRIES,
+    max_bytes=config.CACHE_MEMORY_MAX_MB * 1024 * 1024,
+)
+_file_stats = Counter()
 
 
 class CachingUtil:
+    # Khoảng thời gian tối thiểu (giây) giữa hai lần dọn entry hết hạn trong một process
+    SWEEP_INTERVAL_SECONDS = 3600
+    _last_sweep = {}
+
     def __init__(self, cache_dir=None, expiry_days=None):
         self.cache_dir = cache_dir or config.CACHE_DIR
         self.expiry_days = expiry_days or config.CACHE_EXPIRY_DAYS
+        self.stale_age = timedelta(days=config.CACHE_STALE_DAYS)
         os.makedirs(self.cache_dir, exist_ok=True)
+        self.store = get_cache_store(self.cache_dir)
+
+    def _memory_key(self, key, extension):
+        return (self.cache_dir, key, extension)
 
-    def _get_file_path(self, key, extension, timestamp=None):
-        ts = timestamp or datetime.now().strftime("%Y%m%d")
-        return os.path.join(self.cache_dir, f"{key}_{ts}.{extension}")
+    @staticmethod
+    def _serialize(data, extension) -> str:
+        if extension == "json":
+            return json.dumps(data, ensure_ascii=False)
+        return data
 
     def get(self, key, extension="json"):
-        """Lấy dữ liệu từ cache nếu còn hạn"""
-        # Tìm tất cả các file có pattern: key_*.json
-        search_pattern = os.path.join(self.cache_dir, f"{key}_*.{extension}")
-        for file_path in glob.glob(search_pattern):
-            filename = os.path.basename(file_path)
-            # Trích xuất timestamp (giả định định dạng key_YYYYMMDD.json)
-            date_str = filename.replace(f"{key}_", "").replace(f".{extension}", "")
-            try:
-                file_time = datetime.strptime(date_str, "%Y%m%d")
-                if datetime.now() - file_time < timedelta(days=self.expiry_days):
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        if extension == "json":
-                            return json.load(f)
-                        else:
-                            return f.read()
+        """Lấy dữ liệu từ cache nếu còn hạn (bộ nhớ trước, sau đó tới store trên đĩa)"""
+        data, is_fresh = self.get_entry(key, extension)
+        return data if is_fresh else None
+
+    def get_entry(self, key, extension="json"):
+        """
+        Trả về (data, is_fresh). Entry đã hết hạn nhưng còn trong khoảng stale_days
+        vẫn được trả về với is_fresh=False (dùng cho stale-while-revalidate).
+        """
+        max_age = timedelta(days=self.expiry_days)
+        memory_key = self._memory_key(key, extension)
+        data, created_at = memory_cache.get_entry(memory_key, max_age + self.stale_age)
+        if data is not None and datetime.now() - created_at < max_age:
+            return data, True
+
+        # Bộ nhớ không có hoặc đã cũ: process khác có thể đã ghi bản mới hơn xuống store
+        entry = self.store.get(key, extension)
+        if entry is not None:
+            raw, stored_at, _ = entry
+            stored_at = datetime.fromtimestamp(stored_at)
+            # Entry hết hạn được giữ lại cho tới lần sweep kế tiếp
+            if datetime.now() - stored_at < max_age + self.stale_age and (
+                created_at is None or stored_at > created_at
+            ):
+                try:
+                    data = json.loads(raw) if extension == "json" else raw
+                    created_at = stored_at
+                except ValueError:
+                    self.store.delete(key, extension)
                 else:
-                    # Xóa nếu hết hạn
-                    os.remove(file_path)
-            except ValueError:
-                os.remove(file_path)
-        return None
+                    # Nạp lên tầng bộ nhớ với cùng mốc thời gian để hết hạn đồng bộ với store
+                    memory_cache.set(memory_key, data, len(raw), stored_at)
+
+        if data is None:
+            _file_stats["misses"] += 1
+            return None, False
+
+        is_fresh = datetime.now() - created_at < max_age
+        _file_stats["hits" if is_fresh else "stale_hits"] += 1
+        return data, is_fresh
 
     def set(self, key, extension, data):
-        """Lưu dữ liệu mới vào cache"""
-        file_path = self._get_file_path(key, extension)
-        with open(file_path, "w", encoding="utf-8") as f:
-            if extension == "json":
-                json.dump(data, f, ensure_ascii=False, indent=4)
-            else:
-                f.write(data)
+        """Lưu dữ liệu mới vào cache (ghi xuyên cả bộ nhớ và store trên đĩa)"""
+        raw = self._serialize(data, extension)
+        now = datetime.now()
+        # Giữ entry thêm stale_age sau khi hết hạn để còn phục vụ bản cũ khi đang refresh
+        expires_at = now + timedelta(days=self.expiry_days) + self.stale_age
+        file_path = self.store.set(
+            key, extension, raw, now.timestamp(), expires_at.timestamp()
+        )
+        memory_cache.set(self._memory_key(key, extension), data, len(raw), now)
+        self._maybe_sweep()
         return file_path
+
+    def sweep(self) -> int:
+        """Dọn hàng loạt các entry đã hết hạn"""
+        CachingUtil._last_sweep[self.cache_dir] = time.time()
+        return self.store.sweep()
+
+    def _maybe_sweep(self):
+        last_sweep = CachingUtil._last_sweep.get(self.cache_dir, 0)
+        if time.time() - last_sweep >= self.SWEEP_INTERVAL_SECONDS:
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.warning(f"Cache sweep failed for {self.cache_dir}: {e}")
+
+    @staticmethod
+    def stats() -> dict:
+        """Bộ đếm hit/miss/eviction của tầng bộ nhớ và hit/miss của tầng đĩa"""
+        return {
+            "memory": memory_cache.stats(),
+            "file": {
+                "hits": _file_stats["hits"],
+                "stale_hits": _file_stats["stale_hits"],
+                "misses": _file_stats["misses"],
+            },
+        }
@@ -0,0 +1,65 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Set
+
+from app.config import config
+
+
+class SyncCheckpoint:
+    """
+    Ghi tiến độ theo từng mã vào file JSON Lines (append + fsync mỗi dòng),
+    để lần chạy sau bỏ qua các mã đã xong khi process bị dừng giữa chừng.
+    Trạng thái của một mã là dòng cuối cùng ghi cho mã đó.
+    """
+
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, name: str, checkpoint_dir: str = None):
+        checkpoint_dir = checkpoint_dir or os.path.join(config.CACHE_DIR, "checkpoints")
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        self.path = os.path.join(checkpoint_dir, f"{name}.jsonl")
+        self._lock = threading.Lock()
+        self._statuses = self._load()
+
+    def _load(self) -> Dict[str, str]:
+        statuses = {}
+        if not os.path.exists(self.path):
+            return statuses
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Dòng cuối có thể bị ghi dở khi process chết
+                    continue
+                statuses[entry["symbol"]] = entry["status"]
+        return statuses
+
+    @property
+    def completed(self) -> Set[str]:
+        with self._lock:
+            return {symbol for symbol, status in self._statuses.items() if status == self.DONE}
+
+    def status(self, symbol: str) -> Optional[str]:
+        with self._lock:
+            return self._statuses.get(symbol)
+
+    def mark(self, symbol: str, status: str, error: str = None):
+        entry = {"symbol": symbol, "status": status, "at": time.time()}
+        if error:
+            entry["error"] = error[:500]
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._statuses[symbol] = status
+
+    def reset(self):
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self._statuses = {}
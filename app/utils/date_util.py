@@ -1,18 +1,112 @@
+import calendar
+import re
+import threading
+import unicodedata
 from datetime import date, datetime
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import pandas as pd
+
+# Kỳ báo cáo theo quý trên CafeF: "Q3/2025", "Quý 3 2025", "Quý 3/2025", "quý 3 năm 2025"
+_QUARTER_PATTERN = r"^(?:q|quý)\s*([1-4])\s*(?:[/\-.]|năm)?\s*(\d{4})$"
+_QUARTER = re.compile(_QUARTER_PATTERN)
 
 
 class DateUtils:
+    FORMATS = ["%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d"]
+
+    # Định dạng đã suy ra cho từng nguồn dữ liệu, thử trước ở các lần gọi sau
+    _inferred_formats: Dict[str, str] = {}
+    _lock = threading.Lock()
 
     @staticmethod
     def parse_date(date_str: str) -> date:
         if not date_str:
             return None
 
-        formats = ["%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d"]
+        formats = DateUtils.FORMATS
         for fmt in formats:
             try:
                 return datetime.strptime(date_str, fmt).date()
             except ValueError:
                 continue
 
+        quarter_end = DateUtils.parse_quarter(date_str)
+        if quarter_end:
+            return quarter_end
+
         raise ValueError(f"Date string '{date_str}' is not in a recognized format.")
+
+    @staticmethod
+    def split_quarter(value: str) -> Optional[Tuple[int, int]]:
+        """Kỳ quý -> (năm, quý), vd: 'Quý 3 2025' -> (2025, 3)"""
+        match = _QUARTER.match(unicodedata.normalize("NFC", value).strip().lower())
+        if not match:
+            return None
+        return int(match.group(2)), int(match.group(1))
+
+    @staticmethod
+    def parse_quarter(value: str) -> Optional[date]:
+        """Kỳ quý -> ngày cuối quý, vd: 'Q3/2025' -> 2025-09-30"""
+        period = DateUtils.split_quarter(value)
+        if not period:
+            return None
+        year, quarter = period
+        month = quarter * 3
+        return date(year, month, calendar.monthrange(year, month)[1])
+
+    @classmethod
+    def parse_dates(
+        cls,
+        values: Union[pd.Series, Iterable[str]],
+        source: str = None,
+        as_date: bool = False,
+    ) -> pd.Series:
+        """
+        Parse cả cột ngày một lần (vector hóa), không raise khi gặp giá trị lỗi.
+        - Mỗi định dạng được thử trên toàn bộ phần còn lại của cột, định dạng khớp nhiều nhất
+          được nhớ theo `source` (vd: 'cafef_insider') để lần sau thử đầu tiên.
+        - Kỳ quý (Q3/2025, Quý 3 2025) được quy về ngày cuối quý.
+        Trả về Series datetime64 (NaT nếu lỗi), hoặc Series date/None nếu as_date=True.
+        """
+        series = values if isinstance(values, pd.Series) else pd.Series(list(values))
+        # Làm việc trên index vị trí, trả lại index gốc ở cuối (index gốc có thể bị trùng)
+        text = series.fillna("").astype(str).str.strip().reset_index(drop=True)
+        result = pd.Series(pd.NaT, index=text.index, dtype="datetime64[ns]")
+
+        quarters = text.str.normalize("NFC").str.lower().str.extract(_QUARTER_PATTERN)
+        is_quarter = quarters[0].notna()
+        if is_quarter.any():
+            periods = pd.PeriodIndex.from_fields(
+                year=quarters.loc[is_quarter, 1].astype(int),
+                quarter=quarters.loc[is_quarter, 0].astype(int),
+                freq="Q",
+            )
+            result[is_quarter] = periods.end_time.normalize()
+
+        remaining = (text != "") & ~is_quarter
+        with cls._lock:
+            inferred = cls._inferred_formats.get(source) if source else None
+        formats = cls.FORMATS
+        if inferred:
+            formats = [inferred] + [f for f in cls.FORMATS if f != inferred]
+
+        best_format, best_count = None, 0
+        for fmt in formats:
+            if not remaining.any():
+                break
+            parsed = pd.to_datetime(text[remaining], format=fmt, errors="coerce")
+            matched = parsed.notna()
+            if matched.sum() > best_count:
+                best_format, best_count = fmt, int(matched.sum())
+            result[parsed[matched].index] = parsed[matched]
+            remaining &= result.isna()
+
+        if source and best_format and best_format != inferred:
+            with cls._lock:
+                cls._inferred_formats[source] = best_format
+
+        result.index = series.index
+        if as_date:
+            return result.dt.date.where(result.notna(), None)
+        return result
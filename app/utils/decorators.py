@@ -2,6 +2,7 @@ import functools
 
 from app.logger import logger
 from app.utils.caching_util import CachingUtil
+from app.utils.single_flight import single_flight
 
 cache_service = CachingUtil()
 
@@ -37,19 +38,34 @@ def cached_data(cache_key_prefix: str, extension: str, expiry_days: int = None):
             service = (
                 CachingUtil(expiry_days=expiry_days) if expiry_days else cache_service
             )
-            data = service.get(cache_key, extension)
+            data, is_fresh = service.get_entry(cache_key, extension)
 
-            if data is not None:
+            if data is not None and is_fresh:
                 logger.info(f"Cache hit: {cache_key}")
                 return data
 
-            # 2. Nếu không có cache, thực thi hàm gốc
-            logger.info(f"Cache miss: {cache_key}. Fetching new data...")
-            result = func(*args, **kwargs)
-
-            # 3. Lưu kết quả vào cache nếu fetch thành công
-            if result:
-                service.set(cache_key, extension, result)
+            # 2. Chỉ một caller (thread/process) được fetch cho mỗi key.
+            # Nếu đã có bản cũ thì không chờ: trả bản cũ trong lúc caller khác refresh.
+            with single_flight.lock(cache_key, blocking=data is None) as acquired:
+                if not acquired:
+                    logger.info(f"Serving stale cache for {cache_key} while refresh is in progress")
+                    return data
+
+                # Caller khác có thể vừa fetch xong trong lúc ta chờ lock
+                fresh_data, is_fresh = service.get_entry(cache_key, extension)
+                if fresh_data is not None and is_fresh:
+                    logger.info(f"Cache hit after wait: {cache_key}")
+                    return fresh_data
+
+                logger.info(f"Cache miss: {cache_key}. Fetching new data...")
+                result = func(*args, **kwargs)
+
+                # 3. Lưu kết quả vào cache nếu fetch thành công
+                if result:
+                    service.set(cache_key, extension, result)
+                elif data is not None:
+                    logger.warning(f"Fetch failed for {cache_key}, serving stale cache")
+                    return data
 
             return result
 
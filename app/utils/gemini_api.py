@@ -1,118 +1,396 @@
-import itertools
-import json
-import re
-import time
-from typing import Dict, List, Union
-
-from google.genai import Client, types
-from tenacity import (
-    retry,
-    retry_if_exception_type,
-    stop_after_attempt,
-    wait_exponential,
-)
-
-from app.config import config
-from app.logger import logger
-from app.utils.decorators import log_execution_time
-from app.utils.string_utils import clean_json_string
-
-
-class GeminiRotator:
-    def __init__(self, api_keys: List[str], model_id: str, delay_seconds: float = 1.0):
-        self.key_pool = itertools.cycle(api_keys)
-        self.model_id = model_id
-        self.delay_seconds = delay_seconds
-        self.last_request_time = 0
-
-    def get_client(self):
-        # Tính toán delay để tránh bị rate limit IP
-        now = time.time()
-        elapsed = now - self.last_request_time
-        if elapsed < self.delay_seconds:
-            time.sleep(self.delay_seconds - elapsed)
-
-        current_key = next(self.key_pool)
-        # genai.configure(api_key=current_key)
-        client = Client(api_key=current_key)
-
-        self.last_request_time = time.time()
-        return client
-
-
-rotator = GeminiRotator(
-    api_keys=config.GEMINI_API_KEYS,
-    model_id=config.GEMINI_MODEL_ID,
-    delay_seconds=1.5,  # Nghỉ 1.5s giữa mỗi lần lấy key
-)
-
-
-@retry(
-    stop=stop_after_attempt(
-        len(
-            config.GEMINI_API_KEYS,
-        )
-        * 2
-    ),
-    wait=wait_exponential(multiplier=1, min=2, max=10),
-    retry=retry_if_exception_type(Exception),
-    reraise=True,  # Giúp bạn thấy lỗi thật sự sau khi đã thử hết số lần
-)
-@log_execution_time
-def generate(prompt: str) -> str:
-    client = rotator.get_client()
-    try:
-        response = client.models.generate_content(
-            model=rotator.model_id,
-            contents=types.Part.from_text(text=prompt),
-            config={
-                "temperature": 0,
-                "top_p": 0.95,
-                "top_k": 20,
-            },
-        )
-
-        # KIỂM TRA AN TOÀN: Tránh lỗi attribute .text khi response bị block
-        if not response.candidates or not response.candidates[0].content.parts:
-            # Nếu bị block bởi Safety Filter, ta nên raise lỗi để retry đổi key/prompt
-            logger.warning("Gemini response was blocked by safety filters or empty.")
-            raise ValueError("Empty or blocked response from Gemini")
-
-        return response.text
-
-    except Exception as e:
-        logger.error(f"API Error with key: {str(e)[:100]}")
-        raise e  # Kích hoạt retry
-    finally:
-        client.close()
-
-
-@retry(
-    stop=stop_after_attempt(
-        len(
-            config.GEMINI_API_KEYS,
-        )
-        * 2
-    ),
-    wait=wait_exponential(multiplier=1, min=2, max=10),
-    retry=retry_if_exception_type(Exception),
-    reraise=True,  # Giúp bạn thấy lỗi thật sự sau khi đã thử hết số lần
-)
-def extract_data(prompt: str) -> Union[Dict, List]:
-    client = rotator.get_client()
-
-    try:
-        response_text = generate(prompt)
-
-        # Bóc tách JSON
-        json_str = clean_json_string(response_text).strip()
-        return json.loads(json_str)
-
-    except (json.JSONDecodeError, ValueError) as e:
-        logger.error(f"JSON Format error: {e}. Retrying...")
-        raise e  # Kích hoạt retry
-    except Exception as e:
-        logger.error(f"API Error with key: {str(e)[:100]}")
-        raise e  # Kích hoạt retry
-    finally:
-        client.close()
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Type, Union
+
+import httpx
+from google.genai import Client, types
+from pydantic import BaseModel, ValidationError
+from tenacity import (
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+)
+
+from app.config import config
+from app.logger import logger
+from app.utils.caching_util import CachingUtil
+from app.utils.decorators import log_execution_time
+from app.utils.json_stream import JsonArrayStream
+from app.utils.key_scheduler import KeyScheduler
+from app.utils.string_utils import clean_json_string, clean_markdown_string, estimate_tokens
+
+
+class GeminiRotator:
+    def __init__(
+        self,
+        api_keys: List[str],
+        model_id: str,
+        rpm: int = None,
+        tpm: int = None,
+        base_url: str = None,
+    ):
+        self.model_id = model_id
+        self.base_url = base_url
+        # Mỗi key một client sống lâu (giữ kết nối keep-alive), dùng chung giữa các thread
+        self._clients: Dict[str, Client] = {}
+        self._clients_lock = threading.Lock()
+        self.scheduler = KeyScheduler(
+            api_keys,
+            rpm=rpm or config.GEMINI_RPM,
+            tpm=tpm or config.GEMINI_TPM,
+        )
+
+    def _create_client(self, api_key: str) -> Client:
+        if self.base_url:
+            return Client(
+                api_key=api_key, http_options=types.HttpOptions(base_url=self.base_url)
+            )
+        return Client(api_key=api_key)
+
+    def _get_client(self, api_key: str) -> Client:
+        with self._clients_lock:
+            client = self._clients.get(api_key)
+            if client is None:
+                client = self._create_client(api_key)
+                self._clients[api_key] = client
+            return client
+
+    def _recycle_client(self, api_key: str, client: Client):
+        with self._clients_lock:
+            if self._clients.get(api_key) is client:
+                del self._clients[api_key]
+        try:
+            client.close()
+        except Exception as e:
+            logger.debug(f"Error while closing Gemini client: {e}")
+
+    @contextmanager
+    def client(self, estimated_tokens: int = 0):
+        """
+        Mượn client của một key theo ngân sách RPM/TPM (chờ nếu mọi key đều hết ngân sách).
+        Lỗi 429/5xx/xác thực được báo lại cho scheduler để cho key nghỉ hoặc loại key;
+        client bị lỗi xác thực hoặc lỗi kết nối sẽ được tạo lại ở lần dùng sau.
+        """
+        lease = self.scheduler.acquire(estimated_tokens)
+        client = self._get_client(lease.api_key)
+        # Caller ghi số token thực tế vào usage["tokens"] để hiệu chỉnh ngân sách TPM
+        usage = {}
+        status_code = None
+        try:
+            yield client, usage
+        except Exception as e:
+            status_code = _error_status_code(e)
+            if status_code in KeyScheduler.AUTH_ERROR_CODES or isinstance(
+                e, TRANSPORT_ERRORS
+            ):
+                self._recycle_client(lease.api_key, client)
+            raise
+        finally:
+            self.scheduler.release(
+                lease, status_code=status_code, used_tokens=usage.get("tokens")
+            )
+
+    def close(self):
+        with self._clients_lock:
+            clients = list(self._clients.items())
+            self._clients.clear()
+        for api_key, client in clients:
+            self._recycle_client(api_key, client)
+
+    @property
+    def max_concurrency(self) -> int:
+        return config.GEMINI_MAX_CONCURRENCY or max(1, self.scheduler.healthy_keys()) * 2
+
+
+# Lỗi tầng kết nối: client cần được tạo lại
+TRANSPORT_ERRORS = (httpx.TransportError, ConnectionError)
+
+
+def _error_status_code(error: Exception):
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+rotator = GeminiRotator(
+    api_keys=config.GEMINI_API_KEYS,
+    model_id=config.GEMINI_MODEL_ID,
+    base_url=config.GEMINI_BASE_URL,
+)
+
+
+GENERATION_CONFIG = {
+    "temperature": 0,
+    "top_p": 0.95,
+    "top_k": 20,
+}
+
+# Cache kết quả LLM theo nội dung prompt, tách riêng thư mục để có chính sách lưu giữ riêng
+llm_cache = CachingUtil(
+    cache_dir=os.path.join(config.CACHE_DIR, "llm"),
+    expiry_days=config.LLM_CACHE_EXPIRY_DAYS,
+)
+_llm_cache_stats = Counter()
+
+
+def _prompt_cache_key(prompt: str, model_id: str, generation_config: dict) -> str:
+    payload = json.dumps(
+        {"model": model_id, "config": generation_config, "prompt": prompt},
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return f"llm_{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+def llm_cache_stats() -> dict:
+    hits, misses = _llm_cache_stats["hits"], _llm_cache_stats["misses"]
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / total if total else 0.0,
+    }
+
+
+class InvalidResponseError(ValueError):
+    """Response của LLM không đúng định dạng mong đợi (không được cache, được thử lại)"""
+
+
+def text_response(response_text: str) -> str:
+    if not response_text or not response_text.strip():
+        raise InvalidResponseError("Empty response from Gemini")
+    return response_text
+
+
+def markdown_response(response_text: str) -> str:
+    """Markdown đã làm sạch (bỏ ```markdown), rỗng thì không hợp lệ"""
+    markdown = clean_markdown_string(response_text)
+    if not markdown:
+        raise InvalidResponseError("Empty markdown response from Gemini")
+    return markdown
+
+
+def json_response(response_text: str) -> Union[Dict, List]:
+    """JSON đầu tiên trong text trả về"""
+    json_str = clean_json_string(response_text).strip()
+    try:
+        return json.loads(json_str)
+    except json.JSONDecodeError as e:
+        raise InvalidResponseError(f"JSON Format error: {e}") from e
+
+
+def _parser_name(parse: Callable) -> str:
+    func = getattr(parse, "func", parse)  # functools.partial
+    return f"{func.__module__}.{func.__qualname__}"
+
+
+def generate(prompt: str, parse: Callable[[str], Any] = text_response) -> Any:
+    """
+    Sinh nội dung từ prompt và parse/validate bằng `parse` (raise InvalidResponseError nếu
+    response không dùng được). Chỉ kết quả đã parse thành công mới được cache; prompt giống hệt
+    (cùng model/config/parse) được trả từ cache.
+    """
+    if not config.LLM_CACHE_ENABLED:
+        return _generate_parsed(prompt, parse)
+
+    cache_key = _prompt_cache_key(
+        prompt, rotator.model_id, {**GENERATION_CONFIG, "parse": _parser_name(parse)}
+    )
+    cached_result = llm_cache.get(cache_key, "json")
+    if cached_result is not None:
+        _llm_cache_stats["hits"] += 1
+        logger.info(f"LLM cache hit: {cache_key}")
+        return cached_result
+
+    _llm_cache_stats["misses"] += 1
+    result = _generate_parsed(prompt, parse)
+    llm_cache.set(cache_key, "json", result)
+    return result
+
+
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=2, max=10),
+    retry=retry_if_exception_type(InvalidResponseError),
+    reraise=True,
+)
+def _generate_parsed(prompt: str, parse: Callable[[str], Any]) -> Any:
+    try:
+        return parse(_generate(prompt))
+    except InvalidResponseError as e:
+        logger.error(f"{e}. Retrying...")
+        raise e  # Kích hoạt retry
+
+
+@retry(
+    stop=stop_after_attempt(
+        len(
+            config.GEMINI_API_KEYS,
+        )
+        * 2
+    ),
+    wait=wait_exponential(multiplier=1, min=2, max=10),
+    retry=retry_if_exception_type(Exception),
+    reraise=True,  # Giúp bạn thấy lỗi thật sự sau khi đã thử hết số lần
+)
+@log_execution_time
+def _generate(prompt: str) -> str:
+    with rotator.client(estimate_tokens(prompt)) as (client, usage):
+        try:
+            response = client.models.generate_content(
+                model=rotator.model_id,
+                contents=types.Part.from_text(text=prompt),
+                config=GENERATION_CONFIG,
+            )
+
+            # KIỂM TRA AN TOÀN: Tránh lỗi attribute .text khi response bị block
+            if not response.candidates or not response.candidates[0].content.parts:
+                # Nếu bị block bởi Safety Filter, ta nên raise lỗi để retry đổi key/prompt
+                logger.warning("Gemini response was blocked by safety filters or empty.")
+                raise ValueError("Empty or blocked response from Gemini")
+
+            if response.usage_metadata and response.usage_metadata.total_token_count:
+                usage["tokens"] = response.usage_metadata.total_token_count
+            return response.text
+
+        except Exception as e:
+            logger.error(f"API Error with key: {str(e)[:100]}")
+            raise e  # Kích hoạt retry
+
+
+def generate_many(
+    prompts: List[str],
+    parse: Union[Callable[[str], Any], Sequence[Callable[[str], Any]]] = text_response,
+    max_workers: int = None,
+    return_exceptions: bool = False,
+) -> List[Any]:
+    """
+    Gọi generate cho nhiều prompt song song, tối đa theo tổng năng lực của các key.
+    `parse` là một hàm chung hoặc danh sách hàm theo từng prompt.
+    Kết quả giữ nguyên thứ tự prompt; prompt lỗi sẽ raise khi lấy kết quả,
+    hoặc trả về chính exception nếu return_exceptions=True.
+    """
+    parsers = list(parse) if isinstance(parse, (list, tuple)) else [parse] * len(prompts)
+    max_workers = max_workers or rotator.max_concurrency
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gemini") as executor:
+        futures = [
+            executor.submit(generate, prompt, parser) for prompt, parser in zip(prompts, parsers)
+        ]
+        if not return_exceptions:
+            return [future.result() for future in futures]
+        return [future.exception() or future.result() for future in futures]
+
+
+def _extract_json(prompt: str) -> Union[Dict, List]:
+    return generate(prompt, parse=json_response)
+
+
+def extract_data(
+    prompt: str, schema: Type[BaseModel] = None
+) -> Union[Dict, List]:
+    """
+    Trích xuất JSON từ prompt.
+    Có schema: dùng structured output (mảng các record theo schema), trả về list record đã validate.
+    Không có schema: bóc JSON đầu tiên trong text trả về.
+    """
+    if schema is not None:
+        return list(extract_records(prompt, schema))
+    return _extract_json(prompt)
+
+
+def _structured_config(schema: Type[BaseModel]) -> dict:
+    return {
+        **GENERATION_CONFIG,
+        "response_mime_type": "application/json",
+        "response_schema": list[schema],
+    }
+
+
+def _stream_items(prompt: str, schema: Type[BaseModel]) -> Iterator[Any]:
+    """Gọi generate_content_stream và trả về từng phần tử của mảng JSON ngay khi nhận đủ"""
+    parser = JsonArrayStream()
+    with rotator.client(estimate_tokens(prompt)) as (client, usage):
+        for chunk in client.models.generate_content_stream(
+            model=rotator.model_id,
+            contents=types.Part.from_text(text=prompt),
+            config=_structured_config(schema),
+        ):
+            if chunk.usage_metadata and chunk.usage_metadata.total_token_count:
+                usage["tokens"] = chunk.usage_metadata.total_token_count
+            if chunk.text:
+                yield from parser.feed(chunk.text)
+        parser.close()
+
+
+def _validate_item(item: Any, schema: Type[BaseModel]) -> Optional[BaseModel]:
+    try:
+        return schema.model_validate(item)
+    except ValidationError as e:
+        # Một record lỗi không đáng để gọi lại cả response
+        logger.warning(f"Skipping invalid {schema.__name__} record: {str(e)[:200]}")
+        return None
+
+
+def extract_records(prompt: str, schema: Type[BaseModel]) -> Iterator[BaseModel]:
+    """
+    Trích xuất danh sách record theo schema bằng structured output + streaming.
+    Record được validate và trả về ngay khi phần tử JSON tương ứng nhận đủ,
+    không chờ hết response. Khi lỗi giữa chừng, response mới có thể khác thứ tự/độ dài:
+    lần thử lại bỏ qua record đã trả theo nội dung, không theo vị trí.
+    Cache chỉ lưu record của một lần sinh trọn vẹn.
+    """
+    cache_key = _prompt_cache_key(
+        prompt,
+        rotator.model_id,
+        {**GENERATION_CONFIG, "response_schema": schema.model_json_schema()},
+    )
+    if config.LLM_CACHE_ENABLED:
+        cached_items = llm_cache.get(cache_key, "json")
+        if cached_items is not None:
+            _llm_cache_stats["hits"] += 1
+            logger.info(f"LLM cache hit: {cache_key}")
+            for item in cached_items:
+                record = _validate_item(item, schema)
+                if record is not None:
+                    yield record
+            return
+        _llm_cache_stats["misses"] += 1
+
+    if not config.GEMINI_API_KEYS:
+        raise ValueError("GEMINI_API_KEYS is not configured")
+
+    attempts = len(config.GEMINI_API_KEYS) * 2
+    # Nội dung các record đã trả cho caller, qua mọi lần thử
+    emitted = set()
+    for attempt in range(1, attempts + 1):
+        # Record đã validate của lần thử hiện tại (chỉ lần trọn vẹn mới được cache)
+        records, seen = [], set()
+        try:
+            for item in _stream_items(prompt, schema):
+                record = _validate_item(item, schema)
+                if record is None:
+                    continue
+                dumped = record.model_dump(mode="json")
+                content_key = json.dumps(dumped, ensure_ascii=False, sort_keys=True)
+                if content_key in seen:
+                    continue
+                seen.add(content_key)
+                records.append(dumped)
+                if content_key not in emitted:
+                    emitted.add(content_key)
+                    yield record
+            break
+        except Exception as e:
+            logger.error(f"Structured extraction error (attempt {attempt}/{attempts}): {str(e)[:100]}")
+            if attempt == attempts:
+                raise
+            time.sleep(min(2**attempt, 10))
+
+    if config.LLM_CACHE_ENABLED:
+        llm_cache.set(cache_key, "json", records)
@@ -0,0 +1,155 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import lxml.html
+from lxml import etree
+
+from app.config import config
+from app.logger import logger
+
+# Nội dung không phải text hiển thị (BeautifulSoup.get_text cũng bỏ qua)
+_SKIP_TAGS = frozenset({"script", "style", "template"})
+
+
+class HtmlExtract(NamedTuple):
+    """Kết quả parse một tài liệu HTML (picklable để trả về từ process pool)"""
+
+    # Text vùng nội dung chính, mỗi text node một dòng
+    text: str
+    # (text, href) của mọi thẻ <a href>
+    anchors: List[Tuple[str, str]]
+    # Tên -> text của từng phần tử khớp xpath
+    texts: Dict[str, List[str]]
+    # Tên -> các dòng (danh sách ô) của bảng khớp xpath
+    tables: Dict[str, List[List[str]]]
+    # True nếu tìm thấy vùng nội dung chính theo main_xpaths (không phải lấy cả tài liệu)
+    matched_main: bool = False
+
+
+def class_xpath(tag: str, class_name: str) -> str:
+    """XPath tương đương CSS `tag.class_name` (khớp một token trong thuộc tính class)"""
+    return f"//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')]"
+
+
+def _parse(html: str):
+    # Parse bytes UTF-8: lxml từ chối chuỗi str có khai báo encoding (<?xml ... encoding=...?>)
+    try:
+        return lxml.html.document_fromstring(
+            html.encode("utf-8"), parser=lxml.html.HTMLParser(encoding="utf-8")
+        )
+    except etree.ParserError:
+        return None
+
+
+def _text_nodes(element) -> List[str]:
+    """Các text node (đã strip, bỏ rỗng) theo thứ tự tài liệu, bỏ qua script/style/comment"""
+    nodes = []
+
+    def walk(node):
+        if node.text:
+            nodes.append(node.text)
+        for child in node:
+            # Comment/processing instruction có tag không phải str: bỏ text, giữ tail
+            if isinstance(child.tag, str) and child.tag not in _SKIP_TAGS:
+                walk(child)
+            if child.tail:
+                nodes.append(child.tail)
+
+    walk(element)
+    return [text for text in (node.strip() for node in nodes) if text]
+
+
+def _first(root, xpaths: Sequence[str]):
+    for xpath in xpaths:
+        found = root.xpath(xpath)
+        if found:
+            return found[0]
+    return None
+
+
+def extract_html(
+    html: str,
+    main_xpaths: Sequence[str] = (),
+    texts: Dict[str, str] = None,
+    tables: Dict[str, str] = None,
+    separator: str = "\n",
+) -> HtmlExtract:
+    """
+    Parse HTML một lần bằng lxml và lấy mọi thứ crawler cần từ cùng một cây:
+    - text của vùng nội dung chính: xpath đầu tiên trong `main_xpaths` có kết quả,
+      không có thì lấy cả tài liệu;
+    - anchors, text theo xpath (`texts`) và các dòng của bảng (`tables`).
+    """
+    root = _parse(html) if html else None
+    if root is None:
+        return HtmlExtract(
+            "", [], {name: [] for name in texts or {}}, {name: [] for name in tables or {}}
+        )
+
+    main = _first(root, main_xpaths)
+    text = separator.join(_text_nodes(main if main is not None else root))
+
+    anchors = []
+    for a in root.iter("a"):
+        href = a.get("href")
+        if href:
+            anchors.append((" ".join(a.text_content().split()), href))
+
+    selected = {
+        name: [" ".join(element.text_content().split()) for element in root.xpath(xpath)]
+        for name, xpath in (texts or {}).items()
+    }
+
+    rows = {}
+    for name, xpath in (tables or {}).items():
+        table = _first(root, [xpath])
+        rows[name] = [
+            ["".join(_text_nodes(cell)) for cell in tr.iter("td", "th")]
+            for tr in (table.iter("tr") if table is not None else [])
+        ]
+    return HtmlExtract(text, anchors, selected, rows, main is not None)
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: process cha có nhiều thread (browser pool, worker) nên không fork
+            _executor = ProcessPoolExecutor(
+                max_workers=config.HTML_PARSE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+async def extract_html_async(html: str, **kwargs) -> HtmlExtract:
+    """
+    Như extract_html nhưng parse trong process pool để không chặn event loop của BrowserPool.
+    Tài liệu nhỏ (dưới HTML_PARSE_INLINE_CHARS) parse ngay vì chi phí gửi qua process lớn hơn.
+    """
+    if not html or config.HTML_PARSE_WORKERS <= 0 or len(html) < config.HTML_PARSE_INLINE_CHARS:
+        return extract_html(html, **kwargs)
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_get_executor(), partial(extract_html, html, **kwargs))
+    except BrokenProcessPool as e:
+        logger.warning(f"HTML parse worker died, parsing inline: {e}")
+        shutdown_html_workers()
+        return extract_html(html, **kwargs)
+
+
+def shutdown_html_workers():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
@@ -0,0 +1,67 @@
+import asyncio
+from typing import Iterable, List, Optional
+
+import httpx
+
+from app.config import config
+from app.logger import logger
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "vi-VN,vi;q=0.9,en;q=0.8",
+}
+
+
+class HttpFetcher:
+    """
+    Fetch trang HTML render sẵn phía server bằng httpx.AsyncClient dùng chung (keep-alive).
+    Client được tạo lười trên event loop gọi đầu tiên (event loop của BrowserPool).
+    """
+
+    def __init__(self, max_connections: int = None, timeout: float = 15.0):
+        self.max_connections = max_connections or config.HTTP_MAX_CONNECTIONS
+        self.timeout = timeout
+        self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=DEFAULT_HEADERS,
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    async def fetch(self, url: str) -> Optional[str]:
+        """Trả về HTML của url, hoặc None nếu lỗi (để caller fallback sang Playwright)"""
+        try:
+            response = await self._get_client().get(url)
+            response.raise_for_status()
+            return response.text
+        except httpx.HTTPError as e:
+            logger.warning(f"HTTP fetch failed for {url}: {e}")
+            return None
+
+    async def fetch_many(self, urls: Iterable[Optional[str]]) -> List[Optional[str]]:
+        """Fetch song song, giữ nguyên thứ tự; url None trả về None"""
+
+        async def _fetch(url):
+            return await self.fetch(url) if url else None
+
+        return await asyncio.gather(*(_fetch(url) for url in urls))
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+http_fetcher = HttpFetcher()
@@ -0,0 +1,69 @@
+import json
+from typing import Any, List
+
+_WHITESPACE = " \t\r\n"
+
+
+class JsonArrayStream:
+    """
+    Đọc dần một mảng JSON theo từng chunk text (vd: response stream của LLM)
+    và trả về từng phần tử ngay khi phần tử đó đã nhận đủ.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._started = False
+        self.finished = False
+
+    def _skip_whitespace(self, pos: int) -> int:
+        while pos < len(self._buffer) and self._buffer[pos] in _WHITESPACE:
+            pos += 1
+        return pos
+
+    def feed(self, chunk: str) -> List[Any]:
+        if self.finished:
+            return []
+        self._buffer += chunk
+        items = []
+        pos = 0
+        while True:
+            pos = self._skip_whitespace(pos)
+            if pos >= len(self._buffer):
+                break
+
+            char = self._buffer[pos]
+            if not self._started:
+                # Bỏ qua rác trước mảng (vd: ```json)
+                start = self._buffer.find("[", pos)
+                if start < 0:
+                    pos = len(self._buffer)
+                    break
+                self._started = True
+                pos = start + 1
+                continue
+            if char == ",":
+                pos += 1
+                continue
+            if char == "]":
+                self.finished = True
+                pos += 1
+                break
+
+            try:
+                item, end = self._decoder.raw_decode(self._buffer, pos)
+            except json.JSONDecodeError:
+                # Phần tử chưa nhận đủ, chờ chunk tiếp theo
+                break
+            # Số/literal ở cuối buffer có thể còn bị cắt dở (vd: 12 -> 123)
+            if end >= len(self._buffer) and not isinstance(item, (dict, list, str)):
+                break
+            items.append(item)
+            pos = end
+
+        self._buffer = self._buffer[pos:]
+        return items
+
+    def close(self):
+        if not self.finished:
+            raise ValueError("Truncated JSON array in streamed response")
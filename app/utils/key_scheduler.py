@@ -0,0 +1,171 @@
+import math
+import threading
+import time
+from typing import List, NamedTuple
+
+from app.logger import logger
+
+
+class KeyLease(NamedTuple):
+    api_key: str
+    estimated_tokens: int
+
+
+class KeyState:
+    """Ngân sách RPM/TPM (token bucket), cooldown và sức khỏe của một API key"""
+
+    def __init__(self, api_key: str, rpm: int, tpm: int):
+        self.api_key = api_key
+        self.rpm = rpm
+        self.tpm = tpm
+        self.request_budget = float(rpm)
+        self.token_budget = float(tpm)
+        self.updated_at = time.monotonic()
+        self.cooldown_until = 0.0
+        self.consecutive_failures = 0
+        self.disabled = False
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        # Thứ tự lần cấp gần nhất: key lâu chưa dùng được ưu tiên khi hòa
+        self.last_acquired = 0
+
+    def refill(self, now: float):
+        elapsed = now - self.updated_at
+        self.request_budget = min(self.rpm, self.request_budget + elapsed * self.rpm / 60)
+        self.token_budget = min(self.tpm, self.token_budget + elapsed * self.tpm / 60)
+        self.updated_at = now
+
+    def wait_time(self, now: float, tokens: int) -> float:
+        """Số giây cần chờ để key phục vụ được một request `tokens` token"""
+        if self.disabled:
+            return math.inf
+        self.refill(now)
+        waits = [self.cooldown_until - now]
+        if self.request_budget < 1:
+            waits.append((1 - self.request_budget) * 60 / self.rpm)
+        if self.token_budget < tokens:
+            waits.append((tokens - self.token_budget) * 60 / self.tpm)
+        return max(0.0, *waits)
+
+    def stats(self) -> dict:
+        return {
+            "key": f"...{self.api_key[-4:]}",
+            "requests": self.requests,
+            "failures": self.failures,
+            "in_flight": self.in_flight,
+            "consecutive_failures": self.consecutive_failures,
+            "cooling_down": self.cooldown_until > time.monotonic(),
+            "disabled": self.disabled,
+        }
+
+
+class KeyScheduler:
+    """
+    Cấp phát API key theo ngân sách RPM/TPM của từng key.
+    Key vừa bị 429/5xx được cho nghỉ (cooldown tăng dần), key lỗi xác thực bị loại.
+    An toàn khi gọi từ nhiều thread: `acquire()` chờ tới khi có key phục vụ được.
+    """
+
+    RATE_LIMIT_CODES = (429,)
+    AUTH_ERROR_CODES = (401, 403)
+
+    def __init__(
+        self,
+        api_keys: List[str],
+        rpm: int,
+        tpm: int,
+        cooldown_seconds: float = 30.0,
+        max_cooldown_seconds: float = 600.0,
+    ):
+        self._keys = [KeyState(api_key, rpm, tpm) for api_key in api_keys]
+        self.cooldown_seconds = cooldown_seconds
+        self.max_cooldown_seconds = max_cooldown_seconds
+        self._cond = threading.Condition()
+        self._acquisitions = 0
+
+    def __len__(self):
+        return len(self._keys)
+
+    def acquire(self, estimated_tokens: int = 0, timeout: float = None) -> KeyLease:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                best, best_wait = None, math.inf
+                for state in self._keys:
+                    tokens = min(estimated_tokens, state.tpm)
+                    wait = state.wait_time(now, tokens)
+                    # Ưu tiên key sẵn sàng sớm nhất, rồi tới key ít request đang chạy nhất,
+                    # rồi tới key lâu chưa được cấp nhất (xoay vòng khi gọi tuần tự)
+                    if wait < best_wait or (
+                        best is not None
+                        and wait == best_wait
+                        and (state.in_flight, state.last_acquired)
+                        < (best.in_flight, best.last_acquired)
+                    ):
+                        best, best_wait = state, wait
+
+                if best is None or best_wait == math.inf:
+                    raise RuntimeError("No healthy Gemini API key available")
+
+                if best_wait <= 0:
+                    tokens = min(estimated_tokens, best.tpm)
+                    best.request_budget -= 1
+                    best.token_budget -= tokens
+                    best.in_flight += 1
+                    best.requests += 1
+                    self._acquisitions += 1
+                    best.last_acquired = self._acquisitions
+                    return KeyLease(best.api_key, tokens)
+
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise TimeoutError("Timed out waiting for a Gemini API key")
+                    best_wait = min(best_wait, remaining)
+                self._cond.wait(timeout=best_wait)
+
+    def release(self, lease: KeyLease, status_code: int = None, used_tokens: int = None):
+        """
+        Trả key về scheduler.
+        status_code: mã lỗi HTTP nếu request lỗi (None nếu thành công hoặc lỗi không do key).
+        used_tokens: số token thực tế để hiệu chỉnh ngân sách TPM.
+        """
+        with self._cond:
+            state = next(s for s in self._keys if s.api_key == lease.api_key)
+            state.in_flight -= 1
+            if used_tokens is not None:
+                state.token_budget += lease.estimated_tokens - used_tokens
+
+            if status_code in self.AUTH_ERROR_CODES:
+                state.disabled = True
+                state.failures += 1
+                logger.error(f"Gemini key ...{lease.api_key[-4:]} disabled after auth error {status_code}")
+            elif status_code in self.RATE_LIMIT_CODES or (
+                status_code is not None and status_code >= 500
+            ):
+                state.failures += 1
+                state.consecutive_failures += 1
+                cooldown = min(
+                    self.cooldown_seconds * 2 ** (state.consecutive_failures - 1),
+                    self.max_cooldown_seconds,
+                )
+                # 5xx thường là lỗi tạm thời phía server: nghỉ ngắn hơn 429
+                if status_code not in self.RATE_LIMIT_CODES:
+                    cooldown /= 4
+                state.cooldown_until = time.monotonic() + cooldown
+                logger.warning(
+                    f"Gemini key ...{lease.api_key[-4:]} cooling down {cooldown:.0f}s after {status_code}"
+                )
+            else:
+                state.consecutive_failures = 0
+            self._cond.notify_all()
+
+    def healthy_keys(self) -> int:
+        with self._cond:
+            return sum(1 for state in self._keys if not state.disabled)
+
+    def stats(self) -> List[dict]:
+        with self._cond:
+            return [state.stats() for state in self._keys]
@@ -0,0 +1,313 @@
+import re
+from datetime import date
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from app.logger import logger
+from app.utils.date_util import DateUtils
+from app.utils.markdown_tables import Bullet, Heading, Table, is_empty_value, iter_blocks
+from app.utils.number_utils import parse_vn_number
+
+
+class Record:
+    """Bản ghi gọn nhẹ (__slots__) cho một dòng dữ liệu trích xuất từ markdown"""
+
+    __slots__ = ()
+    # Toàn bộ field, kể cả field kế thừa từ lớp cha
+    fields: tuple = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.fields = cls.fields + tuple(cls.__dict__.get("__slots__", ()))
+
+    def __init__(self, **values):
+        for name in self.fields:
+            setattr(self, name, values.get(name))
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.fields}
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.as_dict() == other.as_dict()
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.fields)
+        return f"{type(self).__name__}({fields})"
+
+
+class CompanyProfileRecord(Record):
+    __slots__ = (
+        "symbol",
+        "company_name",
+        "short_name",
+        "industry",
+        "sector",
+        "country",
+        "website",
+        "description",
+        "strengths",
+        "weaknesses",
+        "opportunities",
+        "threats",
+    )
+
+
+class OfficerRecord(Record):
+    __slots__ = ("symbol", "name", "position")
+
+
+class ShareholderRecord(Record):
+    __slots__ = ("symbol", "name", "ownership_percent", "shares_owned")
+
+
+class QuarterlyMetricRecord(Record):
+    __slots__ = ("symbol", "year", "quarter", "item", "value")
+
+
+class IncomeStatementRecord(QuarterlyMetricRecord):
+    __slots__ = ()
+
+
+class BalanceSheetRecord(QuarterlyMetricRecord):
+    __slots__ = ()
+
+
+class RatioRecord(QuarterlyMetricRecord):
+    __slots__ = ()
+
+
+class InsiderTransactionRecord(Record):
+    __slots__ = (
+        "symbol",
+        "transaction_date",
+        "insider_name",
+        "position",
+        "transaction_type",
+        "shares",
+        "price",
+        "value",
+    )
+
+
+class ForeignTransactionRecord(Record):
+    __slots__ = ("symbol", "transaction_date", "net_buy_sell", "buy_volume", "sell_volume")
+
+
+class MacroAssetRecord(Record):
+    __slots__ = ("as_of", "asset_type", "price", "change_percent")
+
+
+class MacroIndicatorRecord(Record):
+    __slots__ = ("indicator", "period", "current_value", "previous_value")
+
+
+_PROFILE_FIELDS = {
+    "tên đầy đủ": "company_name",
+    "ngành": "industry",
+    "lĩnh vực": "sector",
+    "quốc gia": "country",
+    "website": "website",
+    "mô tả": "description",
+    "strengths": "strengths",
+    "weaknesses": "weaknesses",
+    "opportunities": "opportunities",
+    "threats": "threats",
+}
+_FULL_NAME = re.compile(r"^(.*?)\s*\(([^()]*)\)\s*$")
+_SYMBOL_HEADING = re.compile(r"mã chứng khoán:\s*([A-Za-z0-9]+)", re.IGNORECASE)
+
+
+def _text(value: str) -> Optional[str]:
+    return None if is_empty_value(value) else value.strip()
+
+
+def _number(value: str) -> Optional[float]:
+    # Template yêu cầu LLM ghi số dạng float ("1234.5", "0.25"): dấu chấm luôn là thập phân,
+    # không để "1.234" bị hiểu nhầm là 1234
+    return None if is_empty_value(value) else parse_vn_number(value, decimal=".")
+
+
+def _date(value: str) -> Optional[date]:
+    if is_empty_value(value):
+        return None
+    try:
+        return DateUtils.parse_date(value.strip())
+    except ValueError:
+        return None
+
+
+def _cell(row: List[str], index: int) -> str:
+    return row[index] if index < len(row) else ""
+
+
+class MarkdownRecordParser:
+    """
+    Đọc markdown do company_profile.j2 / macro_data.j2 sinh ra trong một lượt (streaming
+    theo block) và trả về các record có kiểu cho từng bảng.
+    Cột được đọc theo vị trí trong template; dòng còn placeholder hoặc trống bị bỏ qua.
+    """
+
+    def __init__(self, symbol: str = None, as_of: date = None):
+        self.symbol = symbol.upper() if symbol else None
+        self.as_of = as_of or date.today()
+        # (tiền tố tiêu đề heading viết thường, hàm đọc bảng)
+        self._table_handlers: List[tuple] = [
+            ("ban điều hành chủ chốt", self._officers),
+            ("cơ cấu cổ đông", self._shareholders),
+            ("kết quả kinh doanh", self._metrics(IncomeStatementRecord)),
+            ("tài nguyên - nguồn vốn", self._metrics(BalanceSheetRecord)),
+            ("chỉ số tài chính", self._metrics(RatioRecord)),
+            ("giao dịch nội bộ", self._insider_transactions),
+            ("giao dịch khối ngoại", self._foreign_transactions),
+            ("dữ liệu vĩ mô", self._macro_assets),
+            ("dữ liệu kinh tế vĩ mô", self._macro_indicators),
+        ]
+
+    def parse(self, text: str) -> List[Record]:
+        return list(self.iter_records(text.splitlines()))
+
+    def iter_records(self, lines: Iterable[str]) -> Iterator[Record]:
+        profile = {}
+        heading = ""
+        for block in iter_blocks(lines):
+            if isinstance(block, Heading):
+                heading = block.title.lower()
+                if block.level == 1 and not self.symbol:
+                    match = _SYMBOL_HEADING.search(block.title)
+                    if match:
+                        self.symbol = match.group(1).upper()
+            elif isinstance(block, Table):
+                handler = self._table_handler(heading)
+                if handler is not None:
+                    yield from handler(block)
+            elif isinstance(block, Bullet) and block.key:
+                self._profile_field(profile, block)
+
+        if profile and self.symbol:
+            yield CompanyProfileRecord(symbol=self.symbol, **profile)
+
+    def _table_handler(self, heading: str) -> Optional[Callable[[Table], Iterator[Record]]]:
+        for prefix, handler in self._table_handlers:
+            if heading.startswith(prefix):
+                return handler
+        return None
+
+    def _profile_field(self, profile: dict, bullet: Bullet):
+        key = bullet.key.lower()
+        field = next((f for k, f in _PROFILE_FIELDS.items() if key.startswith(k)), None)
+        value = _text(bullet.value)
+        if field is None or value is None:
+            return
+        if field == "company_name":
+            # "Tên công ty (Tên viết tắt)"
+            match = _FULL_NAME.match(value)
+            if match:
+                value, profile["short_name"] = match.group(1), _text(match.group(2))
+        profile.setdefault(field, value)
+
+    def _rows(self, table: Table) -> Iterator[List[str]]:
+        for row in table.rows:
+            if row and not all(is_empty_value(cell) for cell in row):
+                yield row
+
+    def _officers(self, table: Table) -> Iterator[Record]:
+        for row in self._rows(table):
+            name = _text(_cell(row, 0))
+            if name:
+                yield OfficerRecord(
+                    symbol=self.symbol, name=name, position=_text(_cell(row, 1))
+                )
+
+    def _shareholders(self, table: Table) -> Iterator[Record]:
+        for row in self._rows(table):
+            name = _text(_cell(row, 0))
+            if name:
+                yield ShareholderRecord(
+                    symbol=self.symbol,
+                    name=name,
+                    ownership_percent=_number(_cell(row, 1)),
+                    shares_owned=_number(_cell(row, 2)),
+                )
+
+    def _metrics(self, record_type: type) -> Callable[[Table], Iterator[Record]]:
+        def handler(table: Table) -> Iterator[Record]:
+            # Bảng rộng: mỗi cột là một quý ("Quý 3 2025"), mỗi dòng là một chỉ tiêu
+            periods = [DateUtils.split_quarter(column) for column in table.header]
+            for row in self._rows(table):
+                item = _text(_cell(row, 0))
+                if not item:
+                    continue
+                for index, period in enumerate(periods[1:], start=1):
+                    value = _number(_cell(row, index))
+                    if period is None or value is None:
+                        continue
+                    yield record_type(
+                        symbol=self.symbol,
+                        year=period[0],
+                        quarter=period[1],
+                        item=item,
+                        value=value,
+                    )
+
+        return handler
+
+    def _insider_transactions(self, table: Table) -> Iterator[Record]:
+        for row in self._rows(table):
+            transaction_date = _date(_cell(row, 0))
+            insider_name = _text(_cell(row, 1))
+            if not transaction_date or not insider_name:
+                continue
+            yield InsiderTransactionRecord(
+                symbol=self.symbol,
+                transaction_date=transaction_date,
+                insider_name=insider_name,
+                position=_text(_cell(row, 2)),
+                transaction_type=_text(_cell(row, 3)) or "",
+                shares=_number(_cell(row, 4)),
+                price=_number(_cell(row, 5)),
+                value=_number(_cell(row, 6)),
+            )
+
+    def _foreign_transactions(self, table: Table) -> Iterator[Record]:
+        for row in self._rows(table):
+            transaction_date = _date(_cell(row, 0))
+            if not transaction_date:
+                continue
+            yield ForeignTransactionRecord(
+                symbol=self.symbol,
+                transaction_date=transaction_date,
+                net_buy_sell=_number(_cell(row, 1)),
+                buy_volume=_number(_cell(row, 2)),
+                sell_volume=_number(_cell(row, 3)),
+            )
+
+    def _macro_assets(self, table: Table) -> Iterator[Record]:
+        for row in self._rows(table):
+            asset_type = _text(_cell(row, 0))
+            if asset_type:
+                yield MacroAssetRecord(
+                    as_of=self.as_of,
+                    asset_type=asset_type,
+                    price=_number(_cell(row, 1)),
+                    change_percent=_number(_cell(row, 2)),
+                )
+
+    def _macro_indicators(self, table: Table) -> Iterator[Record]:
+        for row in self._rows(table):
+            indicator = _text(_cell(row, 0))
+            period = _text(_cell(row, 1))
+            if indicator and period:
+                yield MacroIndicatorRecord(
+                    indicator=indicator,
+                    period=period,
+                    current_value=_number(_cell(row, 2)),
+                    previous_value=_number(_cell(row, 3)),
+                )
+
+
+def parse_records(text: str, symbol: str = None, as_of: date = None) -> Dict[type, List[Record]]:
+    """Parse markdown và gom record theo loại"""
+    grouped: Dict[type, List[Record]] = {}
+    for record in MarkdownRecordParser(symbol, as_of).iter_records(text.splitlines()):
+        grouped.setdefault(type(record), []).append(record)
+    logger.debug(f"Parsed records: { {t.__name__: len(r) for t, r in grouped.items()} }")
+    return grouped
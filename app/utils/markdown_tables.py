@@ -0,0 +1,224 @@
+import re
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+
+class Heading(NamedTuple):
+    level: int
+    title: str
+
+
+class Table(NamedTuple):
+    header: List[str]
+    rows: List[List[str]]
+
+
+class Bullet(NamedTuple):
+    key: Optional[str]
+    value: str
+
+
+class Paragraph(NamedTuple):
+    text: str
+
+
+Block = Union[Heading, Table, Bullet, Paragraph]
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_SEPARATOR_CELL = re.compile(r"^:?-+:?$")
+_BULLET = re.compile(r"^\s*[-*+]\s+(?:\*\*(.+?)\*\*\s*:?\s*)?(.*)$")
+_PLACEHOLDER = re.compile(r"^\[.*\]$")
+_EMPTY_VALUES = {"", "-", "--", "n/a", "null", "none"}
+
+
+def split_row(line: str) -> List[str]:
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|"):
+        line = line[:-1]
+    return [cell.strip() for cell in line.split("|")]
+
+
+def is_empty_value(value: str) -> bool:
+    """Ô/giá trị trống hoặc còn là placeholder của template (vd: [name])"""
+    value = (value or "").strip()
+    return value.lower() in _EMPTY_VALUES or bool(_PLACEHOLDER.match(value))
+
+
+def iter_blocks(lines: Iterable[str]) -> Iterator[Block]:
+    """
+    Đọc markdown theo từng dòng và trả về các block (heading, bảng, bullet, đoạn văn)
+    ngay khi block đó kết thúc, không cần đọc hết văn bản.
+    """
+    header = None
+    rows = []
+
+    def flush_table():
+        nonlocal header, rows
+        table = Table(header, rows) if header is not None else None
+        header, rows = None, []
+        return table
+
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith("|"):
+            cells = split_row(stripped)
+            if header is None:
+                header = cells
+            elif not all(_SEPARATOR_CELL.match(cell) for cell in cells if cell):
+                rows.append(cells)
+            continue
+
+        table = flush_table()
+        if table is not None:
+            yield table
+
+        if not stripped or stripped.startswith("```"):
+            continue
+
+        match = _HEADING.match(stripped)
+        if match:
+            yield Heading(len(match.group(1)), match.group(2))
+            continue
+
+        match = _BULLET.match(stripped)
+        if match:
+            key = match.group(1)
+            yield Bullet(key.strip().rstrip(":").strip() if key else None, match.group(2).strip())
+            continue
+
+        yield Paragraph(stripped)
+
+    table = flush_table()
+    if table is not None:
+        yield table
+
+
+# {(level, title): [block, ...]}
+Document = Dict[Tuple[int, str], List[Block]]
+
+
+def parse_markdown(text: str) -> Document:
+    """Gom block theo heading: {(level, title): [block, ...]}; block trước heading đầu tiên có key (0, '')"""
+    document = OrderedDict()
+    current = document.setdefault((0, ""), [])
+    for block in iter_blocks(text.splitlines()):
+        if isinstance(block, Heading):
+            current = document.setdefault((block.level, block.title), [])
+        else:
+            current.append(block)
+    return document
+
+
+def _row_key(header: List[str], row: List[str]):
+    # Bảng giao dịch (cột đầu là ngày) có thể có nhiều dòng cùng ngày: so khớp cả dòng
+    if header and "ngày" in header[0].lower():
+        return tuple(cell.lower() for cell in row)
+    return row[0].lower() if row else ""
+
+
+def _merge_table(target: Table, table: Table) -> None:
+    # Ánh xạ cột theo tên header, cột lạ được nối thêm vào cuối
+    columns = []
+    for name in table.header:
+        if name not in target.header:
+            target.header.append(name)
+            for row in target.rows:
+                row.append("")
+        columns.append(target.header.index(name))
+
+    index = {_row_key(target.header, row): row for row in target.rows}
+    for cells in table.rows:
+        row = [""] * len(target.header)
+        for position, cell in zip(columns, cells):
+            row[position] = cell
+        if all(is_empty_value(cell) for cell in row):
+            continue
+
+        key = _row_key(target.header, row)
+        existing = index.get(key)
+        if existing is None:
+            target.rows.append(row)
+            index[key] = row
+            continue
+        # Cùng dòng ở nhiều chunk: chỉ điền vào những ô còn trống
+        for position, cell in enumerate(row):
+            if is_empty_value(existing[position]) and not is_empty_value(cell):
+                existing[position] = cell
+
+
+def _merge_block(blocks: List[Block], block: Block) -> None:
+    if isinstance(block, Table):
+        target = next((b for b in blocks if isinstance(b, Table)), None)
+        if target is None:
+            target = Table(list(block.header), [])
+            blocks.append(target)
+        _merge_table(target, block)
+    elif isinstance(block, Bullet) and block.key:
+        for i, existing in enumerate(blocks):
+            if isinstance(existing, Bullet) and existing.key == block.key:
+                if is_empty_value(existing.value) and not is_empty_value(block.value):
+                    blocks[i] = block
+                return
+        blocks.append(block)
+    elif block not in blocks:
+        blocks.append(block)
+
+
+def merge_documents(
+    documents: List[Document], preferred: List[Iterable[str]] = None
+) -> Document:
+    """
+    Gộp kết quả trích xuất từng phần theo thứ tự cố định:
+    heading theo thứ tự xuất hiện đầu tiên, dòng bảng gộp theo khóa (cột đầu),
+    bullet có nhãn lấy giá trị không rỗng đầu tiên.
+    preferred[i]: tiền tố (viết thường) của các heading mà document i chứa dữ liệu nguồn;
+    với các heading đó, giá trị của document i được lấy trước các document khác.
+    """
+    prefixes = [tuple(p) for p in preferred] if preferred else [()] * len(documents)
+    merged = OrderedDict()
+    for document in documents:
+        for heading in document:
+            merged.setdefault(heading, [])
+
+    for heading, target in merged.items():
+        title = heading[1].lower()
+        # sorted ổn định: document ưu tiên trước, còn lại giữ thứ tự ban đầu
+        order = sorted(
+            range(len(documents)),
+            key=lambda i: not (prefixes[i] and title.startswith(prefixes[i])),
+        )
+        for i in order:
+            for block in documents[i].get(heading, []):
+                _merge_block(target, block)
+    return merged
+
+
+def render_markdown(document: Document) -> str:
+    lines = []
+
+    def blank_line():
+        if lines and lines[-1] != "":
+            lines.append("")
+
+    for (level, title), blocks in document.items():
+        if level:
+            blank_line()
+            lines.extend([f"{'#' * level} {title}", ""])
+        for block in blocks:
+            if isinstance(block, Bullet):
+                lines.append(
+                    f"- **{block.key}:** {block.value}" if block.key else f"- {block.value}"
+                )
+                continue
+
+            blank_line()
+            if isinstance(block, Table):
+                lines.append("| " + " | ".join(block.header) + " |")
+                lines.append("| " + " | ".join(":---" for _ in block.header) + " |")
+                lines.extend("| " + " | ".join(row) + " |" for row in block.rows)
+            else:
+                lines.append(block.text)
+            lines.append("")
+    return "\n".join(lines).strip()
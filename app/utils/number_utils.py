@@ -0,0 +1,142 @@
+import re
+import unicodedata
+from typing import Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+# Hệ số nhân theo đơn vị, cụm dài phải đứng trước cụm ngắn (nghìn tỷ trước tỷ)
+UNIT_MULTIPLIERS = {
+    "nghìn tỷ": 1e12,
+    "ngàn tỷ": 1e12,
+    "tỷ": 1e9,
+    "tỉ": 1e9,
+    "triệu": 1e6,
+    "nghìn": 1e3,
+    "ngàn": 1e3,
+}
+
+_UNIT_PATTERN = "|".join(re.escape(unit) for unit in UNIT_MULTIPLIERS)
+# [dấu -] số [đơn vị] ... ; đơn vị tiền tệ phía sau (đồng, vnđ) được bỏ qua
+_NUMBER_PATTERN = (
+    rf"(?P<minus>[-−])?\s*(?P<number>\d[\d.,]*)\s*(?P<unit>{_UNIT_PATTERN})?"
+)
+_NUMBER = re.compile(_NUMBER_PATTERN)
+_PARENTHESES = re.compile(r"^\(.*\)\s*%?$")
+# Nhóm đầu không bắt đầu bằng 0: '0,125' / '0.125' là số thập phân, không phải 125
+_THOUSANDS_DOT = re.compile(r"^[1-9]\d{0,2}(\.\d{3})+$")
+_THOUSANDS_COMMA = re.compile(r"^[1-9]\d{0,2}(,\d{3})+$")
+
+
+def _normalize_number(number: str, decimal: Optional[str] = None) -> str:
+    """
+    Đưa chuỗi số về dạng '1234.5'.
+    decimal: ký tự thập phân nếu đã biết ('.' hoặc ','); None thì tự suy ra:
+    - có cả '.' và ',': ký tự xuất hiện sau cùng là dấu thập phân;
+    - chỉ có một loại: là dấu phân cách hàng nghìn nếu xuất hiện nhiều lần
+      hoặc đúng nhóm 3 chữ số (1.234 / 1,234), ngược lại là dấu thập phân.
+    """
+    if decimal is None:
+        if "." in number and "," in number:
+            decimal = "," if number.rfind(",") > number.rfind(".") else "."
+        elif "." in number:
+            decimal = "" if _THOUSANDS_DOT.match(number) else "."
+        elif "," in number:
+            decimal = "" if _THOUSANDS_COMMA.match(number) else ","
+        else:
+            return number
+
+    if decimal == ",":
+        return number.replace(".", "").replace(",", ".")
+    if decimal == ".":
+        return number.replace(",", "")
+    return number.replace(".", "").replace(",", "")
+
+
+def parse_vn_number(
+    value: Union[str, float, int, None], decimal: Optional[str] = None
+) -> Optional[float]:
+    """
+    Chuyển chuỗi số kiểu Việt Nam thành float, vd:
+    '1.234,5 tỷ đồng' -> 1.2345e12, '(12,3)%' -> -12.3, '2 nghìn tỷ' -> 2e12.
+    Giá trị phần trăm giữ nguyên đơn vị % (12,3% -> 12.3). Không đọc được trả về None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return None if isinstance(value, float) and np.isnan(value) else float(value)
+
+    # Text crawl có thể ở dạng Unicode tổ hợp (NFD), chuẩn hóa để khớp đơn vị
+    text = unicodedata.normalize("NFC", str(value)).strip().lower()
+    match = _NUMBER.search(text)
+    if not match:
+        return None
+
+    try:
+        number = float(_normalize_number(match.group("number").rstrip(".,"), decimal))
+    except ValueError:
+        return None
+
+    unit = match.group("unit")
+    if unit:
+        number *= UNIT_MULTIPLIERS[unit]
+    if match.group("minus") or _PARENTHESES.match(text):
+        number = -number
+    return number
+
+
+def parse_vn_numbers(
+    values: Union[pd.Series, Iterable], decimal: Optional[str] = None
+) -> pd.Series:
+    """
+    Bản vector hóa của parse_vn_number cho cả cột (Series/list/array).
+    Kết quả là Series float64, giá trị không đọc được là NaN.
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(list(values))
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype("float64")
+
+    # Ô rỗng/None thành chuỗi không có chữ số -> NaN, các phép str phía sau không gặp NA
+    text = series.fillna("").astype(str).str.normalize("NFC").str.strip().str.lower()
+    parts = text.str.extract(_NUMBER_PATTERN)
+    number = parts["number"].fillna("").str.rstrip(".,")
+
+    if decimal is None:
+        last_dot = number.str.rfind(".")
+        last_comma = number.str.rfind(",")
+        has_dot = last_dot >= 0
+        has_comma = last_comma >= 0
+        comma_decimal = (has_dot & has_comma & (last_comma > last_dot)) | (
+            ~has_dot & has_comma & ~number.str.fullmatch(_THOUSANDS_COMMA.pattern)
+        )
+        dot_decimal = (has_dot & has_comma & (last_dot > last_comma)) | (
+            has_dot & ~has_comma & ~number.str.fullmatch(_THOUSANDS_DOT.pattern)
+        )
+    else:
+        comma_decimal = pd.Series(decimal == ",", index=number.index)
+        dot_decimal = pd.Series(decimal == ".", index=number.index)
+
+    without_dots = number.str.replace(".", "", regex=False)
+    without_commas = number.str.replace(",", "", regex=False)
+    normalized = without_commas.where(
+        dot_decimal,
+        without_dots.str.replace(",", ".", regex=False).where(
+            comma_decimal, without_dots.str.replace(",", "", regex=False)
+        ),
+    )
+
+    result = pd.to_numeric(normalized, errors="coerce").astype("float64")
+    multiplier = parts["unit"].map(UNIT_MULTIPLIERS).fillna(1.0).astype("float64")
+    negative = parts["minus"].notna() | text.str.match(_PARENTHESES.pattern)
+    sign = np.where(negative, -1.0, 1.0)
+    return result * multiplier * sign
+
+
+def parse_vn_number_frame(
+    frame: pd.DataFrame, columns: List[str] = None, decimal: Optional[str] = None
+) -> pd.DataFrame:
+    """Chuyển các cột số của bảng crawl (mặc định mọi cột trừ cột đầu tiên là nhãn)"""
+    frame = frame.copy()
+    for column in columns if columns is not None else frame.columns[1:]:
+        frame[column] = parse_vn_numbers(frame[column], decimal=decimal)
+    return frame
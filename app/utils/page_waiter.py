@@ -0,0 +1,214 @@
+import asyncio
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from playwright.async_api import Locator, Page
+
+from app.logger import logger
+
+
+@dataclass(frozen=True)
+class WaitPolicy:
+    """
+    Định nghĩa thế nào là "đã load xong" sau khi click một tab.
+    Tín hiệu nào đến trước thì dừng chờ; nếu không có tín hiệu nào thì dừng sau `timeout` (ms).
+    """
+
+    # Regex URL của XHR/fetch phía sau tab
+    response_pattern: Optional[str] = None
+    # Selector xuất hiện khi nội dung tab đã render
+    selector: Optional[str] = None
+    # Vùng DOM cần theo dõi thay đổi (MutationObserver)
+    mutation_selector: Optional[str] = None
+    # Khoảng lặng (ms) sau lần thay đổi DOM cuối cùng
+    settle_ms: int = 150
+    timeout: int = 5000
+
+
+# Cấu hình chờ theo từng site và từng loại thao tác
+SITE_WAIT_POLICIES = {
+    "cafef": {
+        "tab": WaitPolicy(
+            response_pattern=r"/[Aa]jax/",
+            mutation_selector="div.content, #content, div.pagewrap, #pagewrap",
+        ),
+        "macro_tab": WaitPolicy(
+            response_pattern=r"/[Aa]jax/",
+            mutation_selector="table#dataBusiness",
+        ),
+    },
+}
+
+DEFAULT_WAIT_POLICY = WaitPolicy(mutation_selector="body")
+
+_ARM_MUTATION_JS = """
+(selector) => {
+    const target = document.querySelector(selector) || document.body;
+    if (window.__crawlerObserver) window.__crawlerObserver.disconnect();
+    window.__crawlerLastMutation = 0;
+    window.__crawlerObserver = new MutationObserver(() => {
+        window.__crawlerLastMutation = performance.now();
+    });
+    window.__crawlerObserver.observe(target, {childList: true, subtree: true, characterData: true});
+}
+"""
+
+_MUTATION_SETTLED_JS = """
+(settleMs) => window.__crawlerLastMutation > 0
+    && performance.now() - window.__crawlerLastMutation >= settleMs
+"""
+
+# Sau khi XHR xong: DOM đổi sau mốc response (thay đổi ngay lúc click như đổi class/spinner
+# không tính) rồi lặng ít nhất settleMs
+_MARK_RESPONSE_JS = "() => { window.__crawlerResponseAt = performance.now(); }"
+_SETTLED_AFTER_RESPONSE_JS = """
+(settleMs) => window.__crawlerResponseAt !== undefined
+    && window.__crawlerLastMutation > window.__crawlerResponseAt
+    && performance.now() - window.__crawlerLastMutation >= settleMs
+"""
+
+
+def get_wait_policy(site: str, action: str) -> WaitPolicy:
+    return SITE_WAIT_POLICIES.get(site, {}).get(action, DEFAULT_WAIT_POLICY)
+
+
+async def _signal(name: str, awaitable) -> Optional[str]:
+    try:
+        await awaitable
+        return name
+    except Exception:
+        # Timeout hoặc context bị hủy do điều hướng: coi như tín hiệu này không đến
+        return None
+
+
+async def _first_signal(tasks) -> Optional[str]:
+    """Tên tín hiệu đầu tiên thành công, None nếu mọi tín hiệu đều hết hạn"""
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.result():
+                    return task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+    return None
+
+
+def _remaining_ms(deadline: float) -> int:
+    # timeout=0 trong Playwright nghĩa là chờ vô hạn, nên tối thiểu 1ms
+    return max(1, int((deadline - asyncio.get_running_loop().time()) * 1000))
+
+
+async def _confirm_render(page: Page, policy: WaitPolicy, deadline: float) -> str:
+    """
+    requestfinished chỉ báo XHR đã xong, JS của trang có thể chưa render response.
+    Chờ thêm selector hoặc DOM lặng sau response (trong phần timeout còn lại).
+    """
+    tasks = []
+    if policy.selector:
+        tasks.append(
+            asyncio.ensure_future(
+                _signal(
+                    "response+selector",
+                    page.wait_for_selector(policy.selector, timeout=_remaining_ms(deadline)),
+                )
+            )
+        )
+    if policy.mutation_selector:
+        await page.evaluate(_MARK_RESPONSE_JS)
+        tasks.append(
+            asyncio.ensure_future(
+                _signal(
+                    "response+mutation",
+                    page.wait_for_function(
+                        _SETTLED_AFTER_RESPONSE_JS,
+                        arg=policy.settle_ms,
+                        polling=50,
+                        timeout=_remaining_ms(deadline),
+                    ),
+                )
+            )
+        )
+    if not tasks:
+        return "response"
+
+    signal = await _first_signal(tasks)
+    if signal:
+        return signal
+    logger.debug(f"XHR finished but no render signal within {policy.timeout}ms")
+    return "timeout"
+
+
+async def click_and_wait(page: Page, locator: Locator, policy: WaitPolicy) -> str:
+    """
+    Click vào `locator` rồi chờ tới khi nội dung thực sự xuất hiện theo `policy`.
+    Có response_pattern: chỉ chờ XHR rồi xác nhận render sau response (DOM đổi ngay lúc click
+    không được coi là đã load). Không có: tín hiệu selector/mutation nào đến trước thì dừng.
+    Trả về tên tín hiệu đã kích hoạt: 'selector', 'mutation', 'response+selector',
+    'response+mutation', 'response' (không có tín hiệu render nào được cấu hình) hoặc 'timeout'.
+    """
+    deadline = asyncio.get_running_loop().time() + policy.timeout / 1000
+    tasks = []
+    if policy.mutation_selector:
+        await page.evaluate(_ARM_MUTATION_JS, policy.mutation_selector)
+    if policy.response_pattern:
+        pattern = re.compile(policy.response_pattern)
+        # Đăng ký trước khi click để không bỏ lỡ response
+        tasks.append(
+            asyncio.ensure_future(
+                _signal(
+                    "response",
+                    page.wait_for_event(
+                        "requestfinished",
+                        predicate=lambda request: bool(pattern.search(request.url)),
+                        timeout=policy.timeout,
+                    ),
+                )
+            )
+        )
+
+    try:
+        await locator.click()
+    except Exception:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    if not policy.response_pattern:
+        if policy.selector:
+            tasks.append(
+                asyncio.ensure_future(
+                    _signal(
+                        "selector",
+                        page.wait_for_selector(policy.selector, timeout=policy.timeout),
+                    )
+                )
+            )
+        if policy.mutation_selector:
+            tasks.append(
+                asyncio.ensure_future(
+                    _signal(
+                        "mutation",
+                        page.wait_for_function(
+                            _MUTATION_SETTLED_JS,
+                            arg=policy.settle_ms,
+                            polling=50,
+                            timeout=policy.timeout,
+                        ),
+                    )
+                )
+            )
+
+    signal = await _first_signal(tasks)
+    if signal == "response":
+        return await _confirm_render(page, policy, deadline)
+    if signal:
+        return signal
+
+    logger.debug(f"No load signal after click, waited up to {policy.timeout}ms")
+    return "timeout"
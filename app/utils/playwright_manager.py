@@ -3,6 +3,17 @@ from playwright.sync_api import Page, sync_playwright
 from playwright_stealth import Stealth
 from tenacity import retry, stop_after_attempt, wait_random
 
+from app.config import config
+from app.utils.request_router import get_routing_policy, install_routing_sync
+
+BROWSER_ARGS = [
+    "--disable-webrtc",
+    "--disable-features=WebRTC-HW-Decoding,WebRTC-HW-Encoding",
+    "--force-webrtc-ip-handling-policy=disable_non_proxied_udp",
+    "--disable-features=IsolateOrigins,site-per-process",
+    "--no-sandbox",
+]
+
 
 class PlaywrightManager:
     _instance = None
@@ -15,25 +26,20 @@ class PlaywrightManager:
             cls._playwright = sync_playwright().start()
             cls._browser = cls._playwright.chromium.launch(
                 headless=True,
-                args=[
-                    "--disable-webrtc",
-                    "--disable-features=WebRTC-HW-Decoding,WebRTC-HW-Encoding",
-                    "--force-webrtc-ip-handling-policy=disable_non_proxied_udp",
-                    "--disable-features=IsolateOrigins,site-per-process",
-                    "--no-sandbox",
-                ],
-                slow_mo=1000,
+                args=BROWSER_ARGS,
+                slow_mo=config.BROWSER_SLOW_MO,
             )
         return cls._browser
 
     @classmethod
-    def get_page(cls) -> Page:
+    def get_page(cls, site: str = None) -> Page:
         browser = cls.get_browser()
         context = browser.new_context(no_viewport=True)
         context.set_default_timeout(15000)
         page = context.new_page()
         stealth = Stealth()
         stealth.apply_stealth_sync(page)
+        install_routing_sync(page, get_routing_policy(site))
 
         return page
 
@@ -0,0 +1,118 @@
+import hashlib
+from typing import Dict, List, NamedTuple, Optional
+
+from app.config import config
+from app.utils.caching_util import CachingUtil
+from app.utils.string_utils import estimate_tokens
+
+
+class ProfileSection(NamedTuple):
+    label: str
+    content: str
+    fingerprint: str
+
+
+class SectionChanges(NamedTuple):
+    changed: List[str]
+    unchanged: List[str]
+    removed: List[str]
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.changed or self.removed)
+
+
+def make_section(label: str, content: str) -> ProfileSection:
+    # Fingerprint bỏ qua khác biệt khoảng trắng giữa các lần crawl
+    normalized = " ".join(content.split())
+    fingerprint = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+    return ProfileSection(label, content, fingerprint)
+
+
+def join_sections(sections: List[ProfileSection]) -> str:
+    """Ghép các section thành profile text dạng '[nhãn]\\nnội dung' như crawler trả về"""
+    profile_data = []
+    for section in sections:
+        profile_data.append(section.label)
+        profile_data.append(section.content)
+    return "\n".join(profile_data)
+
+
+def section_tokens(section: ProfileSection) -> int:
+    return estimate_tokens(section.label) + estimate_tokens(section.content) + 1
+
+
+def _split_section(section: ProfileSection, token_budget: int) -> List[ProfileSection]:
+    # Section lớn hơn ngân sách được cắt theo dòng, các phần giữ nguyên nhãn
+    if section_tokens(section) <= token_budget:
+        return [section]
+
+    parts, lines, tokens = [], [], estimate_tokens(section.label)
+    for line in section.content.splitlines():
+        line_tokens = estimate_tokens(line) + 1
+        if lines and tokens + line_tokens > token_budget:
+            parts.append(make_section(section.label, "\n".join(lines)))
+            lines, tokens = [], estimate_tokens(section.label)
+        lines.append(line)
+        tokens += line_tokens
+    if lines:
+        parts.append(make_section(section.label, "\n".join(lines)))
+    return parts
+
+
+def chunk_sections(
+    sections: List[ProfileSection], token_budget: int
+) -> List[List[ProfileSection]]:
+    """Chia các section (theo đúng thứ tự) thành các nhóm vừa ngân sách token"""
+    chunks, current, current_tokens = [], [], 0
+    for section in sections:
+        for part in _split_section(section, token_budget):
+            tokens = section_tokens(part)
+            if current and current_tokens + tokens > token_budget:
+                chunks.append(current)
+                current, current_tokens = [], 0
+            current.append(part)
+            current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class SectionFingerprintStore:
+    """Lưu fingerprint từng section của lần crawl trước (kèm kết quả trích xuất) theo ticker"""
+
+    def __init__(self, cache: CachingUtil = None):
+        self.cache = cache or CachingUtil(
+            expiry_days=config.SECTION_FINGERPRINT_EXPIRY_DAYS
+        )
+
+    def _key(self, symbol: str) -> str:
+        return f"section_fingerprints_{symbol}"
+
+    def load(self, symbol: str) -> dict:
+        return self.cache.get(self._key(symbol), "json") or {}
+
+    def diff(self, symbol: str, sections: List[ProfileSection]) -> SectionChanges:
+        previous: Dict[str, str] = self.load(symbol).get("fingerprints", {})
+        changed, unchanged = [], []
+        for section in sections:
+            if previous.get(section.label) == section.fingerprint:
+                unchanged.append(section.label)
+            else:
+                changed.append(section.label)
+        current_labels = {section.label for section in sections}
+        removed = [label for label in previous if label not in current_labels]
+        return SectionChanges(changed, unchanged, removed)
+
+    def previous_result(self, symbol: str) -> Optional[str]:
+        return self.load(symbol).get("result")
+
+    def save(self, symbol: str, sections: List[ProfileSection], result: str = None):
+        self.cache.set(
+            self._key(symbol),
+            "json",
+            {
+                "fingerprints": {s.label: s.fingerprint for s in sections},
+                "result": result,
+            },
+        )
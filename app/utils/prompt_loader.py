@@ -1,11 +1,12 @@
 import os
 from enum import Enum
 
-from jinja2 import Template
+from jinja2 import Environment, FileSystemLoader, Template
 
 
 class PromptTemplate(Enum):
     COMPANY_PROFILE = "company_profile"
+    COMPANY_PROFILE_BATCH = "company_profile_batch"
     MACRO_DATA = "macro_data"
 
 
@@ -23,6 +24,8 @@ class PromptLoader:
             current_dir = os.path.dirname(os.path.abspath(__file__))
             template_dir = os.path.join(current_dir, "..", "prompts")
         self.template_dir = template_dir
+        # Dùng loader để các template có thể {% include %} phần quy tắc dùng chung
+        self.environment = Environment(loader=FileSystemLoader(template_dir))
 
     def load_template(self, template: PromptTemplate) -> Template:
         """
@@ -44,10 +47,7 @@ class PromptLoader:
                 f"Template file '{template_file}' not found in '{self.template_dir}'"
             )
 
-        with open(template_path, "r", encoding="utf-8") as file:
-            template_content = file.read()
-
-        return Template(template_content)
+        return self.environment.get_template(template_file)
 
     def apply_template(self, template: PromptTemplate, **kwargs) -> str:
         """
@@ -0,0 +1,184 @@
+import weakref
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+
+from app.config import config
+from app.logger import logger
+
+
+@dataclass(frozen=True)
+class RoutingPolicy:
+    """
+    Chặn request không cần thiết khi crawl (chỉ đọc text qua page.content()).
+    Thứ tự xét: domain trong blocklist -> loại resource bị chặn -> XHR/fetch ngoài allowlist.
+    """
+
+    # Loại resource của Playwright: image, media, font, stylesheet, script, xhr, fetch, ...
+    blocked_resource_types: frozenset = frozenset()
+    # Domain quảng cáo/tracking, khớp cả subdomain
+    blocked_domains: Tuple[str, ...] = ()
+    # Domain first-party được gọi XHR/fetch; để trống thì không giới hạn XHR
+    allowed_xhr_domains: Tuple[str, ...] = ()
+
+    def block_reason(self, resource_type: str, url: str) -> Optional[str]:
+        """Lý do chặn request, None nếu cho qua"""
+        host = urlsplit(url).hostname or ""
+        if _match_domain(host, self.blocked_domains):
+            return "domain"
+        if resource_type in self.blocked_resource_types:
+            return resource_type
+        if (
+            resource_type in ("xhr", "fetch")
+            and self.allowed_xhr_domains
+            and not _match_domain(host, self.allowed_xhr_domains)
+        ):
+            return "third_party_xhr"
+        return None
+
+
+@dataclass
+class RouteStats:
+    """Bộ đếm request/bytes của một page (bytes bị chặn không đo được vì request đã bị hủy)"""
+
+    allowed_requests: int = 0
+    allowed_bytes: int = 0
+    blocked_requests: int = 0
+    blocked_by_reason: Counter = field(default_factory=Counter)
+
+    def reset(self):
+        """Đặt lại bộ đếm khi page được dùng lại cho lượt crawl mới"""
+        self.allowed_requests = self.allowed_bytes = self.blocked_requests = 0
+        self.blocked_by_reason.clear()
+
+    def __str__(self):
+        reasons = ", ".join(f"{k}={v}" for k, v in self.blocked_by_reason.most_common())
+        return (
+            f"allowed {self.allowed_requests} requests / {self.allowed_bytes / 1024:.0f} KB, "
+            f"blocked {self.blocked_requests} ({reasons or 'none'})"
+        )
+
+
+def _match_domain(host: str, domains: Tuple[str, ...]) -> bool:
+    return any(host == domain or host.endswith(f".{domain}") for domain in domains)
+
+
+AD_TRACKER_DOMAINS = (
+    "doubleclick.net",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "googletagmanager.com",
+    "googletagservices.com",
+    "google-analytics.com",
+    "facebook.net",
+    "facebook.com",
+    "hotjar.com",
+    "clarity.ms",
+    "admicro.vn",
+    "amcdn.vn",
+    "eclick.vn",
+    "adtimaserver.vn",
+    "ants.vn",
+    "contineljs.com",
+    "dable.io",
+    "taboola.com",
+    "youtube.com",
+    "ytimg.com",
+)
+
+DEFAULT_ROUTING_POLICY = RoutingPolicy(
+    blocked_resource_types=frozenset(config.REQUEST_BLOCKED_RESOURCE_TYPES),
+    blocked_domains=AD_TRACKER_DOMAINS + tuple(config.REQUEST_BLOCKED_DOMAINS),
+)
+
+# Cấu hình chặn request theo từng site
+SITE_ROUTING_POLICIES = {
+    "cafef": RoutingPolicy(
+        blocked_resource_types=DEFAULT_ROUTING_POLICY.blocked_resource_types,
+        blocked_domains=DEFAULT_ROUTING_POLICY.blocked_domains,
+        allowed_xhr_domains=("cafef.vn", "mediacdn.vn"),
+    ),
+    "vietnambiz": RoutingPolicy(
+        blocked_resource_types=DEFAULT_ROUTING_POLICY.blocked_resource_types,
+        blocked_domains=DEFAULT_ROUTING_POLICY.blocked_domains,
+        allowed_xhr_domains=("vietnambiz.vn",),
+    ),
+}
+
+# Bộ đếm theo page, tự giải phóng khi page bị thu hồi
+_page_stats: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def get_routing_policy(site: str = None) -> Optional[RoutingPolicy]:
+    if not config.REQUEST_BLOCKING_ENABLED:
+        return None
+    return SITE_ROUTING_POLICIES.get(site, DEFAULT_ROUTING_POLICY)
+
+
+def get_route_stats(page) -> Optional[RouteStats]:
+    """Bộ đếm của page đã gắn routing (None nếu page không bật chặn request)"""
+    return _page_stats.get(page)
+
+
+def _response_bytes(sizes: dict) -> int:
+    return max(0, sizes.get("responseBodySize", 0)) + max(0, sizes.get("responseHeadersSize", 0))
+
+
+async def install_routing(page, policy: Optional[RoutingPolicy]) -> Optional[RouteStats]:
+    """Gắn routing policy vào context của page (async API), trả về bộ đếm của page"""
+    if policy is None:
+        return None
+    stats = RouteStats()
+
+    async def handle(route):
+        request = route.request
+        reason = policy.block_reason(request.resource_type, request.url)
+        if reason is None:
+            await route.continue_()
+            return
+        stats.blocked_requests += 1
+        stats.blocked_by_reason[reason] += 1
+        await route.abort("blockedbyclient")
+
+    async def on_finished(request):
+        stats.allowed_requests += 1
+        try:
+            stats.allowed_bytes += _response_bytes(await request.sizes())
+        except Exception as e:
+            # Context đã đóng trước khi đọc được kích thước
+            logger.debug(f"Cannot read request sizes for {request.url}: {e}")
+
+    await page.context.route("**/*", handle)
+    page.on("requestfinished", on_finished)
+    _page_stats[page] = stats
+    return stats
+
+
+def install_routing_sync(page, policy: Optional[RoutingPolicy]) -> Optional[RouteStats]:
+    """Như install_routing, cho sync API (PlaywrightManager)"""
+    if policy is None:
+        return None
+    stats = RouteStats()
+
+    def handle(route):
+        request = route.request
+        reason = policy.block_reason(request.resource_type, request.url)
+        if reason is None:
+            route.continue_()
+            return
+        stats.blocked_requests += 1
+        stats.blocked_by_reason[reason] += 1
+        route.abort("blockedbyclient")
+
+    def on_finished(request):
+        stats.allowed_requests += 1
+        try:
+            stats.allowed_bytes += _response_bytes(request.sizes())
+        except Exception as e:
+            logger.debug(f"Cannot read request sizes for {request.url}: {e}")
+
+    page.context.route("**/*", handle)
+    page.on("requestfinished", on_finished)
+    _page_stats[page] = stats
+    return stats
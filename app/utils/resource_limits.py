@@ -0,0 +1,30 @@
+import threading
+from contextlib import contextmanager
+from typing import Dict
+
+
+class ResourceLimits:
+    """
+    Giới hạn số tác vụ đồng thời trên từng loại tài nguyên (browser, llm, db).
+    Tài nguyên không khai báo hoặc giới hạn <= 0 thì không bị giới hạn.
+    """
+
+    def __init__(self, limits: Dict[str, int] = None):
+        self.limits = {name: limit for name, limit in (limits or {}).items() if limit and limit > 0}
+        self._semaphores = {
+            name: threading.BoundedSemaphore(limit) for name, limit in self.limits.items()
+        }
+
+    @contextmanager
+    def use(self, resource: str):
+        semaphore = self._semaphores.get(resource)
+        if semaphore is None:
+            yield
+            return
+        with semaphore:
+            yield
+
+    @property
+    def max_workers(self) -> int:
+        # Đủ worker để mọi tài nguyên đều có thể chạy hết công suất cùng lúc
+        return max(1, sum(self.limits.values()))
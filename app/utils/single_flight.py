@@ -0,0 +1,87 @@
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict
+
+from app.config import config
+from app.logger import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: chỉ khóa được trong process
+    fcntl = None
+
+
+class SingleFlight:
+    """
+    Đảm bảo mỗi key chỉ có một caller tính toán tại một thời điểm:
+    lock theo key trong process, cộng thêm file lock (flock) giữa các process.
+    flock tự nhả khi process chết nên không để lại lock treo.
+    """
+
+    def __init__(self, lock_dir: str = None):
+        self.lock_dir = lock_dir or os.path.join(config.CACHE_DIR, "locks")
+        os.makedirs(self.lock_dir, exist_ok=True)
+        # key -> [lock, số caller đang giữ/chờ]; entry bị xóa khi caller cuối cùng nhả
+        self._locks: Dict[str, list] = {}
+        self._guard = threading.Lock()
+
+    def _retain(self, key: str) -> threading.Lock:
+        with self._guard:
+            entry = self._locks.get(key)
+            if entry is None:
+                entry = self._locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+            return entry[0]
+
+    def _release(self, key: str):
+        with self._guard:
+            entry = self._locks[key]
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
+
+    def _lock_path(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.lock_dir, f"{digest}.lock")
+
+    @contextmanager
+    def lock(self, key: str, blocking: bool = True):
+        """
+        Context manager trả về True nếu đã giữ lock.
+        Với blocking=False, trả về False ngay khi key đang được caller khác xử lý.
+        """
+        thread_lock = self._retain(key)
+        try:
+            if not thread_lock.acquire(blocking=blocking):
+                yield False
+                return
+
+            lock_file = None
+            try:
+                if fcntl is not None:
+                    lock_file = open(self._lock_path(key), "a")
+                    flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+                    try:
+                        fcntl.flock(lock_file, flags)
+                    except BlockingIOError:
+                        lock_file.close()
+                        lock_file = None
+                        yield False
+                        return
+                yield True
+            finally:
+                if lock_file is not None:
+                    try:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+                    finally:
+                        lock_file.close()
+                thread_lock.release()
+        finally:
+            self._release(key)
+
+single_flight = SingleFlight()
+
+if fcntl is None:
+    logger.debug("fcntl is unavailable, cache single-flight only covers this process")
@@ -24,3 +24,10 @@ def clean_json_string(text: str) -> str:
     # Tìm cặp ngoặc ngoài cùng (bao quát cả Object và Array)
     match = re.search(r"(\{.*\}|\[.*\])", text, re.DOTALL)
     return match.group(0) if match else text
+
+
+def estimate_tokens(text: str) -> int:
+    """Ước lượng thô số token (~4 ký tự/token)"""
+    if not text:
+        return 0
+    return len(text) // 4
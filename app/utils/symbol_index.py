@@ -0,0 +1,130 @@
+import os
+import pickle
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from app.config import config
+from app.logger import logger
+
+
+class SymbolEntry(NamedTuple):
+    redirect_url: str
+    exchange: str
+    name: str
+
+
+class SymbolIndex:
+    """
+    Index symbol -> SymbolEntry nạp một lần và dùng chung cho mọi instance trong process.
+
+    Index được lưu dạng pickle trong thư mục cache để khởi động nhanh. Khi hết hạn,
+    index cũ vẫn được dùng trong lúc một thread nền nạp lại từ `loader`.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    # Chờ bao lâu (giây) trước khi thử refresh lại sau khi lỗi
+    RETRY_AFTER_SECONDS = 60
+
+    def __init__(
+        self,
+        name: str,
+        loader: Callable[[], Dict[str, SymbolEntry]],
+        expiry_days: int = None,
+        cache_dir: str = None,
+    ):
+        self.name = name
+        self.loader = loader
+        self.ttl_seconds = (expiry_days or config.CACHE_EXPIRY_DAYS) * 86400
+        cache_dir = cache_dir or config.CACHE_DIR
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, f"{name}.index.pkl")
+
+        self._entries: Optional[Dict[str, SymbolEntry]] = None
+        self._built_at = 0.0
+        self._next_refresh_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls, name: str, loader: Callable[[], Dict[str, SymbolEntry]]):
+        with cls._instances_lock:
+            if name not in cls._instances:
+                cls._instances[name] = cls(name, loader)
+            return cls._instances[name]
+
+    def get(self, symbol: str) -> Optional[SymbolEntry]:
+        entries = self._ensure_loaded()
+        if time.time() - self._built_at >= self.ttl_seconds:
+            self._refresh_in_background()
+        return entries.get(symbol)
+
+    def items(self) -> List[Tuple[str, SymbolEntry]]:
+        entries = self._ensure_loaded()
+        if time.time() - self._built_at >= self.ttl_seconds:
+            self._refresh_in_background()
+        return list(entries.items())
+
+    def __len__(self):
+        return len(self._ensure_loaded())
+
+    def _ensure_loaded(self) -> Dict[str, SymbolEntry]:
+        if self._entries is not None:
+            return self._entries
+
+        with self._lock:
+            if self._entries is None and not self._load_from_disk():
+                # Chưa có index trên đĩa: bắt buộc nạp đồng bộ
+                self._rebuild()
+        return self._entries
+
+    def _load_from_disk(self) -> bool:
+        try:
+            with open(self.path, "rb") as f:
+                built_at, raw = pickle.load(f)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Symbol index {self.path} is unreadable, rebuilding: {e}")
+            return False
+
+        self._entries = {symbol: SymbolEntry(*values) for symbol, values in raw.items()}
+        self._built_at = built_at
+        return True
+
+    def _rebuild(self):
+        entries = self.loader()
+        built_at = time.time()
+
+        # Lưu tuple thuần để file nhỏ và nạp nhanh; ghi file tạm rồi rename cho an toàn
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(
+                (built_at, {symbol: tuple(entry) for symbol, entry in entries.items()}),
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp_path, self.path)
+
+        self._entries = entries
+        self._built_at = built_at
+        logger.info(f"Symbol index {self.name} rebuilt with {len(entries)} symbols")
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing or time.time() < self._next_refresh_at:
+                return
+            self._refreshing = True
+
+        def refresh():
+            try:
+                self._rebuild()
+            except Exception as e:
+                logger.warning(f"Failed to refresh symbol index {self.name}: {e}")
+                self._next_refresh_at = time.time() + self.RETRY_AFTER_SECONDS
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=refresh, name=f"{self.name}-refresh", daemon=True).start()
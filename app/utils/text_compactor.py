@@ -0,0 +1,146 @@
+import re
+from collections import Counter
+from typing import List, NamedTuple, Tuple
+
+from app.config import config
+from app.utils.profile_sections import ProfileSection, make_section
+from app.utils.string_utils import estimate_tokens
+
+# Ký tự vô hình / khoảng trắng đặc biệt hay gặp khi crawl
+_INVISIBLE_CHARS = re.compile(r"[\u200b\u200c\u200d\ufeff]")
+_WHITESPACE = re.compile(r"\s+")
+# Số thập phân quá dài (vd: 12,3456789) -> giữ tối đa 4 chữ số sau dấu phân cách
+_LONG_DECIMAL = re.compile(r"(\d[.,]\d{4})\d+")
+# Ô số của bảng: cả dòng là một số thập phân; phần nguyên không bắt đầu bằng 0
+# nên số điện thoại (028.38244888), mã số thuế... không bị cắt
+_NUMERIC_CELL = re.compile(r"^[-−+(]?(?:0|[1-9][\d.,]*)[.,]\d+\)?%?$")
+# Dòng tiêu đề kỳ / đơn vị của bảng (Quý 3/2025, Năm 2024, 6 tháng, Đơn vị: tỷ đồng):
+# lặp ở mọi bảng nhưng là dữ liệu, không phải boilerplate
+_TABLE_HEADER = re.compile(
+    r"^(?:(?:quý|q)\s*\d|năm\s*\d|\d+\s*tháng|đơn vị|đvt)", re.IGNORECASE
+)
+_HAS_ALNUM = re.compile(r"\w")
+_HAS_LETTER = re.compile(r"[^\W\d_]")
+
+TRUNCATED_MARKER = "..."
+
+
+class CompactionReport(NamedTuple):
+    input_tokens: int
+    output_tokens: int
+    boilerplate_lines: int
+    truncated_sections: List[str]
+
+    @property
+    def ratio(self) -> float:
+        return self.output_tokens / self.input_tokens if self.input_tokens else 1.0
+
+
+class TextCompactor:
+    """
+    Rút gọn text crawl trước khi đưa vào prompt:
+    - bỏ các dòng boilerplate lặp lại ở nhiều section (menu, banner, footer, tin liên quan),
+      chỉ giữ lần xuất hiện đầu tiên; tiêu đề kỳ/đơn vị và dòng nằm trong bảng
+      (kề một dòng số) không bị coi là boilerplate;
+    - chuẩn hóa khoảng trắng, bỏ dòng chỉ có ký hiệu, cắt bớt số thập phân quá dài ở ô số;
+    - giới hạn số token cho mỗi section.
+    """
+
+    def __init__(
+        self,
+        section_token_budget: int = None,
+        min_repeat_sections: int = 3,
+        repeat_ratio: float = 0.5,
+    ):
+        self.section_token_budget = (
+            section_token_budget or config.COMPACTION_SECTION_TOKEN_BUDGET
+        )
+        self.min_repeat_sections = min_repeat_sections
+        self.repeat_ratio = repeat_ratio
+
+    @staticmethod
+    def _clean_line(line: str) -> str:
+        line = _INVISIBLE_CHARS.sub("", line).replace("\xa0", " ")
+        line = _WHITESPACE.sub(" ", line).strip()
+        if _NUMERIC_CELL.match(line):
+            line = _LONG_DECIMAL.sub(r"\1", line)
+        return line
+
+    @staticmethod
+    def _in_table(lines: List[str], index: int) -> bool:
+        # Nhãn dòng / cột của bảng đứng cạnh một ô chỉ có số
+        return any(
+            0 <= i < len(lines) and not _HAS_LETTER.search(lines[i])
+            for i in (index - 1, index + 1)
+        )
+
+    def _section_lines(self, section: ProfileSection) -> List[str]:
+        lines = []
+        for raw_line in section.content.splitlines():
+            line = self._clean_line(raw_line)
+            if not line or not _HAS_ALNUM.search(line):
+                continue
+            # Bỏ dòng trùng liên tiếp
+            if lines and lines[-1] == line:
+                continue
+            lines.append(line)
+        return lines
+
+    def _truncate(self, lines: List[str]) -> Tuple[List[str], bool]:
+        kept, tokens = [], 0
+        for line in lines:
+            line_tokens = estimate_tokens(line) + 1
+            if tokens + line_tokens > self.section_token_budget:
+                kept.append(TRUNCATED_MARKER)
+                return kept, True
+            kept.append(line)
+            tokens += line_tokens
+        return kept, False
+
+    def compact(
+        self, sections: List[ProfileSection]
+    ) -> Tuple[List[ProfileSection], CompactionReport]:
+        section_lines = [self._section_lines(section) for section in sections]
+
+        # Dòng chữ xuất hiện ở nhiều section được coi là boilerplate (dòng chỉ có số là dữ liệu)
+        line_counts = Counter()
+        for lines in section_lines:
+            line_counts.update(set(lines))
+        threshold = max(self.min_repeat_sections, len(sections) * self.repeat_ratio)
+        boilerplate = {
+            line
+            for line, count in line_counts.items()
+            if count >= threshold and _HAS_LETTER.search(line) and not _TABLE_HEADER.match(line)
+        }
+
+        seen_boilerplate = set()
+        dropped = 0
+        truncated = []
+        compacted = []
+        for section, lines in zip(sections, section_lines):
+            kept = []
+            for index, line in enumerate(lines):
+                if line in boilerplate and not self._in_table(lines, index):
+                    if line in seen_boilerplate:
+                        dropped += 1
+                        continue
+                    seen_boilerplate.add(line)
+                kept.append(line)
+
+            kept, was_truncated = self._truncate(kept)
+            if was_truncated:
+                truncated.append(section.label)
+            if kept:
+                compacted.append(make_section(section.label, "\n".join(kept)))
+
+        report = CompactionReport(
+            input_tokens=sum(
+                estimate_tokens(s.label) + estimate_tokens(s.content) for s in sections
+            ),
+            output_tokens=sum(
+                estimate_tokens(s.label) + estimate_tokens(s.content) for s in compacted
+            ),
+            boilerplate_lines=dropped,
+            truncated_sections=truncated,
+        )
+        return compacted, report
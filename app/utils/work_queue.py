@@ -0,0 +1,335 @@
+import os
+import random
+import socket
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.config import config
+from app.database import engine
+from app.logger import logger
+
+
+class WorkItem(NamedTuple):
+    id: int
+    key: str
+    payload: Optional[dict]
+    attempts: int
+    max_attempts: int
+
+
+class WorkQueue:
+    """
+    Hàng đợi việc trên bảng work_queue (PostgreSQL), dùng chung giữa nhiều máy:
+    - worker nhận việc theo lô bằng FOR UPDATE SKIP LOCKED nên không chờ/giành nhau;
+    - việc đang chạy có lease, worker gia hạn bằng heartbeat; lease hết hạn (máy chết)
+      thì việc được worker khác nhận lại;
+    - lỗi được thử lại với backoff lũy thừa qua cột available_at, hết lượt thì chuyển failed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        lease_seconds: int = None,
+        backoff_seconds: int = None,
+        max_backoff_seconds: int = None,
+    ):
+        self.name = name
+        self.lease_seconds = lease_seconds or config.WORK_QUEUE_LEASE_SECONDS
+        self.backoff_seconds = backoff_seconds or config.WORK_QUEUE_BACKOFF_SECONDS
+        self.max_backoff_seconds = max_backoff_seconds or config.WORK_QUEUE_MAX_BACKOFF_SECONDS
+
+    def enqueue(
+        self,
+        keys: Iterable[str],
+        priority: int = 0,
+        payload: dict = None,
+        max_attempts: int = None,
+        reset: bool = False,
+    ) -> int:
+        """
+        Thêm việc theo key (vd: mã chứng khoán). Key đã có trong hàng đợi được giữ nguyên,
+        trừ khi reset=True: khi đó việc đã xong/lỗi được đưa về pending với độ ưu tiên mới.
+        Trả về số key đã gửi.
+        """
+        rows = [
+            {
+                "queue": self.name,
+                "key": key,
+                "payload": payload,
+                "priority": priority,
+                "max_attempts": max_attempts or config.WORK_QUEUE_MAX_ATTEMPTS,
+            }
+            for key in dict.fromkeys(keys)
+        ]
+        if not rows:
+            return 0
+
+        conflict = "DO NOTHING"
+        if reset:
+            conflict = """
+                DO UPDATE SET status = 'pending', attempts = 0, priority = EXCLUDED.priority,
+                    payload = EXCLUDED.payload, max_attempts = EXCLUDED.max_attempts,
+                    available_at = now(), last_error = NULL, updated_at = now()
+                WHERE work_queue.status <> 'running'
+            """
+        statement = text(
+            f"""
+            INSERT INTO work_queue (queue, key, payload, priority, max_attempts)
+            VALUES (:queue, :key, :payload, :priority, :max_attempts)
+            ON CONFLICT (queue, key) {conflict}
+            """
+        ).bindparams(bindparam("payload", type_=JSONB))
+        with engine.begin() as connection:
+            connection.execute(statement, rows)
+        return len(rows)
+
+    def claim(self, worker_id: str, limit: int) -> List[WorkItem]:
+        with engine.begin() as connection:
+            # Việc có lease hết hạn nhưng đã dùng hết lượt thử: chuyển failed thay vì nhận lại
+            connection.execute(
+                text(
+                    """
+                    UPDATE work_queue
+                    SET status = 'failed', lease_owner = NULL, updated_at = now(),
+                        last_error = COALESCE(last_error, 'lease expired')
+                    WHERE queue = :queue AND status = 'running'
+                      AND lease_expires_at < now() AND attempts >= max_attempts
+                    """
+                ),
+                {"queue": self.name},
+            )
+            # RETURNING không giữ thứ tự của subquery: sắp xếp lại theo độ ưu tiên
+            rows = connection.execute(
+                text(
+                    """
+                    WITH claimed AS (
+                        UPDATE work_queue
+                        SET status = 'running', lease_owner = :worker_id,
+                            lease_expires_at = now() + make_interval(secs => :lease_seconds),
+                            attempts = attempts + 1, updated_at = now()
+                        WHERE id IN (
+                            SELECT id FROM work_queue
+                            WHERE queue = :queue AND (
+                                (status = 'pending' AND available_at <= now())
+                                OR (status = 'running' AND lease_expires_at < now())
+                            )
+                            ORDER BY priority DESC, available_at, id
+                            LIMIT :limit
+                            FOR UPDATE SKIP LOCKED
+                        )
+                        RETURNING id, key, payload, attempts, max_attempts, priority, available_at
+                    )
+                    SELECT id, key, payload, attempts, max_attempts FROM claimed
+                    ORDER BY priority DESC, available_at, id
+                    """
+                ),
+                {
+                    "queue": self.name,
+                    "worker_id": worker_id,
+                    "lease_seconds": self.lease_seconds,
+                    "limit": limit,
+                },
+            ).fetchall()
+        return [WorkItem(*row) for row in rows]
+
+    def heartbeat(self, worker_id: str, item_ids: List[int]) -> int:
+        """Gia hạn lease cho các việc worker đang giữ; trả về số việc còn giữ được"""
+        if not item_ids:
+            return 0
+        with engine.begin() as connection:
+            result = connection.execute(
+                text(
+                    """
+                    UPDATE work_queue
+                    SET lease_expires_at = now() + make_interval(secs => :lease_seconds)
+                    WHERE id = ANY(:ids) AND status = 'running' AND lease_owner = :worker_id
+                    """
+                ),
+                {"ids": list(item_ids), "worker_id": worker_id, "lease_seconds": self.lease_seconds},
+            )
+        return result.rowcount
+
+    def release(self, worker_id: str, items: Iterable[WorkItem]) -> int:
+        """
+        Trả việc đã nhận nhưng chưa bắt đầu chạy về pending (vd: worker dừng),
+        không tính lượt thử và có thể được nhận lại ngay.
+        """
+        item_ids = [item.id for item in items]
+        if not item_ids:
+            return 0
+        with engine.begin() as connection:
+            result = connection.execute(
+                text(
+                    """
+                    UPDATE work_queue
+                    SET status = 'pending', lease_owner = NULL, lease_expires_at = NULL,
+                        attempts = GREATEST(attempts - 1, 0), available_at = now(),
+                        updated_at = now()
+                    WHERE id = ANY(:ids) AND status = 'running' AND lease_owner = :worker_id
+                    """
+                ),
+                {"ids": item_ids, "worker_id": worker_id},
+            )
+        return result.rowcount
+
+    def complete(self, worker_id: str, item: WorkItem):
+        with engine.begin() as connection:
+            connection.execute(
+                text(
+                    """
+                    UPDATE work_queue
+                    SET status = 'done', lease_owner = NULL, lease_expires_at = NULL,
+                        last_error = NULL, updated_at = now()
+                    WHERE id = :id AND lease_owner = :worker_id
+                    """
+                ),
+                {"id": item.id, "worker_id": worker_id},
+            )
+
+    def fail(self, worker_id: str, item: WorkItem, error: str):
+        retry = item.attempts < item.max_attempts
+        # Backoff lũy thừa có jitter để các việc lỗi cùng lúc không quay lại cùng lúc
+        delay = min(self.backoff_seconds * 2 ** (item.attempts - 1), self.max_backoff_seconds)
+        delay *= random.uniform(0.8, 1.2)
+        with engine.begin() as connection:
+            connection.execute(
+                text(
+                    """
+                    UPDATE work_queue
+                    SET status = :status, lease_owner = NULL, lease_expires_at = NULL,
+                        available_at = now() + make_interval(secs => :delay),
+                        last_error = :error, updated_at = now()
+                    WHERE id = :id AND lease_owner = :worker_id
+                    """
+                ),
+                {
+                    "id": item.id,
+                    "worker_id": worker_id,
+                    "status": "pending" if retry else "failed",
+                    "delay": delay,
+                    "error": error[:2000],
+                },
+            )
+        return retry
+
+    def stats(self) -> dict:
+        with engine.connect() as connection:
+            rows = connection.execute(
+                text("SELECT status, count(*) FROM work_queue WHERE queue = :queue GROUP BY status"),
+                {"queue": self.name},
+            ).fetchall()
+        return {status: count for status, count in rows}
+
+
+class QueueWorker:
+    """
+    Vòng lặp worker: nhận lô việc, xử lý song song trong process, heartbeat lease trong lúc chạy.
+    handler(key, payload) raise lỗi nghĩa là việc thất bại (hàng đợi tự lên lịch thử lại).
+    Khi dừng: việc đã nhận nhưng chưa chạy được trả lại hàng đợi, việc đang chạy được chờ
+    chạy xong và vẫn được heartbeat cho tới khi kết thúc.
+    """
+
+    def __init__(
+        self,
+        queue: WorkQueue,
+        handler: Callable[[str, Optional[dict]], None],
+        concurrency: int = 4,
+        batch_size: int = None,
+        poll_seconds: float = None,
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self.batch_size = batch_size or config.WORK_QUEUE_BATCH_SIZE
+        self.poll_seconds = poll_seconds or config.WORK_QUEUE_POLL_SECONDS
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._in_flight = set()
+        self._in_flight_lock = threading.Lock()
+        self._stop = threading.Event()
+        # Heartbeat dừng riêng, sau khi mọi việc đang chạy đã xong
+        self._heartbeat_stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def _heartbeat_loop(self):
+        interval = max(1.0, self.queue.lease_seconds / 3)
+        while not self._heartbeat_stop.wait(interval):
+            with self._in_flight_lock:
+                item_ids = list(self._in_flight)
+            try:
+                self.queue.heartbeat(self.worker_id, item_ids)
+            except Exception as e:
+                logger.warning(f"Heartbeat failed for worker {self.worker_id}: {e}")
+
+    def _process(self, item: WorkItem):
+        try:
+            self.handler(item.key, item.payload)
+            self.queue.complete(self.worker_id, item)
+        except Exception as e:
+            retry = self.queue.fail(self.worker_id, item, str(e))
+            logger.error(
+                f"Work item {item.key} failed (attempt {item.attempts}/{item.max_attempts}, "
+                f"{'will retry' if retry else 'giving up'}): {e}"
+            )
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.discard(item.id)
+
+    def _release_pending(self, futures: Dict[Future, WorkItem]):
+        """Hủy các việc chưa bắt đầu chạy và trả chúng về hàng đợi"""
+        cancelled = [item for future, item in futures.items() if future.cancel()]
+        if not cancelled:
+            return
+        with self._in_flight_lock:
+            self._in_flight.difference_update(item.id for item in cancelled)
+        try:
+            released = self.queue.release(self.worker_id, cancelled)
+            logger.info(f"Worker {self.worker_id} released {released} unstarted work items")
+        except Exception as e:
+            # Không trả được: lease hết hạn thì worker khác sẽ nhận lại
+            logger.warning(f"Error while releasing unstarted work items: {e}")
+
+    def run(self):
+        logger.info(f"Worker {self.worker_id} started on queue {self.queue.name}")
+        self._heartbeat_stop.clear()
+        heartbeat = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        heartbeat.start()
+        futures: Dict[Future, WorkItem] = {}
+        executor = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="queue-worker"
+        )
+        try:
+            while not self._stop.is_set():
+                futures = {future: item for future, item in futures.items() if not future.done()}
+                with self._in_flight_lock:
+                    free_slots = self.concurrency + self.batch_size - len(self._in_flight)
+                if free_slots <= 0:
+                    self._stop.wait(0.5)
+                    continue
+
+                try:
+                    items = self.queue.claim(self.worker_id, min(self.batch_size, free_slots))
+                except Exception as e:
+                    logger.error(f"Error while claiming work: {e}")
+                    items = []
+                if not items:
+                    self._stop.wait(self.poll_seconds)
+                    continue
+
+                with self._in_flight_lock:
+                    self._in_flight.update(item.id for item in items)
+                for item in items:
+                    futures[executor.submit(self._process, item)] = item
+        finally:
+            self._release_pending(futures)
+            # Chờ việc đang chạy xong; lease của chúng vẫn được heartbeat gia hạn
+            executor.shutdown(wait=True)
+            self._heartbeat_stop.set()
+            heartbeat.join()
+        logger.info(f"Worker {self.worker_id} stopped")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+import argparse
+import glob
+import json
+import random
+import shutil
+import statistics
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+
+from app.utils.cache_store import IndexedCacheStore
+from app.logger import logger
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Benchmark cache get/set: flat files + glob (cũ) vs IndexedCacheStore"
+    )
+    parser.add_argument("--entries", type=int, default=100_000, help="Số entry ghi vào cache")
+    parser.add_argument("--lookups", type=int, default=500, help="Số lần get ngẫu nhiên để đo")
+    parser.add_argument("--payload-bytes", type=int, default=2_000, help="Kích thước mỗi payload")
+    parser.add_argument("--dir", help="Thư mục làm việc (mặc định: thư mục tạm, xóa sau khi chạy)")
+    return parser.parse_args()
+
+
+class FlatFileCache:
+    """Cách cũ: mỗi entry một file key_YYYYMMDD.ext trong một thư mục, get bằng glob"""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def set(self, key: str, extension: str, raw: str):
+        ts = datetime.now().strftime("%Y%m%d")
+        with open(os.path.join(self.cache_dir, f"{key}_{ts}.{extension}"), "w", encoding="utf-8") as f:
+            f.write(raw)
+
+    def get(self, key: str, extension: str):
+        for file_path in glob.glob(os.path.join(self.cache_dir, f"{key}_*.{extension}")):
+            with open(file_path, "r", encoding="utf-8") as f:
+                return f.read()
+        return None
+
+
+def _payload(i: int, size: int) -> str:
+    record = {"symbol": f"S{i:06d}", "values": [i * 1.5] * 8}
+    raw = json.dumps(record)
+    return raw + " " * max(0, size - len(raw))
+
+
+def _percentiles(samples):
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return f"p50 {statistics.median(ordered) * 1000:.3f} ms, p99 {p99 * 1000:.3f} ms"
+
+
+def bench(label, cache_set, cache_get, keys, lookups, payload_bytes):
+    start = time.perf_counter()
+    for i, key in enumerate(keys):
+        cache_set(key, _payload(i, payload_bytes))
+    set_seconds = time.perf_counter() - start
+    logger.info(f"{label} set: {set_seconds:.1f}s ({len(keys) / set_seconds:,.0f} entries/s)")
+
+    rng = random.Random(0)
+    hit_keys = [rng.choice(keys) for _ in range(lookups)]
+    miss_keys = [f"missing_{i}" for i in range(lookups)]
+    results = {}
+    for kind, sample in (("hit", hit_keys), ("miss", miss_keys)):
+        timings = []
+        found = 0
+        for key in sample:
+            start = time.perf_counter()
+            found += cache_get(key) is not None
+            timings.append(time.perf_counter() - start)
+        results[kind] = found
+        logger.info(
+            f"{label} get ({kind}): {len(sample) / sum(timings):,.0f} lookups/s, "
+            f"{_percentiles(timings)}, found {found}/{len(sample)}"
+        )
+    return results
+
+
+def main():
+    args = parse_args()
+    work_dir = args.dir or tempfile.mkdtemp(prefix="cache_bench_")
+    keys = [f"company_profile_S{i:06d}" for i in range(args.entries)]
+    logger.info(f"Entries: {args.entries:,}, lookups: {args.lookups:,}, dir: {work_dir}")
+    try:
+        flat = FlatFileCache(os.path.join(work_dir, "flat"))
+        before = bench(
+            "flat files + glob",
+            lambda key, raw: flat.set(key, "json", raw),
+            lambda key: flat.get(key, "json"),
+            keys,
+            args.lookups,
+            args.payload_bytes,
+        )
+
+        store = IndexedCacheStore(os.path.join(work_dir, "indexed"))
+        now = time.time()
+        after = bench(
+            "IndexedCacheStore",
+            lambda key, raw: store.set(key, "json", raw, now, now + 86400),
+            lambda key: store.get(key, "json"),
+            keys,
+            args.lookups,
+            args.payload_bytes,
+        )
+
+        # Toàn bộ entry hết hạn: đo thời gian dọn hàng loạt
+        start = time.perf_counter()
+        removed = store.sweep(now=now + 2 * 86400)
+        logger.info(f"IndexedCacheStore sweep: {removed:,} entries in {time.perf_counter() - start:.1f}s")
+        if before != after:
+            logger.error(f"Lookup results differ: flat {before}, indexed {after}")
+    finally:
+        if not args.dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
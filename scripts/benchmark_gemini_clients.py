@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import statistics
+import sys
+import os
+import threading
+import time
+from typing import Dict, List, Tuple
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from google.genai import Client, types
+
+from app.config import config
+from app.utils.gemini_api import GENERATION_CONFIG, GeminiRotator
+from app.logger import logger
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Benchmark Gemini calls: new client per call (cũ) vs one client per key"
+    )
+    parser.add_argument("--calls", type=int, default=200, help="Số lần gọi cho mỗi cách")
+    parser.add_argument("--keys", type=int, default=3, help="Số API key giả để xoay vòng")
+    parser.add_argument(
+        "--base-url",
+        default=config.GEMINI_BASE_URL,
+        help="Endpoint thay thế (mặc định: GEMINI_BASE_URL, không có thì chạy stand-in cục bộ)",
+    )
+    parser.add_argument(
+        "--latency-ms", type=float, default=0.0, help="Độ trễ giả lập mỗi request của stand-in"
+    )
+    return parser.parse_args()
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Endpoint generateContent giả trên localhost: trả một câu trả lời cố định,
+    ghi lại kết nối TCP và (thời điểm, API key) của từng request.
+    `errors`: API key -> mã lỗi HTTP trả về cho key đó (vd: 429, 503, 401).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, latency_ms: float = 0.0, errors: Dict[str, int] = None):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.latency_ms = latency_ms
+        self.errors = dict(errors or {})
+        self.connections = 0
+        self.calls: List[Tuple[float, str]] = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    @property
+    def keys(self) -> List[str]:
+        with self.lock:
+            return [api_key for _, api_key in self.calls]
+
+    def start(self) -> "StandInServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def reset(self):
+        with self.lock:
+            self.connections = 0
+            self.calls = []
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 để client giữ kết nối keep-alive như với API thật
+    protocol_version = "HTTP/1.1"
+    RESPONSE = {
+        "candidates": [
+            {"content": {"role": "model", "parts": [{"text": "OK"}]}, "finishReason": "STOP"}
+        ],
+        "usageMetadata": {"promptTokenCount": 5, "candidatesTokenCount": 1, "totalTokenCount": 6},
+    }
+    ERROR_STATUS = {429: "RESOURCE_EXHAUSTED", 401: "UNAUTHENTICATED", 403: "PERMISSION_DENIED"}
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        api_key = self.headers.get("x-goog-api-key")
+        with self.server.lock:
+            self.server.calls.append((time.monotonic(), api_key))
+        if self.server.latency_ms:
+            time.sleep(self.server.latency_ms / 1000)
+
+        status = self.server.errors.get(api_key, 200)
+        body = self.RESPONSE
+        if status != 200:
+            body = {
+                "error": {
+                    "code": status,
+                    "message": "stand-in error",
+                    "status": self.ERROR_STATUS.get(status, "UNAVAILABLE"),
+                }
+            }
+        raw = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _call(client: Client, model_id: str):
+    return client.models.generate_content(
+        model=model_id, contents=types.Part.from_text(text="ping"), config=GENERATION_CONFIG
+    ).text
+
+
+def per_call_client(rotator: GeminiRotator):
+    """Cách cũ: tạo client mới cho mỗi lần gọi và đóng ngay sau đó"""
+    lease = rotator.scheduler.acquire()
+    try:
+        client = rotator._create_client(lease.api_key)
+        try:
+            return _call(client, rotator.model_id)
+        finally:
+            client.close()
+    finally:
+        rotator.scheduler.release(lease)
+
+
+def shared_client(rotator: GeminiRotator):
+    with rotator.client() as (client, _):
+        return _call(client, rotator.model_id)
+
+
+def bench(label, func, rotator, calls, server):
+    if server:
+        server.reset()
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        func(rotator)
+        timings.append(time.perf_counter() - start)
+    ordered = sorted(timings)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    message = (
+        f"{label}: {calls / sum(timings):,.0f} calls/s, p50 {statistics.median(ordered) * 1000:.2f} ms, "
+        f"p99 {p99 * 1000:.2f} ms"
+    )
+    if server:
+        message += (
+            f", {server.connections} TCP connections for {len(server.keys)} requests "
+            f"over {len(set(server.keys))} keys"
+        )
+    logger.info(message)
+    return statistics.median(ordered)
+
+
+def main():
+    args = parse_args()
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server = StandInServer(args.latency_ms).start()
+        base_url = server.url
+    logger.info(f"Endpoint: {base_url}, calls: {args.calls}, keys: {args.keys}")
+
+    # Ngân sách lớn để scheduler không làm chậm phép đo
+    rotator = GeminiRotator(
+        api_keys=[f"bench-key-{i}" for i in range(args.keys)],
+        model_id=config.GEMINI_MODEL_ID,
+        rpm=10**6,
+        tpm=10**9,
+        base_url=base_url,
+    )
+    try:
+        # Làm nóng: import/khởi tạo lần đầu của SDK không tính vào phép đo
+        per_call_client(rotator)
+        before = bench("new client per call", per_call_client, rotator, args.calls, server)
+        after = bench("one client per key", shared_client, rotator, args.calls, server)
+        logger.info(
+            f"Per-call p50: {before * 1000:.2f} ms -> {after * 1000:.2f} ms "
+            f"({before / max(after, 1e-9):.1f}x), clients kept: {len(rotator._clients)}"
+        )
+        if server and server.connections > args.keys:
+            logger.warning(f"Expected at most {args.keys} connections, got {server.connections}")
+    finally:
+        rotator.close()
+        if server:
+            server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+import argparse
+import glob
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import requests
+from bs4 import BeautifulSoup
+
+from app.config import config
+from app.crawler.cafef import CafefCrawler
+from app.utils.html_extract import extract_html
+from app.utils.http_client import DEFAULT_HEADERS
+from app.logger import logger
+
+PAGES_DIR = os.path.join(config.CACHE_DIR, "html_pages")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark HTML extraction on saved CafeF pages")
+    parser.add_argument("--pages-dir", default=PAGES_DIR, help="Thư mục chứa file .html đã lưu")
+    parser.add_argument(
+        "--download", nargs="+", metavar="SYMBOL", help="Tải và lưu trang của các mã này trước"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Số lần lặp trên toàn bộ trang")
+    return parser.parse_args()
+
+
+def download_pages(symbols, pages_dir):
+    """Lưu trang tổng quan cùng trang Thông tin cơ bản / Ban lãnh đạo của từng mã"""
+    os.makedirs(pages_dir, exist_ok=True)
+    crawler = CafefCrawler()
+    for symbol in symbols:
+        company_url = crawler._get_company_url(symbol.upper())
+        if not company_url:
+            logger.warning(f"Company with symbol {symbol} not found on Cafef")
+            continue
+        html = requests.get(company_url, headers=DEFAULT_HEADERS, timeout=15).text
+        urls = {"overview": company_url}
+        urls.update(crawler._find_profile_links(extract_html(html).anchors, company_url))
+        for name, url in urls.items():
+            if url != company_url:
+                html = requests.get(url, headers=DEFAULT_HEADERS, timeout=15).text
+            path = os.path.join(pages_dir, f"{symbol.upper()}_{name}.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(html)
+        logger.info(f"Saved {len(urls)} pages for {symbol.upper()}")
+
+
+def extract_before(html):
+    """Cách cũ: html.parser, parse một lần lấy text nội dung chính, thêm một lần cho link/tab"""
+    soup = BeautifulSoup(html, "html.parser")
+    main_content = (
+        soup.find("div", class_="content")
+        or soup.find("div", id="content")
+        or soup.find("div", class_="pagewrap")
+        or soup.find("div", id="pagewrap")
+        or soup.find("div", id="cf_ContainerBox")
+    )
+    text = (main_content or soup).get_text(separator="\n", strip=True)
+    soup = BeautifulSoup(html, "html.parser")
+    anchors = [(a.get_text(" ", strip=True), a["href"]) for a in soup.find_all("a", href=True)]
+    owner_tabs = [
+        " ".join(h2.get_text(" ", strip=True).split()) for h2 in soup.select("h2.owner-tab")
+    ]
+    return text, anchors, owner_tabs
+
+
+extract_after = partial(
+    extract_html,
+    main_xpaths=CafefCrawler.MAIN_CONTENT_XPATHS,
+    texts={"owner_tabs": CafefCrawler.OWNER_TAB_XPATH},
+)
+
+
+def timed(label, func, pages, repeat, total_mb):
+    start = time.perf_counter()
+    results = None
+    for _ in range(repeat):
+        results = func(pages)
+    seconds = (time.perf_counter() - start) / repeat
+    logger.info(
+        f"{label}: {seconds:.2f}s ({len(pages) / seconds:,.1f} pages/s, {total_mb / seconds:,.1f} MB/s)"
+    )
+    return results
+
+
+def main():
+    args = parse_args()
+    if args.download:
+        download_pages(args.download, args.pages_dir)
+
+    pages = []
+    for path in sorted(glob.glob(os.path.join(args.pages_dir, "*.html"))):
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append(f.read())
+    if not pages:
+        logger.error(f"No saved pages in {args.pages_dir}, run with --download SYMBOL ... first")
+        sys.exit(1)
+    total_mb = sum(len(page.encode("utf-8")) for page in pages) / 1024 / 1024
+    logger.info(f"Pages: {len(pages)} ({total_mb:.1f} MB)")
+
+    before = timed(
+        "BeautifulSoup html.parser (2 parses/page)",
+        lambda p: [extract_before(html) for html in p],
+        pages,
+        args.repeat,
+        total_mb,
+    )
+    after = timed(
+        "lxml single parse",
+        lambda p: [extract_after(html) for html in p],
+        pages,
+        args.repeat,
+        total_mb,
+    )
+    if config.HTML_PARSE_WORKERS > 0:
+        with ProcessPoolExecutor(max_workers=config.HTML_PARSE_WORKERS) as executor:
+            # Khởi động worker trước khi đo
+            list(executor.map(extract_after, pages[:config.HTML_PARSE_WORKERS]))
+            timed(
+                f"lxml single parse, {config.HTML_PARSE_WORKERS} processes",
+                lambda p: list(executor.map(extract_after, p)),
+                pages,
+                args.repeat,
+                total_mb,
+            )
+
+    text_mismatches = sum(b[0] != a.text for b, a in zip(before, after))
+    tab_mismatches = sum(b[2] != a.texts["owner_tabs"] for b, a in zip(before, after))
+    logger.info(
+        f"Main text mismatches: {text_mismatches}/{len(pages)}, "
+        f"owner tab mismatches: {tab_mismatches}"
+    )
+
+if __name__ == "__main__":
+    main()
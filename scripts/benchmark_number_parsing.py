@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from app.utils.number_utils import parse_vn_number, parse_vn_numbers
+from app.logger import logger
+
+SAMPLES = [
+    "1.234,5 tỷ đồng",
+    "(12,3)%",
+    "2 nghìn tỷ",
+    "15,6 triệu",
+    "1.234.567",
+    "-0,45",
+    "0,125 tỷ",
+    "",
+    "N/A",
+]
+
+
+def main():
+    cells = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(0)
+    series = pd.Series(rng.choice(SAMPLES, size=cells))
+
+    start = time.perf_counter()
+    vectorized = parse_vn_numbers(series)
+    vectorized_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scalar = series.map(parse_vn_number).astype("float64")
+    scalar_seconds = time.perf_counter() - start
+
+    mismatches = int((~np.isclose(vectorized, scalar, equal_nan=True)).sum())
+    logger.info(f"Cells: {cells:,}")
+    logger.info(f"Vectorized: {vectorized_seconds:.2f}s ({cells / vectorized_seconds:,.0f} cells/s)")
+    logger.info(f"Scalar: {scalar_seconds:.2f}s ({cells / scalar_seconds:,.0f} cells/s)")
+    logger.info(f"Mismatches between scalar and vectorized: {mismatches}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import json
+import re
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playwright.async_api import async_playwright
+
+from app.config import config
+from app.crawler.cafef import CafefCrawler
+from app.utils.html_extract import extract_html
+from app.utils.page_waiter import click_and_wait, get_wait_policy
+from app.utils.playwright_manager import BROWSER_ARGS
+from app.logger import logger
+
+RECORDINGS_DIR = os.path.join(config.CACHE_DIR, "page_recordings")
+# Cách chờ cũ: slow_mo=1000 khi launch và wait_for_timeout(1000) sau mỗi lần click tab
+LEGACY_SLOW_MO = 1000
+LEGACY_SLEEP_MS = 1000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Benchmark tab waits (fixed sleep vs event-driven) on recorded CafeF pages"
+    )
+    parser.add_argument("--recordings-dir", default=RECORDINGS_DIR, help="Thư mục chứa file .har")
+    parser.add_argument(
+        "--record", nargs="+", metavar="SYMBOL", help="Ghi lại (HAR) trang của các mã này trước"
+    )
+    parser.add_argument("--symbols", nargs="+", help="Chỉ chạy trên các mã này (mặc định: tất cả)")
+    return parser.parse_args()
+
+
+def _tab_texts():
+    return [tab_text for tab_text, _, _, _ in CafefCrawler.MAIN_TABS]
+
+
+def _content(html: str) -> str:
+    return extract_html(html, main_xpaths=CafefCrawler.MAIN_CONTENT_XPATHS).text
+
+
+async def record(playwright, symbols, recordings_dir):
+    """Mở trang từng mã qua mạng thật, click các tab chính và lưu toàn bộ request vào HAR"""
+    os.makedirs(recordings_dir, exist_ok=True)
+    crawler = CafefCrawler()
+    index_path = os.path.join(recordings_dir, "index.json")
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+
+    browser = await playwright.chromium.launch(headless=True, args=BROWSER_ARGS)
+    policy = get_wait_policy("cafef", "tab")
+    for symbol in (s.upper() for s in symbols):
+        company_url = crawler._get_company_url(symbol)
+        if not company_url:
+            logger.warning(f"Company with symbol {symbol} not found on Cafef")
+            continue
+        context = await browser.new_context(
+            no_viewport=True,
+            record_har_path=os.path.join(recordings_dir, f"{symbol}.har"),
+            record_har_content="embed",
+        )
+        page = await context.new_page()
+        await page.goto(company_url, timeout=30000)
+        for tab_text in _tab_texts():
+            tab = page.locator("h2", has_text=re.compile(tab_text))
+            if await tab.count():
+                await click_and_wait(page, tab.first, policy)
+                # Chờ thêm để mọi request phía sau tab đều được ghi lại
+                await page.wait_for_timeout(2000)
+        await context.close()
+        index[symbol] = company_url
+        logger.info(f"Recorded {symbol}")
+    await browser.close()
+
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+
+
+async def crawl_tabs(browser, har_path, company_url, legacy: bool):
+    """Mở trang từ HAR, click lần lượt các tab chính; trả về (số giây, text từng tab, tín hiệu)"""
+    context = await browser.new_context(no_viewport=True)
+    await context.route_from_har(har_path, not_found="abort")
+    page = await context.new_page()
+    policy = get_wait_policy("cafef", "tab")
+    texts, signals = [], []
+    start = time.perf_counter()
+    try:
+        await page.goto(company_url, timeout=30000)
+        for tab_text in _tab_texts():
+            tab = page.locator("h2", has_text=re.compile(tab_text))
+            if await tab.count() == 0:
+                continue
+            if legacy:
+                await tab.first.click()
+                await page.wait_for_timeout(LEGACY_SLEEP_MS)
+                signals.append("sleep")
+            else:
+                signals.append(await click_and_wait(page, tab.first, policy))
+            texts.append(_content(await page.content()))
+        return time.perf_counter() - start, texts, signals
+    finally:
+        await context.close()
+
+
+async def benchmark(playwright, recordings_dir, symbols):
+    with open(os.path.join(recordings_dir, "index.json"), "r", encoding="utf-8") as f:
+        index = json.load(f)
+    if symbols:
+        index = {s.upper(): index[s.upper()] for s in symbols if s.upper() in index}
+    if not index:
+        logger.error(f"No recordings in {recordings_dir}, run with --record SYMBOL ... first")
+        sys.exit(1)
+
+    legacy_browser = await playwright.chromium.launch(
+        headless=True, args=BROWSER_ARGS, slow_mo=LEGACY_SLOW_MO
+    )
+    browser = await playwright.chromium.launch(headless=True, args=BROWSER_ARGS)
+    legacy_total = event_total = 0.0
+    mismatches = 0
+    try:
+        for symbol, company_url in index.items():
+            har_path = os.path.join(recordings_dir, f"{symbol}.har")
+            legacy_seconds, legacy_texts, _ = await crawl_tabs(
+                legacy_browser, har_path, company_url, legacy=True
+            )
+            event_seconds, event_texts, signals = await crawl_tabs(
+                browser, har_path, company_url, legacy=False
+            )
+            legacy_total += legacy_seconds
+            event_total += event_seconds
+            # Nội dung sau mỗi tab phải giống cách chờ cũ (đủ lâu để trang đã render xong)
+            differing = sum(a != b for a, b in zip(legacy_texts, event_texts))
+            mismatches += differing
+            logger.info(
+                f"{symbol}: fixed sleep {legacy_seconds:.2f}s, event-driven {event_seconds:.2f}s "
+                f"({legacy_seconds / max(event_seconds, 1e-6):.1f}x), signals {signals}, "
+                f"tabs differing: {differing}"
+            )
+    finally:
+        await legacy_browser.close()
+        await browser.close()
+
+    logger.info(
+        f"{len(index)} tickers: fixed sleep {legacy_total / len(index):.2f}s/ticker, "
+        f"event-driven {event_total / len(index):.2f}s/ticker "
+        f"({legacy_total / max(event_total, 1e-6):.1f}x), tabs differing: {mismatches}"
+    )
+
+
+async def run(args):
+    async with async_playwright() as playwright:
+        if args.record:
+            await record(playwright, args.record, args.recordings_dir)
+        await benchmark(playwright, args.recordings_dir, args.symbols)
+
+
+def main():
+    asyncio.run(run(parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+import argparse
+import signal
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import config
+from app.crawler.cafef import CafefCrawler
+from app.services.universe_sync_service import UniverseSyncService
+from app.utils.browser_pool import BrowserPool
+from app.utils.gemini_api import rotator
+from app.utils.resource_limits import ResourceLimits
+from app.utils.work_queue import QueueWorker, WorkQueue
+from app.logger import logger
+
+QUEUE_NAME = "company_profiles"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Company profile work queue shared by many crawler nodes")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="Thêm mã vào hàng đợi")
+    source = enqueue.add_mutually_exclusive_group(required=True)
+    source.add_argument("--all", action="store_true", help="Tất cả mã trên CafeF")
+    source.add_argument("--exchange", nargs="+", help="Lọc theo sàn, vd: HOSE HNX UPCOM")
+    source.add_argument("--symbols-file", help="File chứa danh sách mã, mỗi dòng một mã")
+    enqueue.add_argument("--priority", type=int, default=0, help="Số lớn hơn được xử lý trước")
+    enqueue.add_argument("--reset", action="store_true", help="Đưa mã đã xong/lỗi về trạng thái chờ")
+
+    work = commands.add_parser("work", help="Chạy worker nhận việc từ hàng đợi")
+    work.add_argument("--concurrency", type=int, default=config.SYNC_LLM_CONCURRENCY or 4)
+    work.add_argument("--batch-size", type=int, default=config.WORK_QUEUE_BATCH_SIZE)
+
+    commands.add_parser("stats", help="Số việc theo trạng thái")
+    return parser.parse_args()
+
+
+def load_symbols(args):
+    if args.symbols_file:
+        with open(args.symbols_file, "r", encoding="utf-8") as f:
+            return [line.strip().upper() for line in f if line.strip() and not line.startswith("#")]
+    return CafefCrawler().list_symbols(None if args.all else args.exchange)
+
+
+def run_worker(queue: WorkQueue, args):
+    # Dùng lại service của sync_universe: một Session/service cho mỗi thread worker
+    sync_service = UniverseSyncService(
+        ResourceLimits({
+            "browser": config.SYNC_BROWSER_CONCURRENCY
+            or config.BROWSER_POOL_SIZE * config.BROWSER_POOL_CONTEXTS,
+            "llm": config.SYNC_LLM_CONCURRENCY or rotator.max_concurrency,
+            "db": config.SYNC_DB_CONCURRENCY,
+        })
+    )
+    worker = QueueWorker(
+        queue,
+        handler=lambda symbol, payload: sync_service.sync_symbol(symbol),
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+    )
+    signal.signal(signal.SIGINT, lambda *_: worker.stop())
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    try:
+        worker.run()
+    finally:
+        sync_service.close()
+        BrowserPool.shutdown()
+        rotator.close()
+
+
+def main():
+    args = parse_args()
+    queue = WorkQueue(QUEUE_NAME)
+    if args.command == "enqueue":
+        count = queue.enqueue(load_symbols(args), priority=args.priority, reset=args.reset)
+        logger.info(f"Enqueued {count} symbols")
+    elif args.command == "work":
+        run_worker(queue, args)
+    logger.info(f"Queue {QUEUE_NAME}: {queue.stats()}")
+
+if __name__ == "__main__":
+    main()
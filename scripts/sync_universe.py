@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import config
+from app.crawler.cafef import CafefCrawler
+from app.services.universe_sync_service import UniverseSyncService
+from app.utils.browser_pool import BrowserPool
+from app.utils.checkpoint import SyncCheckpoint
+from app.utils.gemini_api import rotator
+from app.utils.resource_limits import ResourceLimits
+from app.logger import logger
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sync company profiles for many symbols in one process")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--all", action="store_true", help="Tất cả mã trên CafeF")
+    source.add_argument("--exchange", nargs="+", help="Lọc theo sàn, vd: HOSE HNX UPCOM")
+    source.add_argument("--symbols-file", help="File chứa danh sách mã, mỗi dòng một mã")
+    parser.add_argument("--browser-concurrency", type=int, default=config.SYNC_BROWSER_CONCURRENCY)
+    parser.add_argument("--llm-concurrency", type=int, default=config.SYNC_LLM_CONCURRENCY)
+    parser.add_argument("--db-concurrency", type=int, default=config.SYNC_DB_CONCURRENCY)
+    parser.add_argument("--checkpoint", default="company_profiles", help="Tên checkpoint")
+    parser.add_argument("--reset", action="store_true", help="Xóa checkpoint và chạy lại từ đầu")
+    return parser.parse_args()
+
+
+def load_symbols(args):
+    if args.symbols_file:
+        with open(args.symbols_file, "r", encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return CafefCrawler().list_symbols(None if args.all else args.exchange)
+
+
+def main():
+    args = parse_args()
+    symbols = load_symbols(args)
+    if not symbols:
+        logger.error("No symbols to sync")
+        sys.exit(1)
+
+    checkpoint = SyncCheckpoint(args.checkpoint)
+    if args.reset:
+        checkpoint.reset()
+
+    limits = ResourceLimits({
+        "browser": args.browser_concurrency or config.BROWSER_POOL_SIZE * config.BROWSER_POOL_CONTEXTS,
+        "llm": args.llm_concurrency or rotator.max_concurrency,
+        "db": args.db_concurrency,
+    })
+    try:
+        summary = UniverseSyncService(limits, checkpoint).run(symbols)
+        logger.info(f"Done: {dict(summary)}")
+    finally:
+        BrowserPool.shutdown()
+        rotator.close()
+    if summary["failed"]:
+        sys.exit(2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import uuid
+
+import pytest
+
+
+@pytest.fixture
+def symbol(pg_engine):
+    """Mã riêng cho mỗi test, dọn sạch bản ghi sau khi chạy"""
+    from sqlalchemy import text
+
+    value = f"T{uuid.uuid4().hex[:10].upper()}"
+    yield value
+    with pg_engine.begin() as connection:
+        connection.execute(text("DELETE FROM shareholders WHERE symbol = :symbol"), {"symbol": value})
+
+
+def _shareholders(engine, symbol):
+    from sqlalchemy import text
+
+    with engine.connect() as connection:
+        rows = connection.execute(
+            text(
+                """
+                SELECT name, ownership_percent, shares_owned, updated_at
+                FROM shareholders WHERE symbol = :symbol
+                """
+            ),
+            {"symbol": symbol},
+        ).mappings()
+        return {row["name"]: dict(row) for row in rows}
+
+
+def test_inserts_then_updates_on_conflict(pg_engine, symbol):
+    from app.database import bulk_upsert
+    from app.models import Shareholder
+
+    result = bulk_upsert(
+        Shareholder,
+        [
+            {"symbol": symbol, "name": "Quỹ A", "ownership_percent": 10.5, "shares_owned": 1000.0},
+            # Dấu phẩy, nháy kép và None phải qua COPY csv nguyên vẹn
+            {"symbol": symbol, "name": 'Công ty "B", CTCP', "ownership_percent": None, "shares_owned": 0.0},
+        ],
+    )
+    assert (result.table, result.rows) == ("shareholders", 2)
+    before = _shareholders(pg_engine, symbol)
+    assert before["Quỹ A"]["ownership_percent"] == 10.5
+    assert before['Công ty "B", CTCP']["ownership_percent"] is None
+
+    bulk_upsert(
+        Shareholder,
+        [{"symbol": symbol, "name": "Quỹ A", "ownership_percent": 12.0, "shares_owned": 1200.0}],
+    )
+    after = _shareholders(pg_engine, symbol)
+    assert len(after) == 2
+    assert after["Quỹ A"]["ownership_percent"] == 12.0
+    assert after["Quỹ A"]["shares_owned"] == 1200.0
+    # Dòng được cập nhật có updated_at mới, dòng không có trong lần ghi giữ nguyên
+    assert after["Quỹ A"]["updated_at"] > before["Quỹ A"]["updated_at"]
+    assert after['Công ty "B", CTCP'] == before['Công ty "B", CTCP']
+
+
+def test_later_duplicate_in_batch_wins(pg_engine, symbol):
+    from app.database import bulk_upsert
+    from app.models import Shareholder
+
+    rows = [
+        {"symbol": symbol, "name": "Quỹ A", "ownership_percent": percent, "shares_owned": None}
+        for percent in (1.0, 2.0, 3.0, 4.0, 5.0)
+    ]
+    rows.insert(2, {"symbol": symbol, "name": "Quỹ B", "ownership_percent": 7.0, "shares_owned": None})
+
+    # batch_size nhỏ: các dòng trùng khóa nằm ở nhiều lô COPY khác nhau
+    result = bulk_upsert(Shareholder, rows, batch_size=2)
+
+    assert result.rows == len(rows)
+    stored = _shareholders(pg_engine, symbol)
+    assert {name: row["ownership_percent"] for name, row in stored.items()} == {
+        "Quỹ A": 5.0,
+        "Quỹ B": 7.0,
+    }
+
+
+def test_update_columns_limit_what_changes(pg_engine, symbol):
+    from app.database import bulk_upsert
+    from app.models import Shareholder
+
+    bulk_upsert(
+        Shareholder,
+        [{"symbol": symbol, "name": "Quỹ A", "ownership_percent": 1.0, "shares_owned": 100.0}],
+    )
+    bulk_upsert(
+        Shareholder,
+        [{"symbol": symbol, "name": "Quỹ A", "ownership_percent": 2.0, "shares_owned": 200.0}],
+        update_columns=["shares_owned"],
+    )
+    assert _shareholders(pg_engine, symbol)["Quỹ A"]["ownership_percent"] == 1.0
+    assert _shareholders(pg_engine, symbol)["Quỹ A"]["shares_owned"] == 200.0
+
+    # Không có cột nào để cập nhật: DO NOTHING
+    bulk_upsert(
+        Shareholder,
+        [{"symbol": symbol, "name": "Quỹ A", "ownership_percent": 3.0, "shares_owned": 300.0}],
+        update_columns=[],
+    )
+    assert _shareholders(pg_engine, symbol)["Quỹ A"]["shares_owned"] == 200.0
+
+
+def test_session_rollback_discards_rows(pg_engine, symbol):
+    from app.database import SessionLocal, bulk_upsert
+    from app.models import Shareholder
+
+    session = SessionLocal()
+    try:
+        bulk_upsert(
+            Shareholder,
+            [{"symbol": symbol, "name": "Quỹ A", "ownership_percent": 1.0, "shares_owned": None}],
+            session=session,
+        )
+        # Ghi trong transaction của session: caller quyết định commit
+        session.rollback()
+    finally:
+        session.close()
+    assert _shareholders(pg_engine, symbol) == {}
+
+
+def test_empty_rows_is_noop(pg_engine):
+    from app.database import bulk_upsert
+    from app.models import Shareholder
+
+    result = bulk_upsert(Shareholder, iter([]))
+    assert (result.table, result.rows) == ("shareholders", 0)
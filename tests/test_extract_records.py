@@ -0,0 +1,92 @@
+import pytest
+
+pytest.importorskip("google.genai")
+pytest.importorskip("tenacity")
+
+from pydantic import BaseModel
+
+
+class Item(BaseModel):
+    name: str
+    value: float
+
+
+@pytest.fixture
+def gemini(monkeypatch, tmp_path):
+    """gemini_api với cache LLM riêng trong tmp_path và không chờ giữa các lần thử"""
+    from app.config import config
+    from app.utils import gemini_api
+    from app.utils.caching_util import CachingUtil
+
+    monkeypatch.setattr(config, "GEMINI_API_KEYS", ["key-a"])
+    monkeypatch.setattr(config, "LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr(gemini_api, "llm_cache", CachingUtil(cache_dir=str(tmp_path), expiry_days=1))
+    monkeypatch.setattr(gemini_api.time, "sleep", lambda seconds: None)
+    return gemini_api
+
+
+def _responses(monkeypatch, gemini, *responses):
+    """Mỗi lần gọi _stream_items trả một response; Exception trong response được raise tại chỗ"""
+    remaining = list(responses)
+
+    def stream_items(prompt, schema):
+        for item in remaining.pop(0):
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    monkeypatch.setattr(gemini, "_stream_items", stream_items)
+
+
+def _item(name, value=1.0):
+    return {"name": name, "value": value}
+
+
+def test_retry_skips_emitted_records_by_content(monkeypatch, gemini):
+    # Lần sinh lại có thứ tự và độ dài khác lần đầu
+    _responses(
+        monkeypatch,
+        gemini,
+        [_item("A"), {"name": "broken"}, _item("B"), ConnectionError("stream cut")],
+        [_item("C"), _item("B"), {"name": "broken"}, _item("A"), _item("D")],
+    )
+
+    records = list(gemini.extract_records("prompt", Item))
+
+    assert [record.name for record in records] == ["A", "B", "C", "D"]
+    # Cache chỉ chứa lần sinh trọn vẹn, theo thứ tự của lần đó
+    cached = list(gemini.extract_records("prompt", Item))
+    assert [record.name for record in cached] == ["C", "B", "A", "D"]
+
+
+def test_changed_record_on_retry_is_not_dropped(monkeypatch, gemini):
+    _responses(
+        monkeypatch,
+        gemini,
+        [_item("A", 1.0), ConnectionError("stream cut")],
+        [_item("A", 2.0), _item("B")],
+    )
+
+    records = list(gemini.extract_records("prompt", Item))
+
+    assert [(record.name, record.value) for record in records] == [
+        ("A", 1.0),
+        ("A", 2.0),
+        ("B", 1.0),
+    ]
+
+
+def test_failed_extraction_is_not_cached(monkeypatch, gemini):
+    _responses(
+        monkeypatch,
+        gemini,
+        [_item("A"), ConnectionError("stream cut")],
+        [ConnectionError("stream cut")],
+        [_item("B")],
+    )
+
+    with pytest.raises(ConnectionError):
+        list(gemini.extract_records("prompt", Item))
+
+    # Lần gọi sau sinh lại thay vì đọc kết quả dở dang từ cache
+    assert [record.name for record in gemini.extract_records("prompt", Item)] == ["B"]
@@ -0,0 +1,52 @@
+from collections import Counter
+
+import pytest
+
+pytest.importorskip("google.genai")
+pytest.importorskip("tenacity")
+
+
+@pytest.fixture
+def gemini_endpoint():
+    """Endpoint generateContent giả trên localhost, ghi lại kết nối TCP và key của từng request"""
+    from scripts.benchmark_gemini_clients import StandInServer
+
+    server = StandInServer().start()
+    yield server
+    server.stop()
+
+
+def _call(rotator):
+    from google.genai import types
+
+    with rotator.client() as (client, _):
+        return client.models.generate_content(
+            model=rotator.model_id, contents=types.Part.from_text(text="ping")
+        ).text
+
+
+def test_one_client_and_connection_per_key(gemini_endpoint):
+    from app.utils.gemini_api import GeminiRotator
+
+    rotator = GeminiRotator(
+        api_keys=["key-a", "key-b"],
+        model_id="gemini-test",
+        rpm=10**6,
+        tpm=10**9,
+        base_url=gemini_endpoint.url,
+    )
+    try:
+        clients = []
+        for _ in range(20):
+            assert _call(rotator) == "OK"
+            clients.append(id(rotator._get_client("key-a")))
+
+        # Scheduler xoay vòng khi các key cùng sẵn sàng
+        assert Counter(gemini_endpoint.keys) == {"key-a": 10, "key-b": 10}
+        # Client được giữ lại giữa các lần gọi: mỗi key một client, một kết nối keep-alive
+        assert len(rotator._clients) == 2
+        assert len(set(clients)) == 1
+        assert gemini_endpoint.connections <= 2
+    finally:
+        rotator.close()
+    assert rotator._clients == {}
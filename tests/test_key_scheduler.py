@@ -0,0 +1,128 @@
+import time
+
+import pytest
+
+pytest.importorskip("google.genai")
+pytest.importorskip("tenacity")
+
+
+@pytest.fixture
+def make_endpoint():
+    """Tạo endpoint Gemini giả (scripts/benchmark_gemini_clients.py), dừng sau khi test xong"""
+    from scripts.benchmark_gemini_clients import StandInServer
+
+    servers = []
+
+    def make(errors=None):
+        server = StandInServer(errors=errors).start()
+        servers.append(server)
+        return server
+
+    yield make
+    for server in servers:
+        server.stop()
+
+
+def _rotator(server, api_keys, rpm=10**6):
+    from app.utils.gemini_api import GeminiRotator
+
+    return GeminiRotator(
+        api_keys=api_keys, model_id="gemini-test", rpm=rpm, tpm=10**9, base_url=server.url
+    )
+
+
+def _call(rotator):
+    from google.genai import types
+
+    with rotator.client() as (client, _):
+        return client.models.generate_content(
+            model=rotator.model_id, contents=types.Part.from_text(text="ping")
+        ).text
+
+
+def _state(rotator, api_key):
+    return next(state for state in rotator.scheduler._keys if state.api_key == api_key)
+
+
+def test_sequential_calls_rotate_keys(make_endpoint):
+    server = make_endpoint()
+    rotator = _rotator(server, ["key-a", "key-b", "key-c"])
+    try:
+        for _ in range(6):
+            assert _call(rotator) == "OK"
+    finally:
+        rotator.close()
+    assert server.keys == ["key-a", "key-b", "key-c"] * 2
+
+
+@pytest.mark.parametrize("status_code, cooldown", [(429, 30.0), (503, 7.5)])
+def test_failing_key_cools_down_and_other_key_takes_over(make_endpoint, status_code, cooldown):
+    from google.genai import errors
+
+    server = make_endpoint(errors={"key-bad": status_code})
+    rotator = _rotator(server, ["key-bad", "key-good"])
+    try:
+        with pytest.raises(errors.APIError) as raised:
+            _call(rotator)
+        assert raised.value.code == status_code
+
+        state = _state(rotator, "key-bad")
+        # 429 nghỉ cooldown_seconds, 5xx nghỉ 1/4
+        assert cooldown - 1 < state.cooldown_until - time.monotonic() <= cooldown
+        assert not state.disabled
+        for _ in range(5):
+            assert _call(rotator) == "OK"
+    finally:
+        rotator.close()
+    assert server.keys == ["key-bad"] + ["key-good"] * 5
+
+
+@pytest.mark.parametrize("status_code", [401, 403])
+def test_auth_error_disables_key(make_endpoint, status_code):
+    from google.genai import errors
+
+    server = make_endpoint(errors={"key-bad": status_code})
+    rotator = _rotator(server, ["key-bad", "key-good"])
+    try:
+        with pytest.raises(errors.APIError):
+            _call(rotator)
+
+        assert _state(rotator, "key-bad").disabled
+        assert rotator.scheduler.healthy_keys() == 1
+        # Client của key lỗi xác thực không được giữ lại
+        assert "key-bad" not in rotator._clients
+        for _ in range(3):
+            assert _call(rotator) == "OK"
+    finally:
+        rotator.close()
+    assert server.keys == ["key-bad"] + ["key-good"] * 3
+
+
+def test_generate_many_stays_within_aggregate_rpm(make_endpoint, monkeypatch):
+    from app.config import config
+    from app.utils import gemini_api
+
+    rpm, api_keys = 30, ["key-a", "key-b"]
+    server = make_endpoint()
+    rotator = _rotator(server, api_keys, rpm=rpm)
+    monkeypatch.setattr(gemini_api, "rotator", rotator)
+    monkeypatch.setattr(config, "LLM_CACHE_ENABLED", False)
+
+    # Vượt ngân sách ban đầu (rpm mỗi key) vài request: phần dư phải chờ ngân sách hồi lại
+    prompts = [f"prompt {i}" for i in range(len(api_keys) * rpm + 2)]
+    try:
+        results = gemini_api.generate_many(prompts, max_workers=16)
+    finally:
+        rotator.close()
+
+    assert results == ["OK"] * len(prompts)
+    calls = sorted(server.calls)
+    start = calls[0][0]
+    assert calls[-1][0] - start >= 60 / rpm * 0.9
+    for api_key in api_keys:
+        times = [at for at, key in calls if key == api_key]
+        for count, at in enumerate(times, start=1):
+            # Token bucket: tối đa rpm request tức thời, sau đó rpm/60 request mỗi giây
+            assert count <= rpm + (at - start) * rpm / 60 + 1
+    for count, (at, _) in enumerate(calls, start=1):
+        assert count <= len(api_keys) * (rpm + (at - start) * rpm / 60) + 1
@@ -0,0 +1,59 @@
+import math
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from app.utils.number_utils import parse_vn_number, parse_vn_number_frame, parse_vn_numbers
+
+CASES = [
+    ("1.234,5 tỷ đồng", 1.2345e12),
+    ("(12,3)%", -12.3),
+    ("2 nghìn tỷ", 2e12),
+    ("15,6 triệu", 15.6e6),
+    ("1.234.567", 1234567.0),
+    ("1,234", 1234.0),
+    ("-0,45", -0.45),
+    # Nhóm đầu là 0: số thập phân, không phải phân cách hàng nghìn
+    ("0,123", 0.123),
+    ("0.125", 0.125),
+    ("-0,125 tỷ", -1.25e8),
+    ("(0,250)%", -0.25),
+    ("0,5", 0.5),
+    ("", None),
+    ("N/A", None),
+    (None, None),
+]
+
+
+def _same(actual, expected):
+    if expected is None:
+        return actual is None or (isinstance(actual, float) and math.isnan(actual))
+    return actual == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("value, expected", CASES)
+def test_parse_vn_number(value, expected):
+    assert _same(parse_vn_number(value), expected)
+
+
+def test_vectorized_matches_scalar():
+    values = [value for value, _ in CASES]
+    vectorized = parse_vn_numbers(values)
+    for value, expected, actual in zip(values, (e for _, e in CASES), vectorized):
+        assert _same(actual, expected), value
+        assert _same(actual, parse_vn_number(value)), value
+
+
+@pytest.mark.parametrize("decimal, expected", [(",", [1234.5, 0.125]), (".", [1.2345, 125.0])])
+def test_explicit_decimal(decimal, expected):
+    values = ["1.234,5", "0,125"]
+    assert [parse_vn_number(value, decimal=decimal) for value in values] == pytest.approx(expected)
+    assert list(parse_vn_numbers(values, decimal=decimal)) == pytest.approx(expected)
+
+
+def test_frame_keeps_label_column():
+    frame = pd.DataFrame({"Chỉ tiêu": ["Doanh thu", "Lợi nhuận"], "2024": ["1.234,5", "(0,250)"]})
+    parsed = parse_vn_number_frame(frame)
+    assert list(parsed["Chỉ tiêu"]) == ["Doanh thu", "Lợi nhuận"]
+    assert list(parsed["2024"]) == pytest.approx([1234.5, -0.25])
@@ -0,0 +1,154 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("playwright")
+
+from app.crawler.cafef import CafefCrawler
+from app.services import company_info_service
+from app.services.company_info_service import CompanyInfoService
+from app.utils.markdown_tables import parse_markdown
+from app.utils.profile_sections import ProfileSection
+
+STORED_PROFILE = """# PHÂN TÍCH CHI TIẾT MÃ CHỨNG KHOÁN: AAA
+
+## Hồ sơ doanh nghiệp (Company Profile)
+
+- **Tên công ty:** Công ty AAA
+
+## Giao dịch nội bộ & Khối ngoại (Transactions)
+
+### Giao dịch khối ngoại (Foreign Transactions)
+
+| Ngày | Mua ròng/Bán ròng | Khối lượng Mua | Khối lượng Bán |
+| :--- | :--- | :--- | :--- |
+| 16/10/2026 | Mua ròng | 1000 | 500 |
+
+## Tổng quan thị trường (Sticker Snapshot)
+
+### Tổng quan
+
+| Nhãn | Dữ liệu chi tiết |
+| :--- | :--- |
+| Giá | 10.5 |
+
+### Các yếu tố định hướng tương lai (Catalysts)
+
+- **Kế hoạch kinh doanh năm:** Doanh thu 100 tỷ
+"""
+
+
+@pytest.fixture
+def service():
+    return CompanyInfoService(None)
+
+
+def _section(label):
+    return ProfileSection(label, "nội dung mới", "fingerprint")
+
+
+def _extract(service, monkeypatch, labels, response):
+    prompts = []
+
+    def generate(prompt, parse):
+        prompts.append(prompt)
+        return parse(response)
+
+    monkeypatch.setattr(company_info_service, "generate", generate)
+    markdown = service._extract_profile(
+        "AAA", [_section(label) for label in labels], patch_base=STORED_PROFILE
+    )
+    return parse_markdown(markdown), prompts
+
+
+def test_reworded_volatile_heading_replaces_old_block(service, monkeypatch):
+    document, prompts = _extract(
+        service,
+        monkeypatch,
+        [CafefCrawler.OVERVIEW_LABEL],
+        """## Tổng quan thị trường (Sticker Snapshot)
+
+### Tổng quan thị trường hôm nay
+
+| Nhãn | Dữ liệu chi tiết |
+| :--- | :--- |
+| Giá | 11.2 |
+""",
+    )
+
+    titles = [title for level, title in document if level]
+    # Heading cũ bị thay, heading cha và các heading khác giữ nguyên vị trí
+    assert titles == [
+        "PHÂN TÍCH CHI TIẾT MÃ CHỨNG KHOÁN: AAA",
+        "Hồ sơ doanh nghiệp (Company Profile)",
+        "Giao dịch nội bộ & Khối ngoại (Transactions)",
+        "Giao dịch khối ngoại (Foreign Transactions)",
+        "Tổng quan thị trường (Sticker Snapshot)",
+        "Tổng quan thị trường hôm nay",
+        "Các yếu tố định hướng tương lai (Catalysts)",
+    ]
+    assert document[(3, "Tổng quan thị trường hôm nay")][0].rows == [["Giá", "11.2"]]
+    assert document[(3, "Giao dịch khối ngoại (Foreign Transactions)")][0].rows == [
+        ["16/10/2026", "Mua ròng", "1000", "500"]
+    ]
+    # Prompt chỉ chứa phần hồ sơ thay đổi
+    assert len(prompts) == 1 and "nội dung mới" in prompts[0]
+
+
+def test_only_reextracted_sections_are_patched(service, monkeypatch):
+    document, _ = _extract(
+        service,
+        monkeypatch,
+        [CafefCrawler.FOREIGN_LABEL],
+        """### Giao dịch khối ngoại
+
+| Ngày | Mua ròng/Bán ròng | Khối lượng Mua | Khối lượng Bán |
+| :--- | :--- | :--- | :--- |
+| 17/10/2026 | Bán ròng | 200 | 900 |
+
+### Tổng quan
+
+| Nhãn | Dữ liệu chi tiết |
+| :--- | :--- |
+| Giá | 99 |
+""",
+    )
+
+    assert (3, "Giao dịch khối ngoại (Foreign Transactions)") not in document
+    assert document[(3, "Giao dịch khối ngoại")][0].rows == [
+        ["17/10/2026", "Bán ròng", "200", "900"]
+    ]
+    # Section tổng quan không được trích xuất lại: giữ giá trị cũ
+    assert document[(3, "Tổng quan")][0].rows == [["Giá", "10.5"]]
+
+
+def test_empty_new_block_keeps_stored_values(service, monkeypatch):
+    document, _ = _extract(
+        service,
+        monkeypatch,
+        [CafefCrawler.OVERVIEW_LABEL],
+        """### Tổng quan
+
+| Nhãn | Dữ liệu chi tiết |
+| :--- | :--- |
+| Giá | - |
+""",
+    )
+
+    assert document[(3, "Tổng quan")][0].rows == [["Giá", "10.5"]]
+
+
+def test_batch_prompt_marks_patched_tickers_partial(service):
+    from app.services.company_info_service import PreparedProfile
+
+    overview = [_section(CafefCrawler.OVERVIEW_LABEL)]
+    prepared = {
+        "AAA": PreparedProfile(overview, overview, patch_base=STORED_PROFILE),
+        "BBB": PreparedProfile(overview, overview),
+    }
+
+    single = service._render_batch_prompt([("AAA", overview)], prepared)
+    assert "Dữ liệu một phần" in single
+    assert "Dữ liệu một phần" not in service._render_batch_prompt([("BBB", overview)], prepared)
+
+    batch = service._render_batch_prompt([("AAA", overview), ("BBB", overview)], prepared)
+    assert "Dữ liệu thô của các mã AAA chỉ là MỘT PHẦN" in batch
@@ -0,0 +1,49 @@
+import threading
+import time
+
+from app.utils.single_flight import SingleFlight
+
+
+def test_one_holder_per_key(tmp_path):
+    flight = SingleFlight(str(tmp_path))
+    holders, peak = [], []
+    guard = threading.Lock()
+
+    def work():
+        with flight.lock("profile_AAA") as acquired:
+            assert acquired
+            with guard:
+                holders.append(1)
+                peak.append(len(holders))
+            time.sleep(0.01)
+            with guard:
+                holders.pop()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(peak) == 1
+    assert flight._locks == {}
+
+
+def test_non_blocking_returns_false_while_held(tmp_path):
+    flight = SingleFlight(str(tmp_path))
+    with flight.lock("profile_AAA") as acquired:
+        assert acquired
+        with flight.lock("profile_AAA", blocking=False) as second:
+            assert second is False
+        with flight.lock("profile_BBB", blocking=False) as other:
+            assert other is True
+    assert flight._locks == {}
+
+
+def test_locks_are_dropped_after_release(tmp_path):
+    flight = SingleFlight(str(tmp_path))
+    for i in range(1000):
+        with flight.lock(f"company_profile_S{i:04d}"):
+            pass
+    # Không giữ một threading.Lock cho mỗi key đã từng dùng
+    assert flight._locks == {}
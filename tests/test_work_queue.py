@@ -0,0 +1,171 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+
+@pytest.fixture
+def work_queue(queue_name):
+    from app.utils.work_queue import WorkQueue
+
+    return WorkQueue(queue_name, lease_seconds=30, backoff_seconds=60, max_backoff_seconds=600)
+
+
+def _rows(engine, queue_name):
+    from sqlalchemy import text
+
+    with engine.connect() as connection:
+        rows = connection.execute(
+            text(
+                """
+                SELECT key, status, attempts, lease_owner,
+                       EXTRACT(EPOCH FROM available_at - now()) AS available_in
+                FROM work_queue WHERE queue = :queue
+                """
+            ),
+            {"queue": queue_name},
+        ).mappings()
+        return {row["key"]: dict(row) for row in rows}
+
+
+def _expire_leases(engine, queue_name):
+    from sqlalchemy import text
+
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                """
+                UPDATE work_queue SET lease_expires_at = now() - interval '1 second'
+                WHERE queue = :queue AND status = 'running'
+                """
+            ),
+            {"queue": queue_name},
+        )
+
+
+def test_claim_leases_by_priority(pg_engine, queue_name, work_queue):
+    work_queue.enqueue(["AAA", "BBB"])
+    work_queue.enqueue(["CCC"], priority=10)
+    # Key đã có được giữ nguyên
+    work_queue.enqueue(["AAA"], priority=99)
+
+    items = work_queue.claim("worker-1", limit=2)
+
+    assert [item.key for item in items] == ["CCC", "AAA"]
+    assert all(item.attempts == 1 for item in items)
+    rows = _rows(pg_engine, queue_name)
+    assert rows["CCC"]["status"] == "running"
+    assert rows["CCC"]["lease_owner"] == "worker-1"
+    assert rows["BBB"]["status"] == "pending"
+    # Việc đang có lease không bị nhận lần nữa
+    assert [item.key for item in work_queue.claim("worker-2", limit=5)] == ["BBB"]
+    assert work_queue.claim("worker-3", limit=5) == []
+
+
+def test_expired_lease_is_reclaimed(pg_engine, queue_name, work_queue):
+    work_queue.enqueue(["AAA"], max_attempts=2)
+    first = work_queue.claim("worker-1", limit=1)[0]
+
+    # Heartbeat gia hạn lease của đúng worker đang giữ việc
+    assert work_queue.heartbeat("worker-1", [first.id]) == 1
+    assert work_queue.heartbeat("worker-2", [first.id]) == 0
+
+    _expire_leases(pg_engine, queue_name)
+    second = work_queue.claim("worker-2", limit=1)[0]
+    assert second.id == first.id
+    assert second.attempts == 2
+    # Worker cũ không còn ghi đè được kết quả
+    work_queue.complete("worker-1", first)
+    assert _rows(pg_engine, queue_name)["AAA"]["status"] == "running"
+
+    # Hết lượt thử mà lease lại hết hạn: chuyển failed thay vì nhận lại
+    _expire_leases(pg_engine, queue_name)
+    assert work_queue.claim("worker-3", limit=1) == []
+    assert _rows(pg_engine, queue_name)["AAA"]["status"] == "failed"
+
+
+def test_fail_backs_off_then_gives_up(pg_engine, queue_name, work_queue):
+    work_queue.enqueue(["AAA"], max_attempts=2)
+    item = work_queue.claim("worker-1", limit=1)[0]
+
+    assert work_queue.fail("worker-1", item, "boom") is True
+    row = _rows(pg_engine, queue_name)["AAA"]
+    assert row["status"] == "pending"
+    # backoff_seconds * 2^0 với jitter ±20%
+    assert 60 * 0.8 - 1 <= float(row["available_in"]) <= 60 * 1.2
+    assert work_queue.claim("worker-1", limit=1) == []
+
+    from sqlalchemy import text
+
+    with pg_engine.begin() as connection:
+        connection.execute(
+            text("UPDATE work_queue SET available_at = now() WHERE queue = :queue"),
+            {"queue": queue_name},
+        )
+    item = work_queue.claim("worker-1", limit=1)[0]
+    assert item.attempts == 2
+    assert work_queue.fail("worker-1", item, "boom again") is False
+    assert _rows(pg_engine, queue_name)["AAA"]["status"] == "failed"
+
+
+def test_concurrent_claims_skip_locked_rows(pg_engine, queue_name, work_queue):
+    keys = [f"K{i:03d}" for i in range(200)]
+    work_queue.enqueue(keys)
+
+    def drain(worker_id):
+        claimed = []
+        while True:
+            items = work_queue.claim(worker_id, limit=7)
+            if not items:
+                return claimed
+            claimed.extend(item.key for item in items)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(drain, [f"worker-{i}" for i in range(8)]))
+
+    claimed = [key for result in results for key in result]
+    # Mỗi việc được đúng một worker nhận, không sót việc nào
+    assert sorted(claimed) == keys
+    assert sum(1 for result in results if result) > 1
+
+
+def test_worker_stop_releases_unstarted_items(pg_engine, queue_name):
+    from app.utils.work_queue import QueueWorker, WorkQueue
+
+    # Lease ngắn: heartbeat mỗi giây
+    work_queue = WorkQueue(queue_name, lease_seconds=3)
+    work_queue.enqueue(["AAA", "BBB", "CCC", "DDD"])
+    started = threading.Event()
+    finish = threading.Event()
+    handled = []
+
+    def handler(key, payload):
+        handled.append(key)
+        started.set()
+        finish.wait(30)
+
+    worker = QueueWorker(
+        work_queue, handler, concurrency=1, batch_size=4, poll_seconds=0.1
+    )
+    thread = threading.Thread(target=worker.run)
+    thread.start()
+    assert started.wait(30)
+
+    worker.stop()
+    # Việc đang chạy lâu hơn lease: heartbeat vẫn gia hạn nên worker khác không nhận lại được
+    time.sleep(5)
+    assert handled[0] not in [item.key for item in work_queue.claim("other-worker", limit=1)]
+    finish.set()
+    thread.join(30)
+    assert not thread.is_alive()
+
+    rows = _rows(pg_engine, queue_name)
+    assert handled == [handled[0]]
+    assert rows.pop(handled[0])["status"] == "done"
+    released = [row for row in rows.values() if row["lease_owner"] != "other-worker"]
+    assert len(released) >= 2
+    for row in released:
+        # Trả về hàng đợi, không tính lượt thử
+        assert row["status"] == "pending"
+        assert row["attempts"] == 0